@@ -0,0 +1,153 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from bundle import write_bundle
+from compiler import compile_to_bytecode
+from instrument import CompileProfile, write_report
+from kbc import compile_flags, load_bytecode
+
+
+def output_path(source_file):
+    return source_file.rsplit('.', 1)[0] + '.kbc'
+
+
+def collect_sources(paths):
+    """Expand files, directories and glob patterns into a list of .snl files."""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                sources.extend(os.path.join(root, name) for name in sorted(files)
+                               if name.endswith('.snl'))
+        elif glob.has_magic(path):
+            sources.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            sources.append(path)
+    # Keep the first occurrence of files named more than once
+    return list(dict.fromkeys(sources))
+
+
+def compile_one(source_file, profile=None, **options):
+    """Compile one file for a batch, catching any error.
+
+    Runs in the worker processes, where lexer, parser and compiler stay
+    imported for every file the worker handles. profile is None, 'time' or
+    'memory'; options go to compile_to_bytecode.
+    """
+    report = None
+    try:
+        size = os.path.getsize(source_file)
+        compile_profile = None
+        if profile:
+            compile_profile = CompileProfile(source_file, trace_memory=profile == 'memory')
+        compiled = compile_to_bytecode(source_file, output_path(source_file),
+                                       profile=compile_profile, **options)
+        if compile_profile:
+            report = compile_profile.report()
+        return source_file, 'compiled' if compiled else 'up-to-date', size, None, report
+    except Exception as e:
+        return source_file, 'failed', 0, f"{type(e).__name__}: {e}", report
+
+
+def compile_batch(sources, jobs=None, profile=None, **options):
+    """Compile sources, yielding (source, status, size, error, report) in order."""
+    jobs = jobs or os.cpu_count() or 1
+    worker = partial(compile_one, profile=profile, **options)
+    if jobs == 1 or len(sources) <= 1:
+        yield from map(worker, sources)
+        return
+
+    # A few chunks per worker amortise the pickling round trips without
+    # leaving workers idle at the end of the run.
+    chunksize = max(1, len(sources) // (4 * jobs))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(worker, sources, chunksize=chunksize)
+
+
+def run_batch(paths, jobs=None, timings=False, profile_file=None, **options):
+    """Compile every source under paths, print a summary and return an exit code.
+
+    timings prints compile time per phase summed over all files;
+    profile_file receives the per-file JSON reports, with peak memory.
+    """
+    sources = collect_sources(paths)
+    if not sources:
+        print("No .snl files found")
+        return 1
+
+    profile = 'memory' if profile_file else 'time' if timings else None
+    counts = {'compiled': 0, 'up-to-date': 0, 'failed': 0}
+    total_bytes = 0
+    reports = []
+    start = time.perf_counter()
+    for source_file, status, size, error, report in compile_batch(sources, jobs, profile, **options):
+        counts[status] += 1
+        total_bytes += size
+        if error:
+            print(f"FAILED {source_file}: {error}")
+        if report:
+            reports.append(report)
+    elapsed = time.perf_counter() - start
+
+    if timings:
+        phases = {}
+        for report in reports:
+            for phase in report['phases']:
+                phases[phase['name']] = phases.get(phase['name'], 0.0) + phase['wall']
+        for name, wall in phases.items():
+            print(f"  {name:<14} {wall * 1000:10.2f} ms wall (all files)")
+    if profile_file:
+        write_report(reports, profile_file)
+
+    print(f"{counts['compiled']} compiled, {counts['up-to-date']} up to date, "
+          f"{counts['failed']} failed ({len(sources)} files in {elapsed:.2f}s, "
+          f"{len(sources) / elapsed:.1f} files/s, "
+          f"{total_bytes / elapsed / (1 << 20):.2f} MB/s)")
+    return 1 if counts['failed'] else 0
+
+
+def module_name(source_file):
+    """The name other modules ආනයනය a source by: its file name without .snl."""
+    return os.path.splitext(os.path.basename(source_file))[0]
+
+
+def run_bundle(paths, bundle_file, entry=None, jobs=None, **options):
+    """Compile every source under paths into one .kba bundle; returns an exit code.
+
+    entry names the main module, by default the first source found.
+    """
+    sources = collect_sources(paths)
+    if not sources:
+        print("No .snl files found")
+        return 1
+
+    modules = {}
+    failed = False
+    for source_file, status, size, error, report in compile_batch(sources, jobs, **options):
+        if error:
+            print(f"FAILED {source_file}: {error}")
+            failed = True
+            continue
+        name = module_name(source_file)
+        if name in modules:
+            print(f"Error: {modules[name]} and {source_file} are both module {name}")
+            return 1
+        modules[name] = source_file
+    if failed:
+        return 1
+
+    entry = entry or module_name(sources[0])
+    if entry not in modules:
+        print(f"Error: no module named {entry}")
+        return 1
+    names = [entry] + [name for name in modules if name != entry]
+    write_bundle(bundle_file,
+                 [(name, load_bytecode(output_path(modules[name]))[1]) for name in names],
+                 flags=compile_flags(options.get('optimize', 0),
+                                     options.get('buffered_output', False)))
+    print(f"Bundled {len(names)} modules into {bundle_file} (main module {entry})")
+    return 0
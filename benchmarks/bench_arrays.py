@@ -0,0 +1,101 @@
+"""Element-wise දක්වා loops over arrays against whole-array operations.
+
+Each workload computes the same number both ways from two arrays of
+--size elements: a loop that reads a[i] and b[i] one at a time, and
+operators and reductions that run over the whole arrays at once. Only
+the kernel is timed; the arrays are built beforehand. Both versions are
+compiled at -O1 and must agree.
+
+Usage: python benchmarks/bench_arrays.py [--size 1M] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import karray  # noqa: E402
+from compiler import compile_source  # noqa: E402
+
+SETUP = '''සඳහන් a = අරාව(0, {size});
+සඳහන් b = අරාව(0, {size}) * 3 - {size};
+'''
+
+# name: (element-wise loop, whole-array version); both leave their answer in r
+WORKLOADS = {
+    'dot product': ('''සඳහන් r = 0;
+දක්වා (i = 0, {size}) {{
+    සඳහන් r = r + a[i] * b[i];
+}}
+''', '''සඳහන් p = a * b;
+සඳහන් r = p.එකතුව();
+'''),
+    'axpy sum': ('''සඳහන් r = 0;
+දක්වා (i = 0, {size}) {{
+    සඳහන් r = r + a[i] * 2 + b[i];
+}}
+''', '''සඳහන් y = a * 2 + b;
+සඳහන් r = y.එකතුව();
+'''),
+    'count above': ('''සඳහන් r = 0;
+දක්වා (i = 0, {size}) {{
+    නම් (b[i] > a[i]) {{
+        සඳහන් r = r + 1;
+    }}
+}}
+''', '''සඳහන් above = b > a;
+සඳහන් r = above.එකතුව();
+'''),
+    'max': ('''සඳහන් r = b[0];
+දක්වා (i = 1, {size}) {{
+    නම් (b[i] > r) {{
+        සඳහන් r = b[i];
+    }}
+}}
+''', '''සඳහන් r = b.උපරිම();
+'''),
+}
+
+
+def parse_size(text):
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    text = text.strip().lower()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def timed_run(code, namespace, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        exec(code, namespace)
+        best = min(best, time.perf_counter() - start)
+    return best, namespace['r']
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', default='1M')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    size = parse_size(args.size)
+
+    namespace = {'__name__': 'kethaka_program'}
+    exec(compile_source(SETUP.format(size=size), optimize=1), namespace)
+
+    print(f"{size:,} elements, {karray.BACKEND} backend")
+    print(f"{'workload':<14} {'loop':>10} {'vectorized':>12} {'Melem/s':>10}")
+    for name, (loop, vectorized) in WORKLOADS.items():
+        loop_time, expected = timed_run(
+            compile_source(loop.format(size=size), optimize=1), namespace, args.repeat)
+        vector_time, result = timed_run(
+            compile_source(vectorized.format(size=size), optimize=1), namespace, args.repeat)
+        assert result == expected, (name, result, expected)
+        print(f"{name:<14} {loop_time:9.3f}s {vector_time:11.3f}s "
+              f"{size / vector_time / 1e6:10.1f}  {loop_time / vector_time:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Memory and lowering throughput of slotted AST nodes against dict nodes.
+
+Usage: python benchmarks/bench_ast.py [--functions 20000]
+"""
+import argparse
+import ast as py_ast
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import ast_to_python_ast  # noqa: E402
+from lexer import lexer  # noqa: E402
+from optimizer import walk, walk_expression  # noqa: E402
+from parser import parse  # noqa: E402
+
+FUNCTION = '''ක්‍රියාව ගණනය{i}(අ, ආ) {{
+    නම් (අ > ආ * 2 + {i}) {{
+        ආපසු (අ + ආ) * (අ - ආ) / 3 + {i};
+    }} නැතහොත් {{
+        මුද්‍රණය(අ);
+        ආපසු ආ;
+    }}
+}}
+සඳහන් අගය{i} = "කේතක";
+'''
+
+COMPARE = {'<': py_ast.Lt, '>': py_ast.Gt, '<=': py_ast.LtE, '>=': py_ast.GtE,
+           '==': py_ast.Eq, '!=': py_ast.NotEq}
+ARITHMETIC = {'+': py_ast.Add, '-': py_ast.Sub, '*': py_ast.Mult, '/': py_ast.Div}
+
+
+def dict_to_python_ast(node):
+    # The string-dispatched lowering used with dict nodes
+    if node['type'] == 'var_declaration':
+        return py_ast.Assign(targets=[py_ast.Name(id=node['name'], ctx=py_ast.Store())],
+                             value=py_ast.Constant(value=node['value']))
+    elif node['type'] == 'function_definition':
+        return py_ast.FunctionDef(
+            name=node['name'],
+            args=py_ast.arguments(posonlyargs=[], args=[py_ast.arg(arg=a) for a in node['params']],
+                                  kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=[dict_to_python_ast(s) for s in node['body']], decorator_list=[])
+    elif node['type'] == 'print_statement':
+        return py_ast.Expr(value=py_ast.Call(
+            func=py_ast.Name(id='print', ctx=py_ast.Load()),
+            args=[py_ast.Name(id=node['value'], ctx=py_ast.Load())], keywords=[]))
+    elif node['type'] == 'if_statement':
+        return py_ast.If(test=dict_to_python_ast(node['condition']),
+                         body=[dict_to_python_ast(s) for s in node['body']],
+                         orelse=[dict_to_python_ast(s) for s in (node['else_body'] or [])])
+    elif node['type'] == 'binary_operation':
+        if node['operator'] in COMPARE:
+            return py_ast.Compare(left=dict_to_python_ast(node['left']),
+                                  ops=[COMPARE[node['operator']]()],
+                                  comparators=[dict_to_python_ast(node['right'])])
+        return py_ast.BinOp(left=dict_to_python_ast(node['left']),
+                            op=ARITHMETIC[node['operator']](),
+                            right=dict_to_python_ast(node['right']))
+    elif node['type'] == 'number':
+        return py_ast.Constant(value=node['value'])
+    elif node['type'] == 'string_literal':
+        return py_ast.Constant(value=node['value'])
+    elif node['type'] == 'variable':
+        return py_ast.Name(id=node['name'], ctx=py_ast.Load())
+    elif node['type'] == 'return_statement':
+        return py_ast.Return(value=dict_to_python_ast(node['value']))
+    raise ValueError(f"Unknown node type: {node['type']}")
+
+
+def count_nodes(program):
+    count = 0
+    for statement in walk(program):
+        count += 1
+        for name in statement._expressions:
+            count += sum(1 for _ in walk_expression(getattr(statement, name)))
+    return count
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, peak
+
+
+def best_time(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--functions', type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    source = ''.join(FUNCTION.format(i=i) for i in range(args.functions))
+    tokens = lexer(source)
+
+    program, node_size, node_peak = measure_memory(lambda: parse(tokens, source))
+    dicts, dict_size, dict_peak = measure_memory(lambda: [n.to_dict() for n in program])
+    nodes = count_nodes(program)
+    parse_time = best_time(lambda: parse(tokens, source))
+    print(f"{nodes:,} nodes from {len(source.encode('utf-8')) / (1 << 20):.1f} MB of source")
+    print(f"  parse into slotted nodes: {parse_time:.3f}s ({nodes / parse_time:,.0f} nodes/s)")
+    print(f"  retained  slots {node_size / (1 << 20):7.1f} MB   dicts {dict_size / (1 << 20):7.1f} MB"
+          f"   ({dict_size / node_size:.1f}x)")
+    print(f"  peak      slots {node_peak / (1 << 20):7.1f} MB   dicts {dict_peak / (1 << 20):7.1f} MB")
+
+    for label, lower, tree in (('visitor', ast_to_python_ast, program),
+                               ('dict if/elif', dict_to_python_ast, dicts)):
+        elapsed = best_time(lambda: [lower(node) for node in tree])
+        print(f"  lower ({label:<12}) {elapsed:.3f}s ({nodes / elapsed:,.0f} nodes/s)")
+
+
+if __name__ == '__main__':
+    main()
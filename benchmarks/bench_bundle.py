@@ -0,0 +1,110 @@
+"""Time to first output and peak RSS of a .kba bundle against one big .kbc.
+
+Generates a program of --modules modules with --functions functions each.
+The bundled version imports every module but only uses one; the
+monolithic version is the same code as a single .kbc, which is how such
+a program had to be shipped before bundles.
+
+Usage: python benchmarks/bench_bundle.py [--modules 300] [--functions 40] [--runs 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+FUNCTION = '''ක්‍රියාව {name}(අ, ආ) {{
+    නම් (අ > ආ) {{
+        ආපසු අ + ආ * {i};
+    }} නැතහොත් {{
+        ආපසු (ආ - අ) / 3;
+    }}
+}}
+'''
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def generate(directory, modules, functions):
+    """Write the bundle's sources and the monolithic source; return their paths."""
+    source_directory = os.path.join(directory, 'src')
+    os.mkdir(source_directory)
+    main = [f'ආනයනය mod{m};\n' for m in range(modules)]
+    main.append('සඳහන් x = 1;\nmod0.f0(x, x)\nමුද්‍රණය(x);\n')
+    write(os.path.join(source_directory, 'main.snl'), ''.join(main))
+    monolithic = []
+    for m in range(modules):
+        body = ''.join(FUNCTION.format(name=f'f{f}', i=f) for f in range(functions))
+        write(os.path.join(source_directory, f'mod{m}.snl'), body)
+        monolithic.append(''.join(FUNCTION.format(name=f'mod{m}_f{f}', i=f)
+                                  for f in range(functions)))
+    monolithic.append('සඳහන් x = 1;\nmod0_f0(x, x)\nමුද්‍රණය(x);\n')
+    monolithic_file = os.path.join(directory, 'monolithic.snl')
+    write(monolithic_file, ''.join(monolithic))
+    return source_directory, monolithic_file
+
+
+def measure(program, runs):
+    """Best time to first output line and peak RSS over runs."""
+    best_time, best_rss = float('inf'), float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'kethaka'), program],
+                                   stdout=subprocess.PIPE)
+        process.stdout.readline()
+        first_output = time.perf_counter() - start
+        process.stdout.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            raise SystemExit(f"{program} exited with {process.returncode}")
+        best_time = min(best_time, first_output)
+        best_rss = min(best_rss, usage.ru_maxrss)
+    return best_time, best_rss / 1024
+
+
+def build(directory, modules, functions):
+    from batch import run_bundle
+    from compiler import compile_to_bytecode
+    source_directory, monolithic_file = generate(directory, modules, functions)
+    run_bundle([os.path.join(source_directory, 'main.snl'), source_directory],
+               os.path.join(directory, 'program.kba'))
+    compile_to_bytecode(monolithic_file, os.path.join(directory, 'monolithic.kbc'))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--modules', type=int, default=300)
+    arg_parser.add_argument('--functions', type=int, default=40)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    arg_parser.add_argument('--build', metavar='DIRECTORY', help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.build:
+        build(args.build, args.modules, args.functions)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Built in a child: Linux carries a parent's peak RSS over into the
+        # children it starts, so this process has to stay small
+        subprocess.run([sys.executable, __file__, '--build', directory,
+                        '--modules', str(args.modules), '--functions', str(args.functions)],
+                       check=True, stdout=subprocess.DEVNULL)
+        monolithic_kbc = os.path.join(directory, 'monolithic.kbc')
+        bundle_file = os.path.join(directory, 'program.kba')
+
+        print(f"{args.modules} modules x {args.functions} functions")
+        for name, program in [('one .kbc', monolithic_kbc), ('.kba bundle', bundle_file)]:
+            first_output, rss = measure(program, args.runs)
+            print(f"{name:<12} {os.path.getsize(program) / (1 << 20):7.2f} MB  "
+                  f"first output {first_output * 1000:8.1f} ms  peak RSS {rss:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
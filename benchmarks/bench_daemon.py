@@ -0,0 +1,91 @@
+"""Latency of one-file compiles: cold kethakac against the compile server.
+
+Measures four ways to compile the same file: a kethakac process that
+compiles in-process, a `kethakac [--force] file.snl` process that hands
+the file to a running `kethakac --daemon` before importing argparse, the
+same with an option that needs argparse (--socket), and a request sent
+straight to the server's socket, as an editor integration holding a
+connection open would.
+
+Usage: python benchmarks/bench_daemon.py [--runs 20] [--jobs 2]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from client import compile_remote, send_request  # noqa: E402
+
+SNIPPET = '''ක්‍රියාව එකතුව(අ, ආ) {
+    නම් (අ > ආ) {
+        ආපසු අ + ආ * 2;
+    } නැතහොත් {
+        ආපසු (ආ - අ) / 3;
+    }
+}
+සඳහන් නම = "කේතක";
+මුද්‍රණය(නම);
+එකතුව(නම, නම);
+'''
+
+
+def per_run(function, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--runs', type=int, default=20)
+    arg_parser.add_argument('--jobs', type=int, default=2)
+    args = arg_parser.parse_args()
+
+    kethakac = [sys.executable, os.path.join(ROOT, 'kethakac')]
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'bench.sock')
+        source_file = os.path.join(directory, 'bench.snl')
+        output_file = os.path.join(directory, 'bench.kbc')
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(SNIPPET * 20)
+
+        def run(*extra):
+            subprocess.run(kethakac + ['--force', '--socket', socket_path, *extra, source_file],
+                           check=True, stdout=subprocess.DEVNULL)
+
+        # The socket comes from the environment, so nothing needs argparse
+        environment = dict(os.environ, KETHAKA_SOCKET=socket_path)
+
+        def run_plain():
+            subprocess.run(kethakac + ['--force', source_file], env=environment,
+                           check=True, stdout=subprocess.DEVNULL)
+
+        cold = per_run(lambda: run('--no-daemon'), args.runs)
+
+        server = subprocess.Popen(kethakac + ['--daemon', '-j', str(args.jobs),
+                                              '--socket', socket_path],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            while send_request({'command': 'ping'}, socket_path) is None:
+                time.sleep(0.05)
+            client = per_run(run_plain, args.runs)
+            client_options = per_run(run, args.runs)
+            direct = per_run(lambda: compile_remote(source_file, output_file, force=True,
+                                                    socket_path=socket_path), args.runs * 10)
+        finally:
+            send_request({'command': 'shutdown'}, socket_path)
+            server.wait()
+
+    for name, seconds in [('kethakac, no daemon', cold), ('kethakac client', client),
+                          ('client with options', client_options), ('socket request', direct)]:
+        print(f"{name:<20} {seconds * 1000:9.2f} ms/compile  {cold / seconds:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Edit-to-bytecode latency of incremental against whole-file compiles.
+
+Generates a source of about --lines lines, compiles it once to warm an
+IncrementalCompiler, then applies three kinds of edit in the middle of
+the file and times compile_to_bytecode for each, with and without the
+incremental compiler.
+
+Usage: python benchmarks/bench_incremental.py [--lines 20000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import compile_to_bytecode  # noqa: E402
+from incremental import IncrementalCompiler  # noqa: E402
+
+UNIT = '''ක්‍රියාව එකතුව{i}(අ, ආ) {{
+    නම් (අ > ආ) {{
+        ආපසු අ + ආ * {i};
+    }} නැතහොත් {{
+        ආපසු (ආ - අ) / 3;
+    }}
+}}
+සඳහන් අගය{i} = {i};
+එකතුව{i}(අගය{i}, අගය{i});
+'''
+UNIT_LINES = UNIT.count('\n')
+
+
+def edits(source, middle):
+    yield 'function body', source.replace(f'ආ * {middle};', f'ආ * {middle + 1};')
+    yield 'function, +1 line', source.replace(f'ආපසු අ + ආ * {middle};',
+                                             f'මුද්‍රණය(අ);\n        ආපසු අ + ආ * {middle};')
+    yield 'top-level statement', source.replace(f'සඳහන් අගය{middle} = {middle};',
+                                               f'සඳහන් අගය{middle} = {middle + 1};')
+
+
+def timed_compile(source_file, output_file, source, incremental, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(source)
+        start = time.perf_counter()
+        compile_to_bytecode(source_file, output_file, force=True, incremental=incremental)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=20000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    count = max(1, args.lines // UNIT_LINES)
+    source = ''.join(UNIT.format(i=i) for i in range(count))
+    print(f"{count * UNIT_LINES:,} lines, {count * 2:,} units")
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file = os.path.join(directory, 'big.snl')
+        output_file = os.path.join(directory, 'big.kbc')
+        for name, edited in edits(source, count // 2):
+            incremental = IncrementalCompiler()
+            timed_compile(source_file, output_file, source, incremental, 1)
+            whole = timed_compile(source_file, output_file, edited, None, args.repeat)
+            # Alternate between the two versions so every run sees an edit
+            best = float('inf')
+            for version in [edited, source] * args.repeat:
+                best = min(best, timed_compile(source_file, output_file, version, incremental, 1))
+            print(f"{name:<20} whole {whole * 1000:9.1f} ms  incremental {best * 1000:8.1f} ms  "
+                  f"{whole / best:6.1f}x  {incremental.last_stats}")
+
+
+if __name__ == '__main__':
+    main()
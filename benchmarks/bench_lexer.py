@@ -0,0 +1,96 @@
+"""Tokens/sec of lexer.lexer against the original per-pattern lexer.
+
+Usage: python benchmarks/bench_lexer.py [--sizes 1K,1M,50M] [--legacy-max 1M]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer import TOKEN_SPEC, lexer  # noqa: E402
+
+SNIPPET = '''# සංඛ්‍යා ගණනය කිරීම
+ක්‍රියාව එකතුව(අ, ආ) {
+    නම් (අ > ආ) {
+        ආපසු අ + ආ * 2;
+    } නැතහොත් {
+        ආපසු (ආ - අ) / 3;
+    }
+}
+සඳහන් නම = "කේතක";
+සඳහන් x_1 = 12345;
+මුද්‍රණය(නම);
+එකතුව(x_1, නම);
+'''
+
+
+def legacy_lexer(code):
+    # The lexer as it was before the master pattern: every TOKEN_SPEC entry is
+    # tried in turn at every position.
+    tokens = []
+    line_num = 1
+    pos = 0
+    while pos < len(code):
+        match = None
+        for token_name, pattern in TOKEN_SPEC:
+            regex = re.compile(pattern)
+            match = regex.match(code, pos)
+            if match:
+                value = match.group(0)
+                if token_name not in ['SKIP', 'NEWLINE']:
+                    tokens.append((token_name, value, line_num))
+                if token_name == 'NEWLINE':
+                    line_num += 1
+                pos = match.end()
+                break
+        if not match:
+            raise SyntaxError(f"Invalid character '{code[pos]}' at line {line_num}")
+    return tokens
+
+
+def parse_size(text):
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def make_source(size):
+    repeat = size // len(SNIPPET.encode('utf-8')) + 1
+    return SNIPPET * repeat
+
+
+def run(label, func, code):
+    start = time.perf_counter()
+    tokens = func(code)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<8} {len(tokens):>12,} tokens {elapsed:>9.3f}s "
+          f"{len(tokens) / elapsed:>14,.0f} tokens/s")
+    return tokens, elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='1K,1M,50M')
+    arg_parser.add_argument('--legacy-max', default='1M',
+                            help='skip the legacy lexer above this input size')
+    args = arg_parser.parse_args()
+
+    legacy_max = parse_size(args.legacy_max)
+    for size_text in args.sizes.split(','):
+        size = parse_size(size_text)
+        code = make_source(size)
+        print(f"{size_text} ({len(code.encode('utf-8')):,} bytes)")
+        tokens, elapsed = run('master', lexer, code)
+        if size <= legacy_max:
+            legacy_tokens, legacy_elapsed = run('legacy', legacy_lexer, code)
+            assert legacy_tokens == tokens, "lexers disagree"
+            print(f"  speedup  {legacy_elapsed / elapsed:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Counted දක්වා loops against the same sum written as recursion.
+
+Both programs add up i * (k * 2) for i from 0 to n. The loop compiles to
+`for i in range(0, n)` with k * 2 hoisted out of it; the recursive version
+makes one call per step, so it needs a recursion limit above n and is only
+run up to --max-depth. Both are compiled at -O1: -O2 would memoize the
+recursive function, whose arguments never repeat. The loop is also run
+at -O0, without hoisting.
+
+Usage: python benchmarks/bench_loops.py [--sizes 1M,10M,100M] [--max-depth 1M] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import compile_source  # noqa: E402
+
+LOOP = '''ක්‍රියාව එකතුව(n, k) {
+    සඳහන් total = 0;
+    දක්වා (i = 0, n) {
+        සඳහන් total = total + i * (k * 2);
+    }
+    ආපසු total;
+}
+'''
+
+RECURSION = '''ක්‍රියාව එකතුව(n, k) {
+    ආපසු පියවර(0, n, k, 0);
+}
+ක්‍රියාව පියවර(i, n, k, total) {
+    නම් (i == n) {
+        ආපසු total;
+    }
+    ආපසු පියවර(i + 1, n, k, total + i * (k * 2));
+}
+'''
+
+
+def parse_size(text):
+    multipliers = {'k': 1_000, 'm': 1_000_000, 'g': 1_000_000_000}
+    text = text.strip().lower()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def timed_call(function, n, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(n, 3)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='1M,10M,100M')
+    arg_parser.add_argument('--max-depth', default='1M')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    max_depth = parse_size(args.max_depth)
+
+    functions = {}
+    for name, source, optimize in [('loop', LOOP, 1), ('unhoisted', LOOP, 0),
+                                   ('recursion', RECURSION, 1)]:
+        namespace = {}
+        exec(compile_source(source, optimize=optimize), namespace)
+        functions[name] = namespace['එකතුව']
+
+    print(f"{'n':>12} {'loop':>12} {'loop -O0':>12} {'recursion':>12}")
+    for n in sizes:
+        loop, expected = timed_call(functions['loop'], n, args.repeat)
+        unhoisted, result = timed_call(functions['unhoisted'], n, args.repeat)
+        assert result == expected, (result, expected)
+        if n <= max_depth:
+            sys.setrecursionlimit(max(sys.getrecursionlimit(), n + 1000))
+            recursion, result = timed_call(functions['recursion'], n, args.repeat)
+            assert result == expected, (result, expected)
+            recursion = f"{recursion:11.3f}s  {recursion / loop:5.1f}x"
+        else:
+            recursion = f"{'(too deep)':>12}"
+        print(f"{n:>12,} {loop:11.3f}s {unhoisted:11.3f}s {recursion}")
+
+
+if __name__ == '__main__':
+    main()
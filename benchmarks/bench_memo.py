@@ -0,0 +1,78 @@
+"""Recursive workloads with and without memoization of pure functions.
+
+Each workload is compiled at -O1, which leaves functions alone, and at
+-O2, which memoizes the pure ones; the -O2 code is run once per memo
+eviction policy. Every run defines its functions anew, so it starts with
+empty caches.
+
+Usage: python benchmarks/bench_memo.py [--fib 27] [--grid 12] [--memo-size 4096] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import memo  # noqa: E402
+from compiler import compile_source  # noqa: E402
+
+FIBONACCI = '''ක්‍රියාව fib(n) {{
+    නම් (n < 2) {{
+        ආපසු n;
+    }}
+    ආපසු fib(n - 1) + fib(n - 2);
+}}
+fib({n});
+'''
+
+# Monotone lattice paths through a grid, one step right or down at a time
+LATTICE_PATHS = '''ක්‍රියාව මාර්ග(පේළි, තීරු) {{
+    නම් (පේළි == 0) {{
+        ආපසු 1;
+    }}
+    නම් (තීරු == 0) {{
+        ආපසු 1;
+    }}
+    ආපසු මාර්ග(පේළි - 1, තීරු) + මාර්ග(පේළි, තීරු - 1);
+}}
+මාර්ග({n}, {n});
+'''
+
+
+def timed_run(code, repeat):
+    """Best time over repeat runs, and the namespace of the last run."""
+    best = float('inf')
+    for _ in range(repeat):
+        namespace = {'__name__': 'kethaka_program'}
+        start = time.perf_counter()
+        exec(code, namespace)
+        best = min(best, time.perf_counter() - start)
+    return best, namespace
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--fib', type=int, default=27)
+    arg_parser.add_argument('--grid', type=int, default=12)
+    arg_parser.add_argument('--memo-size', type=int, default=memo.DEFAULT_SIZE)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    workloads = [(f'fib({args.fib})', 'fib', FIBONACCI.format(n=args.fib)),
+                 (f'paths({args.grid}, {args.grid})', 'මාර්ග', LATTICE_PATHS.format(n=args.grid))]
+    for name, function, source in workloads:
+        plain, _ = timed_run(compile_source(source, optimize=1), args.repeat)
+        print(f"{name:<16} -O1          {plain * 1000:10.2f} ms")
+        memoized = compile_source(source, optimize=2)
+        for policy in memo.POLICIES:
+            memo.configure(args.memo_size, policy)
+            best, namespace = timed_run(memoized, args.repeat)
+            info = memo.cache_info(namespace[function])
+            print(f"{name:<16} -O2 {policy:<8} {best * 1000:10.2f} ms  {plain / best:9.1f}x  "
+                  f"hits {info['hits']}, misses {info['misses']}, "
+                  f"evictions {info['evictions']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Run time of an arithmetic-heavy program compiled at -O0, -O1 and -O2.
+
+Usage: python benchmarks/bench_optimizer.py [--calls 1000000]
+"""
+import argparse
+import ast as py_ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import ast_to_python_ast  # noqa: E402
+from lexer import lexer  # noqa: E402
+from optimizer import run_passes  # noqa: E402
+from parser import parse  # noqa: E402
+
+PROGRAM = '''
+සඳහන් පරිමාණය = 8;
+සඳහන් ආරම්භය = 100;
+ක්‍රියාව වර්ගය(v) { ආපසු v * v; }
+ක්‍රියාව වෙනස(a, b) { ආපසු a - b; }
+ක්‍රියාව බහුපද(x, y) {
+    ආපසු වර්ගය(x) + 3 * 4 * පරිමාණය * (2 * 5 + 60 / 3) + වෙනස(y, x) * (ආරම්භය - 1);
+}
+ක්‍රියාව ගණනය(x) {
+    නම් (10 * 10 > 50) {
+        ආපසු බහුපද(x, x) + (1 + 2 + 3 + 4) * (5 - 6 * 7);
+    } නැතහොත් {
+        ආපසු 0;
+    }
+}
+'''
+
+
+def build(level):
+    program = parse(lexer(PROGRAM), PROGRAM)
+    if level:
+        program = run_passes(program, level)
+    module = py_ast.Module(body=[ast_to_python_ast(node) for node in program], type_ignores=[])
+    namespace = {}
+    exec(compile(py_ast.fix_missing_locations(module), '<bench>', 'exec'), namespace)
+    return namespace['ගණනය']
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--calls', type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    baseline = None
+    results = set()
+    for level in (0, 1, 2):
+        function = build(level)
+        start = time.perf_counter()
+        for i in range(args.calls):
+            function(i)
+        elapsed = time.perf_counter() - start
+        results.add(function(12345))
+        baseline = baseline or elapsed
+        print(f"-O{level}: {elapsed:.3f}s for {args.calls:,} calls "
+              f"({args.calls / elapsed:,.0f} calls/s, {baseline / elapsed:.2f}x)")
+    assert len(results) == 1, "optimization levels disagree"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Lines per second of a මුද්‍රණය-heavy program with and without buffered output.
+
+The program prints --lines lines, alternating numbers and Sinhala text.
+It runs under kethaka three ways: with plain print(), with
+`kethaka --buffered-output`, and compiled with `kethakac
+--buffered-output`. Output goes to a pipe that the benchmark drains and,
+with --tty, to a pseudo-terminal, where plain print() flushes every line.
+
+Usage: python benchmarks/bench_output.py [--lines 1000000] [--runs 3] [--tty]
+"""
+import argparse
+import os
+import pty
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from compiler import compile_to_bytecode  # noqa: E402
+
+PROGRAM = '''සඳහන් පේළිය = "වාර්තාවේ පේළියක්";
+දක්වා (i = 0, {pairs}) {{
+    මුද්‍රණය(i);
+    මුද්‍රණය(පේළිය);
+}}
+'''
+
+
+def run_pipe(command):
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    size = 0
+    for chunk in iter(lambda: process.stdout.read(1 << 16), b''):
+        size += len(chunk)
+    if process.wait():
+        raise SystemExit(f"{' '.join(command)} exited with {process.returncode}")
+    return size
+
+
+def run_tty(command):
+    controller, terminal = pty.openpty()
+    process = subprocess.Popen(command, stdout=terminal)
+    os.close(terminal)
+    size = 0
+    while True:
+        try:
+            chunk = os.read(controller, 1 << 16)
+        except OSError:
+            # EIO once the child has closed the terminal
+            break
+        if not chunk:
+            break
+        size += len(chunk)
+    os.close(controller)
+    process.wait()
+    return size
+
+
+def measure(command, run, runs):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        run(command)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=1_000_000)
+    arg_parser.add_argument('--runs', type=int, default=3)
+    arg_parser.add_argument('--tty', action='store_true',
+                            help="also measure output to a pseudo-terminal")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file = os.path.join(directory, 'report.snl')
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(PROGRAM.format(pairs=args.lines // 2))
+        plain_file = os.path.join(directory, 'plain.kbc')
+        buffered_file = os.path.join(directory, 'buffered.kbc')
+        compile_to_bytecode(source_file, plain_file)
+        compile_to_bytecode(source_file, buffered_file, buffered_output=True)
+
+        kethaka = [sys.executable, os.path.join(ROOT, 'kethaka')]
+        modes = [('print()', kethaka + [plain_file]),
+                 ('kethaka --buffered-output', kethaka + ['--buffered-output', plain_file]),
+                 ('kethakac --buffered-output', kethaka + [buffered_file])]
+        targets = [('pipe', run_pipe)] + ([('tty', run_tty)] if args.tty else [])
+        for target, run in targets:
+            baseline = None
+            for name, command in modes:
+                elapsed = measure(command, run, args.runs)
+                baseline = baseline or elapsed
+                print(f"{target:<5} {name:<27} {args.lines / elapsed:12,.0f} lines/s  "
+                      f"{baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
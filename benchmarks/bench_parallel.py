@@ -0,0 +1,85 @@
+"""Scaling of a CPU-bound සමාන්තර loop from one worker to one per core.
+
+Every iteration runs an inner දක්වා loop of --work steps and returns its
+total. The program is compiled once and run with `kethaka --workers N` for
+N = 1, 2, 4, ... up to the core count (or --max-workers), so each timing
+includes starting the worker pool, as a real run would.
+
+Usage: python benchmarks/bench_parallel.py [--iterations 64] [--work 200000] [--max-workers N] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from compiler import compile_to_bytecode  # noqa: E402
+
+PROGRAM = '''ක්‍රියාව වැඩ(n) {{
+    සඳහන් t = 0;
+    දක්වා (j = 0, {work}) {{
+        සඳහන් t = t + j * n - j;
+    }}
+    ආපසු t;
+}}
+සඳහන් එකතුව = සමාන්තර (i = 0, {iterations}) {{
+    ආපසු වැඩ(i);
+}}
+මුද්‍රණය(එකතුව);
+'''
+
+
+def worker_counts(limit):
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def measure(program, workers, runs):
+    """Best wall time over runs, and what the program printed."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, os.path.join(ROOT, 'kethaka'),
+                                 '--workers', str(workers), program],
+                                stdout=subprocess.PIPE, text=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best, result.stdout.strip()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--iterations', type=int, default=64)
+    arg_parser.add_argument('--work', type=int, default=200000)
+    arg_parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument('--runs', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file = os.path.join(directory, 'scaling.snl')
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(PROGRAM.format(iterations=args.iterations, work=args.work))
+        program = os.path.join(directory, 'scaling.kbc')
+        compile_to_bytecode(source_file, program, optimize=1)
+
+        print(f"{args.iterations} iterations x {args.work} steps, "
+              f"{os.cpu_count()} CPUs")
+        baseline = expected = None
+        for workers in worker_counts(args.max_workers):
+            best, printed = measure(program, workers, args.runs)
+            if baseline is None:
+                baseline, expected = best, printed
+            elif printed != expected:
+                raise SystemExit(f"{workers} workers printed {printed}, expected {expected}")
+            print(f"{workers:>3} workers {best * 1000:10.1f} ms  {baseline / best:6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Parse time of parser.parse from 10k to 10M tokens.
+
+With the TokenStream cursor the time per token should stay flat as the
+input grows; the old tokens.pop(0) parser grew quadratically.
+
+Usage: python benchmarks/bench_parser.py [--sizes 10k,100k,1M,10M]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer import lexer  # noqa: E402
+from parser import parse  # noqa: E402
+
+SNIPPET = '''ක්‍රියාව එකතුව(අ, ආ) {
+    නම් (අ > ආ) {
+        ආපසු අ + ආ * 2;
+    } නැතහොත් {
+        ආපසු (ආ - අ) / 3;
+    }
+}
+සඳහන් නම = "කේතක";
+මුද්‍රණය(නම);
+එකතුව(නම, නම);
+'''
+
+
+def parse_count(text):
+    units = {'K': 10 ** 3, 'M': 10 ** 6}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='10k,100k,1M,10M')
+    args = arg_parser.parse_args()
+
+    unit = lexer(SNIPPET)
+    baseline = None
+    print(f"{'tokens':>12} {'seconds':>9} {'ns/token':>9} {'vs first':>9}")
+    for size_text in args.sizes.split(','):
+        tokens = unit * (parse_count(size_text) // len(unit) + 1)
+        gc.collect()
+        start = time.perf_counter()
+        parse(tokens, '')
+        elapsed = time.perf_counter() - start
+        per_token = elapsed / len(tokens) * 1e9
+        if baseline is None:
+            baseline = per_token
+        print(f"{len(tokens):>12,} {elapsed:>9.3f} {per_token:>9.0f} "
+              f"{per_token / baseline:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Per-run latency of runtime.run_source against spawning kethaka.
+
+Usage: python benchmarks/bench_runtime.py [--runs 1000] [--spawns 20]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import runtime  # noqa: E402
+from compiler import compile_to_bytecode  # noqa: E402
+
+SNIPPET = '''ක්‍රියාව එකතුව(අ, ආ) {
+    නම් (අ > ආ) {
+        ආපසු අ + ආ * 2;
+    } නැතහොත් {
+        ආපසු (ආ - අ) / 3;
+    }
+}
+සඳහන් අ = 4;
+සඳහන් ආ = 7;
+සඳහන් ප්‍රතිඵලය = 0;
+එකතුව(අ, ආ);
+'''
+
+
+def per_run(function, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--runs', type=int, default=1000)
+    arg_parser.add_argument('--spawns', type=int, default=20)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file = os.path.join(directory, 'snippet.snl')
+        bytecode_file = os.path.join(directory, 'snippet.kbc')
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(SNIPPET)
+        compile_to_bytecode(source_file, bytecode_file)
+        command = [sys.executable, os.path.join(ROOT, 'kethaka'), bytecode_file]
+        spawn = per_run(lambda: subprocess.run(command, check=True), args.spawns)
+
+    uncached = per_run(lambda: runtime.run_source(SNIPPET, cache=runtime.CodeCache(1)),
+                       args.runs)
+    runtime.run_source(SNIPPET)
+    cached = per_run(lambda: runtime.run_source(SNIPPET), args.runs)
+
+    for name, seconds in [('spawn kethaka', spawn), ('run_source, cold', uncached),
+                          ('run_source, cached', cached)]:
+        print(f"{name:<20} {seconds * 1e6:12.1f} us/run  {spawn / seconds:8.0f}x")
+    print(runtime.cache_stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Main programs run as module-level code against the same run on fast locals.
+
+Each workload is a top-level program: a දක්වා loop over variable-heavy
+updates, and long straight-line expressions over a dozen variables
+repeated inside a loop. "module" lowers the statements straight into the
+module, as the compiler did before scope analysis, so every variable is a
+dict lookup. "locals" is what compile_source produces now: the main
+program runs in a function where the variables are fast locals and
+print is bound once. Both are compiled at -O0 and must print the same.
+
+Usage: python benchmarks/bench_scope.py [--steps 1M] [--repeat 3]
+"""
+import argparse
+import ast as py_ast
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import PythonLowering, builtins_prologue, compile_source  # noqa: E402
+from lexer import lexer  # noqa: E402
+from parser import parse  # noqa: E402
+
+COUNTERS = '''සඳහන් එකතුව = 0;
+සඳහන් ඉරට්ටේ = 0;
+සඳහන් පියවර = 3;
+දක්වා (i = 0, {steps}) {{
+    සඳහන් එකතුව = එකතුව + i * පියවර;
+    සඳහන් ඉරට්ටේ = ඉරට්ටේ + එකතුව - i;
+    සඳහන් පියවර = පියවර + 1 - 1;
+}}
+මුද්‍රණය(එකතුව);
+මුද්‍රණය(ඉරට්ටේ);
+'''
+
+NAMES = ['අ', 'ආ', 'ඇ', 'ඈ', 'ඉ', 'ඊ', 'උ', 'ඌ', 'එ', 'ඒ', 'ඔ', 'ඕ']
+
+
+def expressions(steps):
+    lines = [f'සඳහන් {name} = {i + 1};' for i, name in enumerate(NAMES)]
+    lines.append('සඳහන් මුළු = 0;')
+    lines.append(f'දක්වා (i = 0, {steps // 10}) {{')
+    for i, name in enumerate(NAMES):
+        terms = ' + '.join(f'{NAMES[(i + j) % len(NAMES)]} * {j + 1}' for j in range(6))
+        lines.append(f'    සඳහන් මුළු = මුළු + {terms} - {name} * 21;')
+    lines.append('}')
+    lines.append('මුද්‍රණය(මුළු);')
+    return '\n'.join(lines) + '\n'
+
+
+def module_level(source):
+    """Code for source as the compiler lowered it before scope analysis."""
+    program = parse(lexer(source), source)
+    lowering = PythonLowering()
+    module = py_ast.Module(body=[builtins_prologue()] + [lowering.statement(node) for node in program],
+                           type_ignores=[])
+    return compile(py_ast.fix_missing_locations(module), '<kethaka>', 'exec')
+
+
+def timed_run(code, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            exec(code, {'__name__': 'kethaka_program'})
+        best = min(best, time.perf_counter() - start)
+    return best, output.getvalue()
+
+
+def parse_size(text):
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    text = text.strip().lower()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--steps', default='1M')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    steps = parse_size(args.steps)
+
+    workloads = [('counters', COUNTERS.format(steps=steps)), ('expressions', expressions(steps))]
+    print(f"{'workload':<12} {'module':>10} {'locals':>10}")
+    for name, source in workloads:
+        before, expected = timed_run(module_level(source), args.repeat)
+        after, output = timed_run(compile_source(source), args.repeat)
+        assert output == expected, (output, expected)
+        print(f"{name:<12} {before:9.3f}s {after:9.3f}s  {before / after:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Time to first output of `kethaka run` against `kethakac` then `kethaka`.
+
+The program is a benchmarks/corpus.py corpus. Each flow is timed from
+starting the first process to reading the program's first line of
+output, cold (no .kbc yet, so the source is compiled) and warm (the .kbc
+from the previous run is fresh). The two-step flow is what running a
+script took before `kethaka run`: one process to write the .kbc, another
+to read it back and run it.
+
+Usage: python benchmarks/bench_startup.py [--size small] [--seed 0] [--runs 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCHMARKS, '..')
+sys.path.insert(0, BENCHMARKS)
+
+import corpus  # noqa: E402
+
+KETHAKA = [sys.executable, os.path.join(ROOT, 'kethaka')]
+KETHAKAC = [sys.executable, os.path.join(ROOT, 'kethakac')]
+
+
+def first_output(command):
+    """Seconds from starting command to its first line of output."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.stdout.read()
+    if process.wait():
+        raise SystemExit(f"{' '.join(command)} exited with {process.returncode}")
+    return elapsed
+
+
+def two_step(source_file, bytecode_file):
+    start = time.perf_counter()
+    subprocess.run(KETHAKAC + ['--no-daemon', source_file], stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start + first_output(KETHAKA + [bytecode_file])
+
+
+def one_shot(source_file, bytecode_file):
+    return first_output(KETHAKA + ['run', source_file])
+
+
+def measure(flow, source_file, bytecode_file, cold, runs):
+    best = float('inf')
+    for _ in range(runs):
+        if cold and os.path.exists(bytecode_file):
+            os.remove(bytecode_file)
+        best = min(best, flow(source_file, bytecode_file))
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', choices=corpus.SIZES, default='small')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--runs', type=int, default=10)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file = os.path.join(directory, 'program.snl')
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(corpus.generate(args.size, args.seed))
+        bytecode_file = os.path.join(directory, 'program.kbc')
+
+        print(f"{args.size} corpus, {os.path.getsize(source_file):,} bytes")
+        for cache in ('cold', 'warm'):
+            two = measure(two_step, source_file, bytecode_file, cache == 'cold', args.runs)
+            one = measure(one_shot, source_file, bytecode_file, cache == 'cold', args.runs)
+            print(f"{cache}  kethakac + kethaka {two * 1000:8.1f} ms   "
+                  f"kethaka run {one * 1000:8.1f} ms   {two / one:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
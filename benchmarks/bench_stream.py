@@ -0,0 +1,86 @@
+"""Peak RSS of lexing and parsing a large file, streamed or read whole.
+
+The streamed run pulls tokens from lexer.stream_lexer through
+parser.iter_parse and drops each statement, so its peak RSS should stay
+flat as the file grows. Each mode runs in a fresh interpreter.
+
+Usage: python benchmarks/bench_stream.py [--size 200M]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer import compact_lexer, stream_lexer  # noqa: E402
+from parser import iter_parse  # noqa: E402
+
+SNIPPET = '''ක්‍රියාව එකතුව(අ, ආ) {
+    නම් (අ > ආ) {
+        ආපසු අ + ආ * 2;
+    } නැතහොත් {
+        ආපසු (ආ - අ) / 3;
+    }
+}
+සඳහන් නම = "කේතක
+බහු පේළි";
+මුද්‍රණය(නම);
+'''
+
+
+def parse_size(text):
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def child(mode, path):
+    start = time.perf_counter()
+    statements = 0
+    if mode == 'stream':
+        with open(path, encoding='utf-8', newline='') as f:
+            for _ in iter_parse(stream_lexer(f), None):
+                statements += 1
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            code = f.read()
+        for _ in iter_parse(compact_lexer(code), code):
+            statements += 1
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<7} {statements:>10,} statements {elapsed:8.2f}s  peak RSS {peak:8.1f} MB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', default='200M')
+    arg_parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    size = parse_size(args.size)
+    chunk = SNIPPET * ((1 << 20) // len(SNIPPET.encode('utf-8')) + 1)
+    with tempfile.NamedTemporaryFile('w', suffix='.snl', encoding='utf-8', delete=False) as f:
+        written = 0
+        while written < size:
+            f.write(chunk)
+            written += len(chunk.encode('utf-8'))
+    try:
+        print(f"{written / (1 << 20):.0f} MB source")
+        for mode in ('whole', 'stream'):
+            subprocess.run([sys.executable, __file__, '--child', mode, f.name], check=True)
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    main()
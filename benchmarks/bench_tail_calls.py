@@ -0,0 +1,84 @@
+"""Self tail calls run as recursion against the loops -O2 turns them into.
+
+The workload is an accumulating sum written as tail recursion, the way
+Kethaka programs without a loop would write it. At -O1 every step is a
+Python call, so it needs a recursion limit above the depth and is only
+run up to --max-depth. At -O2 eliminate_tail_calls makes the function
+a loop that runs in one frame at any depth. Both must return the same.
+
+Usage: python benchmarks/bench_tail_calls.py [--depths 1k,10k,100k,1M,10M] [--max-depth 1M] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import compile_source  # noqa: E402
+from lexer import lexer  # noqa: E402
+from optimizer import run_passes, tail_call_functions  # noqa: E402
+from parser import parse  # noqa: E402
+
+SOURCE = '''ක්‍රියාව පියවර(i, n, total) {
+    නම් (i == n) {
+        ආපසු total;
+    }
+    නම් (i > total) {
+        ආපසු පියවර(i + 1, n, total + i * 2);
+    } නැතහොත් {
+        ආපසු පියවර(i + 1, n, total + i);
+    }
+}
+'''
+
+
+def parse_size(text):
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    text = text.strip().lower()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def timed_call(function, n, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(0, n, 0)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--depths', default='1k,10k,100k,1M,10M')
+    arg_parser.add_argument('--max-depth', default='1M')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    depths = [parse_size(depth) for depth in args.depths.split(',')]
+    max_depth = parse_size(args.max_depth)
+
+    eliminated = tail_call_functions(run_passes(parse(lexer(SOURCE), SOURCE), 2))
+    assert eliminated == ['පියවර'], eliminated
+    functions = {}
+    for optimize in (1, 2):
+        namespace = {}
+        exec(compile_source(SOURCE, optimize=optimize), namespace)
+        functions[optimize] = namespace['පියවර']
+
+    print(f"{'depth':>12} {'loop -O2':>12} {'recursion -O1':>14}")
+    for depth in depths:
+        loop, expected = timed_call(functions[2], depth, args.repeat)
+        if depth <= max_depth:
+            sys.setrecursionlimit(max(sys.getrecursionlimit(), depth + 1000))
+            recursion, result = timed_call(functions[1], depth, args.repeat)
+            assert result == expected, (result, expected)
+            recursion = f"{recursion:13.4f}s  {recursion / loop:5.1f}x"
+        else:
+            recursion = f"{'(too deep)':>14}"
+        print(f"{depth:>12,} {loop:11.4f}s {recursion}")
+
+
+if __name__ == '__main__':
+    main()
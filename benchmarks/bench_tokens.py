@@ -0,0 +1,69 @@
+"""Peak RSS and tokenize+parse time of TokenBuffer against token tuples.
+
+Each representation runs in a fresh interpreter so peak RSS is its own.
+
+Usage: python benchmarks/bench_tokens.py [--size 50M]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer import compact_lexer, lexer  # noqa: E402
+from parser import parse  # noqa: E402
+
+SNIPPET = '''ක්‍රියාව එකතුව(අ, ආ) {
+    නම් (අ > ආ) {
+        ආපසු අ + ආ * 2;
+    } නැතහොත් {
+        ආපසු (ආ - අ) / 3;
+    }
+}
+සඳහන් නම = "කේතක";
+මුද්‍රණය(නම);
+එකතුව(නම, නම);
+'''
+
+
+def parse_size(text):
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def child(mode, size):
+    code = SNIPPET * (size // len(SNIPPET.encode('utf-8')) + 1)
+    tokenize = compact_lexer if mode == 'compact' else lexer
+    start = time.perf_counter()
+    tokens = tokenize(code)
+    lexed = time.perf_counter()
+    tokens_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    parse(tokens, code)
+    parsed = time.perf_counter()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:<8} {len(tokens):>12,} tokens  lex {lexed - start:7.2f}s  "
+          f"parse {parsed - lexed:7.2f}s  RSS after lex {tokens_rss / 1024:8.1f} MB  "
+          f"peak {peak_rss / 1024:8.1f} MB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', default='50M')
+    arg_parser.add_argument('--child', choices=['tuples', 'compact'], help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        child(args.child, parse_size(args.size))
+        return
+    for mode in ('tuples', 'compact'):
+        subprocess.run([sys.executable, __file__, '--child', mode, '--size', args.size], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Seeded generator of synthetic Kethaka programs for the benchmark suite.
+
+generate() builds a program of ක්‍රියාව functions whose bodies are
+if/නැතහොත් trees nested --depth deep, with long arithmetic expressions
+at the leaves and Sinhala identifiers that contain zero-width joiners,
+followed by top-level declarations, prints and a දක්වා loop that calls
+the functions. The same size and seed always give the same text, and
+every program compiles and runs to completion: functions only call the
+few functions defined just before them, and only divide by non-zero
+constants.
+
+Usage: python benchmarks/corpus.py [--size medium] [--seed 0] [--functions N] [--depth N] > program.snl
+"""
+import argparse
+import random
+
+# Shape of each named size: functions, nesting depth of their if trees,
+# terms per expression, top-level statements and loop iterations
+SIZES = {
+    'small': {'functions': 20, 'depth': 3, 'terms': 6, 'statements': 40, 'iterations': 200},
+    'medium': {'functions': 300, 'depth': 4, 'terms': 10, 'statements': 400, 'iterations': 2000},
+    'large': {'functions': 3000, 'depth': 5, 'terms': 14, 'statements': 4000, 'iterations': 20000},
+}
+
+# Syllables identifiers are built from; the conjuncts carry a ZWJ
+SYLLABLES = ['ක', 'ග', 'ත', 'ද', 'න', 'ප', 'බ', 'ම', 'ය', 'ර', 'ල', 'ව', 'ස', 'හ',
+             'කා', 'ගි', 'තු', 'දෙ', 'නො', 'පා', 'මි', 'රු', 'ලෝ', 'වැ', 'සි', 'හා',
+             'ක්‍ර', 'ද්‍ය', 'ත්‍ර', 'ප්‍ර', 'ශ්‍රී', 'ක්‍ෂ', 'න්‍ය', 'ම්‍ය']
+
+# An identifier must not start with a keyword, or the lexer splits it
+KEYWORDS = ('සඳහන්', 'මුද්‍රණය', 'නම්', 'නැතහොත්', 'දක්වා', 'සමාන්තර', 'ක්‍රියාව',
+            'ආපසු', 'ආනයනය', 'අරාව')
+
+COMPARISONS = ['<', '>', '<=', '>=', '==', '!=']
+OPERATORS = ['+', '-', '*', '+', '-']
+
+# How many of the functions defined just before a function it may call
+CALL_WINDOW = 8
+# Chance that a leaf of an if tree calls another function
+CALL_CHANCE = 0.3
+
+
+class Generator:
+    def __init__(self, seed, functions, depth, terms, statements, iterations):
+        self.random = random.Random(seed)
+        self.function_count = functions
+        self.depth = depth
+        self.terms = terms
+        self.statement_count = statements
+        self.iterations = iterations
+        self.used_names = set()
+        self.functions = []  # (name, parameter count), in definition order
+        self.lines = []
+
+    def name(self):
+        while True:
+            name = ''.join(self.random.choice(SYLLABLES)
+                           for _ in range(self.random.randint(2, 4)))
+            if self.random.random() < 0.3:
+                name += f'_{self.random.randint(0, 99)}'
+            if name not in self.used_names and not name.startswith(KEYWORDS):
+                self.used_names.add(name)
+                return name
+
+    def operand(self, names, callees, allow_call):
+        roll = self.random.random()
+        if allow_call and callees and roll < 0.15:
+            callee, arity = self.random.choice(callees)
+            args = ', '.join(self.expression(names, callees, 2, False) for _ in range(arity))
+            return f'{callee}({args})'
+        if roll < 0.6:
+            return self.random.choice(names)
+        return str(self.random.randint(1, 999))
+
+    def expression(self, names, callees=(), terms=None, allow_call=False):
+        terms = terms or self.terms
+        parts = [self.operand(names, callees, allow_call)]
+        for _ in range(terms - 1):
+            roll = self.random.random()
+            if roll < 0.1:
+                parts.append(f'/ {self.random.randint(2, 9)}')
+            elif roll < 0.25:
+                inner = self.expression(names, callees, 3, False)
+                parts.append(f'{self.random.choice(OPERATORS)} ({inner})')
+            else:
+                parts.append(f'{self.random.choice(OPERATORS)} '
+                             f'{self.operand(names, callees, False)}')
+        return ' '.join(parts)
+
+    def condition(self, names):
+        return (f'{self.expression(names, terms=3)} {self.random.choice(COMPARISONS)} '
+                f'{self.expression(names, terms=2)}')
+
+    def if_tree(self, names, callees, depth, indent):
+        pad = '    ' * indent
+        if depth == 0:
+            allow_call = self.random.random() < CALL_CHANCE
+            self.lines.append(f'{pad}ආපසු {self.expression(names, callees, allow_call=allow_call)};')
+            return
+        self.lines.append(f'{pad}නම් ({self.condition(names)}) {{')
+        self.if_tree(names, callees, depth - 1, indent + 1)
+        self.lines.append(f'{pad}}} නැතහොත් {{')
+        self.if_tree(names, callees, self.random.randint(0, depth - 1), indent + 1)
+        self.lines.append(f'{pad}}}')
+
+    def function(self):
+        name = self.name()
+        params = [self.name() for _ in range(self.random.randint(1, 3))]
+        callees = self.functions[-CALL_WINDOW:]
+        self.lines.append(f'# {name}: {len(params)} පරාමිතීන්')
+        self.lines.append(f'ක්‍රියාව {name}({", ".join(params)}) {{')
+        local = self.name()
+        self.lines.append(f'    සඳහන් {local} = {self.expression(params)};')
+        self.if_tree(params + [local], callees, self.depth, 1)
+        self.lines.append('}')
+        self.functions.append((name, len(params)))
+
+    def call(self, names):
+        callee, arity = self.random.choice(self.functions)
+        args = ', '.join(self.expression(names, terms=3) for _ in range(arity))
+        return f'{callee}({args})'
+
+    def main(self):
+        names = []
+        for _ in range(max(1, self.statement_count)):
+            roll = self.random.random()
+            if not names or roll < 0.35:
+                name = self.name()
+                value = self.expression(names or ['1'], terms=self.random.randint(1, self.terms))
+                self.lines.append(f'සඳහන් {name} = {value};')
+                names.append(name)
+            elif roll < 0.55:
+                name = self.name()
+                self.lines.append(f'සඳහන් {name} = {self.call(names)};')
+                names.append(name)
+            elif roll < 0.7:
+                self.lines.append(f'සඳහන් {self.name()} = "{self.name()} {self.name()}";')
+            elif roll < 0.8:
+                self.lines.append(f'මුද්‍රණය({self.random.choice(names)});')
+            else:
+                self.lines.append(f'{self.call(names)};')
+        total, counter = self.name(), self.name()
+        self.lines.append(f'සඳහන් {total} = 0;')
+        self.lines.append(f'දක්වා ({counter} = 0, {self.iterations}) {{')
+        self.lines.append(f'    සඳහන් {total} = {total} + {self.call([counter, counter])};')
+        self.lines.append('}')
+        self.lines.append(f'මුද්‍රණය({total});')
+
+    def program(self):
+        for _ in range(self.function_count):
+            self.function()
+        self.main()
+        return '\n'.join(self.lines) + '\n'
+
+
+def generate(size='medium', seed=0, **shape):
+    """Source text of a program of the named size, with any of its SIZES
+    entries overridden by keyword."""
+    return Generator(seed, **{**SIZES[size], **shape}).program()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', choices=SIZES, default='medium')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    for field in SIZES['small']:
+        arg_parser.add_argument(f'--{field}', type=int)
+    args = arg_parser.parse_args()
+    shape = {field: getattr(args, field) for field in SIZES['small']
+             if getattr(args, field) is not None}
+    print(generate(args.size, args.seed, **shape), end='')
+
+
+if __name__ == '__main__':
+    main()
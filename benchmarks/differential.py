@@ -0,0 +1,95 @@
+"""Check that every -O level runs programs exactly like -O0.
+
+Each program in CASES is run with `kethaka run -O0`, `-O1` and `-O2` in
+a fresh process, and everything it prints, runtime errors included,
+must be the output the case expects at every level. The cases are
+programs the compiler once got wrong. Add one when a bug is fixed.
+
+Usage: python benchmarks/differential.py [--case NAME]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+KETHAKA = [sys.executable, os.path.join(ROOT, 'kethaka'), 'run']
+LEVELS = (0, 1, 2)
+
+# name: (source, expected output)
+CASES = {
+    # hoist_loop_invariants must not raise before the first iteration prints
+    'hoisted division by zero': ('''සඳහන් a = 1;
+සඳහන් b = 0;
+සඳහන් n = 3;
+දක්වා (i = 0, n) {
+    මුද්‍රණය(i);
+    සඳහන් y = a / b;
+}
+''', '0\nRuntime error: division by zero\n'),
+    # ... nor ahead of an earlier statement that raises an error of its own
+    'hoisted past an earlier error': ('''සඳහන් a = 1;
+සඳහන් b = 0;
+සඳහන් s = "x";
+සඳහන් n = 3;
+දක්වා (i = 0, n) {
+    සඳහන් x = i / b;
+    සඳහන් y = s + a;
+}
+''', 'Runtime error: division by zero\n'),
+    # inline_functions must not inline into a සමාන්තර body that binds a
+    # name the callee reads as a global
+    'inlined global shadowed by parallel loop': ('''සඳහන් i = 100;
+ක්‍රියාව f(x) {
+    ආපසු x + i;
+}
+සඳහන් r = සමාන්තර (i = 0, 3) {
+    ආපසු f(1);
+};
+මුද්‍රණය(r);
+''', '303\n'),
+    # A name a function prints is a global of the main program
+    'global printed by a function': ('''සඳහන් x = 7;
+ක්‍රියාව f() {
+    මුද්‍රණය(x);
+    ආපසු 0;
+}
+සඳහන් y = f();
+''', '7\n'),
+}
+
+
+def run(source_file, level):
+    result = subprocess.run(KETHAKA + [f'-O{level}', source_file], capture_output=True,
+                            text=True, encoding='utf-8')
+    return result.stdout + result.stderr
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--case', choices=list(CASES), help="run only this case")
+    args = arg_parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (name, (source, expected)) in enumerate(CASES.items()):
+            if args.case and name != args.case:
+                continue
+            source_file = os.path.join(directory, f'case{index}.snl')
+            with open(source_file, 'w', encoding='utf-8') as f:
+                f.write(source)
+            outputs = {level: run(source_file, level) for level in LEVELS}
+            if set(outputs.values()) == {expected}:
+                print(f"ok      {name}")
+                continue
+            failed += 1
+            print(f"FAILED  {name}")
+            print(f"  expected: {expected!r}")
+            for level, output in outputs.items():
+                print(f"  -O{level}: {output!r}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
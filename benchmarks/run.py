@@ -0,0 +1,155 @@
+"""End-to-end benchmark suite over generated corpora, with a regression gate.
+
+For each corpus size, benchmarks/corpus.py generates a program from
+--seed, and each compiler phase is timed on it separately: lexing,
+parsing, lowering to a Python AST, compile() and marshal. Then the
+program is written out as a .kbc and `kethaka` is timed loading and
+running it in a fresh process. Every figure is the best of --repeat
+runs.
+
+--output writes the results as JSON. --baseline reads an earlier
+--output file and compares against it. A phase that got slower than its
+baseline by more than --threshold (a fraction) fails the run with exit
+status 1. Differences under --noise-floor seconds are never counted,
+so millisecond phases can't fail on timer noise alone.
+
+Usage: python benchmarks/run.py [--sizes small,medium] [--seed 0] [--repeat 5] [--output results.json] [--baseline baseline.json] [--threshold 0.15]
+"""
+import argparse
+import ast as py_ast
+import json
+import marshal
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+from compiler import ast_to_python_ast, compile_to_bytecode, module_body  # noqa: E402
+from lexer import lexer  # noqa: E402
+from parser import parse  # noqa: E402
+from scope import module_scope  # noqa: E402
+
+PHASES = ('lex', 'parse', 'lower', 'compile', 'marshal', 'run')
+
+
+def best_time(function, repeat):
+    """Best time of repeat calls, and what the last call returned."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def lower(program):
+    body = module_body([ast_to_python_ast(node) for node in program], module_scope(program))
+    module = py_ast.Module(body=body, type_ignores=[])
+    return py_ast.fix_missing_locations(module)
+
+
+def run_program(program_file):
+    subprocess.run([sys.executable, os.path.join(ROOT, 'kethaka'), program_file],
+                   stdout=subprocess.DEVNULL, check=True)
+
+
+def measure(size, seed, repeat, directory):
+    source = corpus.generate(size, seed)
+    timings = {}
+    timings['lex'], tokens = best_time(lambda: lexer(source), repeat)
+    timings['parse'], program = best_time(lambda: parse(tokens, source), repeat)
+    timings['lower'], module = best_time(lambda: lower(program), repeat)
+    timings['compile'], code = best_time(lambda: compile(module, size, 'exec'), repeat)
+    timings['marshal'], _ = best_time(lambda: marshal.dumps(code), repeat)
+
+    source_file = os.path.join(directory, f'{size}.snl')
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write(source)
+    program_file = source_file[:-len('.snl')] + '.kbc'
+    compile_to_bytecode(source_file, program_file, force=True)
+    timings['run'], _ = best_time(lambda: run_program(program_file), repeat)
+    return {'bytes': len(source.encode('utf-8')), 'lines': source.count('\n'),
+            'tokens': len(tokens), 'seconds': timings}
+
+
+def regressions(results, baseline, threshold, noise_floor):
+    """(size, phase, baseline seconds, seconds) of every phase that got too slow."""
+    slower = []
+    for size, result in results['corpora'].items():
+        previous = baseline['corpora'].get(size)
+        if previous is None or previous['bytes'] != result['bytes']:
+            # Another seed or generator version; the timings don't compare
+            continue
+        for phase, seconds in result['seconds'].items():
+            before = previous['seconds'].get(phase)
+            if before is None:
+                continue
+            if seconds > before * (1 + threshold) and seconds - before > noise_floor:
+                slower.append((size, phase, before, seconds))
+    return slower
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='small,medium',
+                            help=f"comma-separated corpus sizes out of {', '.join(corpus.SIZES)}")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--output', metavar='FILE', help="write the results as JSON")
+    arg_parser.add_argument('--baseline', metavar='FILE',
+                            help="fail if any phase is slower than in this earlier --output")
+    arg_parser.add_argument('--threshold', type=float, default=0.15,
+                            help="slowdown over the baseline that fails, as a fraction")
+    arg_parser.add_argument('--noise-floor', type=float, default=0.002, metavar='SECONDS',
+                            help="ignore slowdowns smaller than this many seconds")
+    args = arg_parser.parse_args()
+
+    sizes = args.sizes.split(',')
+    for size in sizes:
+        if size not in corpus.SIZES:
+            arg_parser.error(f"Unknown corpus size {size!r}, "
+                             f"expected one of {', '.join(corpus.SIZES)}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {'python': platform.python_version(), 'platform': platform.platform(),
+               'seed': args.seed, 'repeat': args.repeat, 'corpora': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            result = measure(size, args.seed, args.repeat, directory)
+            results['corpora'][size] = result
+            print(f"{size}: {result['bytes']:,} bytes, {result['lines']:,} lines, "
+                  f"{result['tokens']:,} tokens")
+            previous = (baseline or {}).get('corpora', {}).get(size, {}).get('seconds', {})
+            for phase in PHASES:
+                seconds = result['seconds'][phase]
+                line = f"  {phase:<8} {seconds * 1000:10.2f} ms"
+                if phase in previous:
+                    line += f"  baseline {previous[phase] * 1000:10.2f} ms " \
+                            f"{seconds / previous[phase] - 1:+7.1%}"
+                print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    if baseline is not None:
+        slower = regressions(results, baseline, args.threshold, args.noise_floor)
+        for size, phase, before, seconds in slower:
+            print(f"Regression: {size} {phase} {before * 1000:.2f} ms -> "
+                  f"{seconds * 1000:.2f} ms", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
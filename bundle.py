@@ -0,0 +1,105 @@
+"""Kethaka bundles (.kba): the compiled modules of a program in one file.
+
+Layout:
+
+    magic          4s  b'KBA\\0'
+    version        H   bundle format version
+    flags          H   the modules' compile options, as in a .kbc header
+    python magic   4s  importlib.util.MAGIC_NUMBER of the compiling Python
+    module count   I
+    index offset   Q   where the index starts
+
+followed by one marshaled code object per module, then the index: for
+each module, its name length (H), code offset (Q) and code size (Q), then
+the UTF-8 name. The first module in the index is the program's main
+module.
+
+Bundles are memory-mapped and only the index is read up front; a
+module's code object is unmarshaled when the module is first imported.
+"""
+import importlib.util
+import marshal
+import mmap
+import struct
+
+from kbc import BytecodeError
+
+MAGIC = b'KBA\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHH4sIQ')
+INDEX_ENTRY = struct.Struct('<HQQ')
+
+
+def write_bundle(bundle_file, modules, flags=0):
+    """Write (name, code) pairs to bundle_file, the main module first."""
+    with open(bundle_file, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        index = []
+        for name, code in modules:
+            data = marshal.dumps(code)
+            index.append((name, f.tell(), len(data)))
+            f.write(data)
+        index_offset = f.tell()
+        for name, offset, size in index:
+            encoded = name.encode('utf-8')
+            f.write(INDEX_ENTRY.pack(len(encoded), offset, size))
+            f.write(encoded)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, importlib.util.MAGIC_NUMBER,
+                            len(index), index_offset))
+
+
+class Bundle:
+    """A read-only, memory-mapped .kba file."""
+
+    def __init__(self, bundle_file):
+        self.path = bundle_file
+        with open(bundle_file, 'rb') as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # mmap refuses empty files
+                raise BytecodeError("Not a Kethaka bundle (missing header)") from None
+        try:
+            self.index, self.flags = self._read_index()
+        except BytecodeError:
+            self.close()
+            raise
+        self.main = next(iter(self.index), None)
+
+    def _read_index(self):
+        data = self.data
+        if len(data) < HEADER.size:
+            raise BytecodeError("Not a Kethaka bundle (missing header)")
+        magic, version, flags, python_magic, count, offset = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise BytecodeError("Not a Kethaka bundle (missing header)")
+        if version != FORMAT_VERSION:
+            raise BytecodeError(f"Unsupported bundle format version {version}")
+        if python_magic != importlib.util.MAGIC_NUMBER:
+            raise BytecodeError("Bundle was compiled by a different Python version")
+        index = {}
+        try:
+            for _ in range(count):
+                length, code_offset, size = INDEX_ENTRY.unpack_from(data, offset)
+                offset += INDEX_ENTRY.size
+                name = bytes(data[offset:offset + length]).decode('utf-8')
+                offset += length
+                index[name] = (code_offset, size)
+        except (struct.error, UnicodeDecodeError):
+            raise BytecodeError("Truncated or corrupt bundle index") from None
+        return index, flags
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def code(self, name):
+        """Unmarshal the code object of module name."""
+        offset, size = self.index[name]
+        return marshal.loads(self.data[offset:offset + size])
+
+    def close(self):
+        self.data.close()
@@ -0,0 +1,62 @@
+"""The client half of the compile server protocol (see server.py).
+
+Single-file kethakac runs import only this module, os, socket and json
+before their request is answered, so a compile through a running
+server costs little more than starting the interpreter. The server
+module pulls in socketserver, threading and the compiler, none of which
+a client needs.
+"""
+import json
+import os
+import socket
+
+
+def default_socket_path():
+    return os.environ.get('KETHAKA_SOCKET') or os.path.join(
+        _temp_directory(), f'kethakac-{os.getuid()}.sock')
+
+
+def _temp_directory():
+    # tempfile.gettempdir() without importing tempfile, which brings in
+    # shutil, random and hashlib
+    for name in ('TMPDIR', 'TEMP', 'TMP'):
+        directory = os.environ.get(name)
+        if directory:
+            return directory
+    if os.name == 'posix':
+        return '/tmp'
+    import tempfile
+    return tempfile.gettempdir()
+
+
+def send_request(message, socket_path=None):
+    """Send one request to the server and return its reply.
+
+    Returns None when no server is listening on socket_path.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path or default_socket_path())
+    except (FileNotFoundError, ConnectionRefusedError):
+        connection.close()
+        return None
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        stream.flush()
+        reply = stream.readline()
+    if not reply:
+        raise ConnectionError("Compile server closed the connection")
+    return json.loads(reply)
+
+
+def compile_remote(source_file, output_file, force=False, optimize=0, socket_path=None,
+                   buffered_output=False):
+    """Compile through a running server; None when there is none."""
+    return send_request({
+        'command': 'compile',
+        'source': os.path.abspath(source_file),
+        'output': os.path.abspath(output_file),
+        'force': force,
+        'optimize': optimize,
+        'buffered_output': buffered_output,
+    }, socket_path)
@@ -1,13 +1,22 @@
 import ast as py_ast
-from parser import parse
-from lexer import lexer
+import io
 import marshal
+from parser import iter_parse, parse
+from lexer import compact_lexer, lexer, stream_lexer
+import os
 import types
-from typing import List, Any
+from kbc import check_cache, compile_flags, source_hash, stream_hash, touch_header, write_bytecode
+from nodes import (ArrayIndex, ArrayLiteral, ArrayRange, BinaryOperation, ForLoop, FunctionCall, FunctionDefinition, IfStatement,
+                   ImportStatement, MemoizedFunction, Node, NodeVisitor, Number, Operator,
+                   ParallelLoop, PrintStatement, ReturnStatement, StringLiteral, TailCall, TailLoop,
+                   Variable, VarDeclaration)
+from instrument import NullProfile, count_nodes
+from optimizer import binding_counts, run_passes, tail_call_functions, walk_expression
+from scope import ModuleScope, module_scope
 
 class CodeGenerator(py_ast.NodeVisitor):
     def __init__(self):
-        self.code_lines: List[str] = []
+        self.code_lines: list[str] = []
         
     def visit_Module(self, node: py_ast.Module) -> None:
         for stmt in node.body:
@@ -57,113 +66,599 @@ class CodeGenerator(py_ast.NodeVisitor):
         for stmt in node.body:
             self.visit(stmt)
 
-def ast_to_python_ast(node):
-    if isinstance(node, dict):
-        if node['type'] == 'var_declaration':
-            return py_ast.Assign(
-                targets=[py_ast.Name(id=node['name'], ctx=py_ast.Store())],
-                value=py_ast.Constant(value=node['value'])
-            )
-        elif node['type'] == 'function_definition':
-            return py_ast.FunctionDef(
-                name=node['name'],
-                args=py_ast.arguments(
-                    posonlyargs=[],
-                    args=[py_ast.arg(arg=arg) for arg in node['params']],
-                    kwonlyargs=[],
-                    kw_defaults=[],
-                    defaults=[]
-                ),
-                body=[ast_to_python_ast(stmt) for stmt in node['body']],
-                decorator_list=[]
-            )
-        elif node['type'] == 'print_statement':
-            return py_ast.Expr(
-                value=py_ast.Call(
-                    func=py_ast.Name(id='print', ctx=py_ast.Load()),
-                    args=[py_ast.Name(id=node['value'], ctx=py_ast.Load()) if isinstance(node['value'], str) else py_ast.Constant(value=node['value'])],
-                    keywords=[]
-                )
-            )
-        elif node['type'] == 'function_call':
+# Sources at least this many bytes are streamed through stream_to_python_ast,
+# unless -O2 needs the whole program
+STREAM_THRESHOLD = 64 << 20
+
+# Sources at least this many bytes are tokenized into a lexer.TokenBuffer,
+# which needs a fraction of the memory of a token tuple list
+COMPACT_TOKENS_THRESHOLD = 1 << 20
+
+# Context and operator nodes carry no state, so one instance of each is shared
+LOAD = py_ast.Load()
+STORE = py_ast.Store()
+
+# The module global that buffered-output code writes lines through
+OUTPUT_WRITE = '_kethaka_write'
+
+# The function the main program runs in, so that its variables are fast
+# locals rather than module globals
+MAIN_FUNCTION = '_kethaka_main'
+
+# Builtins the compiled code calls by itself, which it reaches under these
+# names, bound in the module by builtins_prologue(): a program can bind
+# print or range like any other name
+RESERVED_BUILTINS = {
+    'print': '_kethaka_print',
+    'range': '_kethaka_range',
+    'globals': '_kethaka_globals',
+    'locals': '_kethaka_locals',
+}
+
+# The line of the code module_body() wraps the main program in, which
+# belongs to no line of the source
+WRAPPER_LINE = 0
+
+# Name of the function a සමාන්තර loop's body is compiled into
+PARALLEL_ITERATION = '<සමාන්තර>'
+
+PYTHON_OPERATORS = {
+    Operator.ADD: py_ast.Add(),
+    Operator.SUB: py_ast.Sub(),
+    Operator.MUL: py_ast.Mult(),
+    Operator.DIV: py_ast.Div(),
+    Operator.LT: py_ast.Lt(),
+    Operator.GT: py_ast.Gt(),
+    Operator.LE: py_ast.LtE(),
+    Operator.GE: py_ast.GtE(),
+    Operator.EQ: py_ast.Eq(),
+    Operator.NE: py_ast.NotEq(),
+}
+
+def load_name(name: str) -> py_ast.expr:
+    """A Name, or an Attribute chain for a dotted module.name."""
+    first, *attributes = name.split('.')
+    node = py_ast.Name(id=first, ctx=LOAD)
+    for attribute in attributes:
+        node = py_ast.Attribute(value=node, attr=attribute, ctx=LOAD)
+    return node
+
+def karray_attribute(name: str) -> py_ast.Attribute:
+    """__import__('karray').name, which needs no name in the program's namespace."""
+    return py_ast.Attribute(
+        value=py_ast.Call(func=py_ast.Name(id='__import__', ctx=LOAD),
+                          args=[py_ast.Constant(value='karray')], keywords=[]),
+        attr=name, ctx=LOAD)
+
+def reserved_builtin(name: str) -> py_ast.Name:
+    """Load a builtin the lowered code calls, under its RESERVED_BUILTINS name."""
+    return py_ast.Name(id=RESERVED_BUILTINS[name], ctx=LOAD)
+
+class PythonLowering(NodeVisitor):
+    """Lower Kethaka nodes to Python AST nodes.
+
+    visit() lowers a node as an expression where that makes sense;
+    statement() lowers it in statement position. Python nodes get the
+    .snl line of the node they came from, so tracebacks and profilers
+    point at the Kethaka source; fix_missing_locations fills in the rest
+    from the enclosing node. line_offset is added to every line, for code
+    parsed on its own from the middle of a file.
+
+    With buffered_output, මුද්‍රණය writes its line through the stream
+    output_prologue() binds instead of calling print().
+    """
+    line_offset = 0
+
+    def __init__(self, buffered_output: bool = False):
+        self.buffered_output = buffered_output
+
+    def visit(self, node: Node) -> py_ast.AST:
+        python_node = self._table[node.__class__](self, node)
+        if node.line is not None:
+            python_node.lineno = python_node.end_lineno = node.line + self.line_offset
+            python_node.col_offset = python_node.end_col_offset = 0
+        return python_node
+
+    def statement(self, node: Node) -> py_ast.stmt:
+        python_node = self.visit(node)
+        if isinstance(node, FunctionCall):
+            # A call whose result is discarded
+            return py_ast.copy_location(py_ast.Expr(value=python_node), python_node)
+        return python_node
+
+    def block(self, statements: list[Node]) -> list[py_ast.stmt]:
+        return self.statements(statements) or [py_ast.Pass()]
+
+    def statements(self, statements: list[Node]) -> list[py_ast.stmt]:
+        lowered = []
+        for stmt in statements:
+            lowered.append(self.statement(stmt))
+            if isinstance(stmt, TailCall):
+                # The parameters are rebound; run the function's body again
+                lowered.append(py_ast.copy_location(py_ast.Continue(), lowered[-1]))
+        return lowered
+
+    def visit_VarDeclaration(self, node: VarDeclaration) -> py_ast.Assign:
+        return py_ast.Assign(
+            targets=[py_ast.Name(id=node.name, ctx=STORE)],
+            value=self.visit(node.value)
+        )
+
+    def visit_FunctionDefinition(self, node: FunctionDefinition) -> py_ast.FunctionDef:
+        return py_ast.FunctionDef(
+            name=node.name,
+            args=py_ast.arguments(
+                posonlyargs=[],
+                args=[py_ast.arg(arg=arg) for arg in node.params],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[]
+            ),
+            body=self.block(node.body),
+            decorator_list=[]
+        )
+
+    def visit_MemoizedFunction(self, node: MemoizedFunction) -> py_ast.FunctionDef:
+        function = self.visit_FunctionDefinition(node)
+        # @__import__('memo').memoize, which needs no name in the program's namespace
+        function.decorator_list.append(py_ast.Attribute(
+            value=py_ast.Call(func=py_ast.Name(id='__import__', ctx=LOAD),
+                              args=[py_ast.Constant(value='memo')], keywords=[]),
+            attr='memoize', ctx=LOAD))
+        return function
+
+    def visit_PrintStatement(self, node: PrintStatement) -> py_ast.Expr:
+        value = py_ast.Name(id=node.value, ctx=LOAD) if isinstance(node.value, str) else py_ast.Constant(value=node.value)
+        if self.buffered_output:
+            # _kethaka_write(f"{value}\n")
             return py_ast.Expr(
                 value=py_ast.Call(
-                    func=py_ast.Name(id=node['name'], ctx=py_ast.Load()),
-                    args=[py_ast.Name(id=arg, ctx=py_ast.Load()) for arg in node['args']],
+                    func=py_ast.Name(id=OUTPUT_WRITE, ctx=LOAD),
+                    args=[py_ast.JoinedStr(values=[
+                        py_ast.FormattedValue(value=value, conversion=-1, format_spec=None),
+                        py_ast.Constant(value='\n')])],
                     keywords=[]
                 )
             )
-        elif node['type'] == 'if_statement':
-            return py_ast.If(
-                test=ast_to_python_ast(node['condition']),
-                body=[ast_to_python_ast(stmt) for stmt in node['body']],
-                orelse=[ast_to_python_ast(stmt) for stmt in (node['else_body'] or [])]
+        return py_ast.Expr(
+            value=py_ast.Call(
+                func=reserved_builtin('print'),
+                args=[value],
+                keywords=[]
             )
-        elif node['type'] == 'binary_operation':
-            if node['operator'] in ['<', '>', '<=', '>=', '==', '!=']:
-                return py_ast.Compare(
-                    left=ast_to_python_ast(node['left']),
-                    ops=[py_ast.Gt() if node['operator'] == '>' else
-                         py_ast.Lt() if node['operator'] == '<' else
-                         py_ast.GtE() if node['operator'] == '>=' else
-                         py_ast.LtE() if node['operator'] == '<=' else
-                         py_ast.Eq() if node['operator'] == '==' else
-                         py_ast.NotEq()],
-                    comparators=[ast_to_python_ast(node['right'])]
-                )
-            else:
-                return py_ast.BinOp(
-                    left=ast_to_python_ast(node['left']),
-                    op=py_ast.Add() if node['operator'] == '+' else
-                       py_ast.Sub() if node['operator'] == '-' else
-                       py_ast.Mult() if node['operator'] == '*' else
-                       py_ast.Div(),
-                    right=ast_to_python_ast(node['right'])
-                )
-        elif node['type'] == 'number':
-            return py_ast.Constant(value=node['value'])
-        elif node['type'] == 'string_literal':
-            return py_ast.Constant(value=node['value'])
-        elif node['type'] == 'variable':
-            return py_ast.Name(id=node['name'], ctx=py_ast.Load())
-        elif node['type'] == 'return_statement':
-            return py_ast.Return(value=ast_to_python_ast(node['value']))
+        )
+
+    def visit_FunctionCall(self, node: FunctionCall) -> py_ast.Call:
+        return py_ast.Call(
+            func=load_name(node.name),
+            args=[self.visit(arg) for arg in node.args],
+            keywords=[]
+        )
+
+    def visit_IfStatement(self, node: IfStatement) -> py_ast.If:
+        return py_ast.If(
+            test=self.visit(node.condition),
+            body=self.block(node.body),
+            orelse=self.statements(node.else_body or [])
+        )
+
+    def visit_ForLoop(self, node: ForLoop) -> py_ast.For:
+        start = self.visit(node.start)
+        end = self.visit(node.end)
+        body = self.block(node.body)
+        if lowers_to_range(node):
+            iterator = py_ast.Call(func=reserved_builtin('range'),
+                                   args=[start, end], keywords=[])
         else:
-            raise ValueError(f"Unknown node type: {node['type']}")
-    else:
-        raise ValueError(f"Unknown node type: {type(node)}")
+            # Count up from start, testing against end before every
+            # iteration: for name in itertools.count(start): if not name < end: break
+            iterator = py_ast.Call(
+                func=py_ast.Attribute(
+                    value=py_ast.Call(func=py_ast.Name(id='__import__', ctx=LOAD),
+                                      args=[py_ast.Constant(value='itertools')], keywords=[]),
+                    attr='count', ctx=LOAD),
+                args=[start], keywords=[])
+            body.insert(0, py_ast.If(
+                test=py_ast.UnaryOp(op=py_ast.Not(), operand=py_ast.Compare(
+                    left=py_ast.Name(id=node.name, ctx=LOAD), ops=[py_ast.Lt()],
+                    comparators=[end])),
+                body=[py_ast.Break()], orelse=[]))
+        return py_ast.For(
+            target=py_ast.Name(id=node.name, ctx=STORE),
+            iter=iterator,
+            body=body,
+            orelse=[]
+        )
+
+    def visit_TailLoop(self, node: TailLoop) -> py_ast.While:
+        # while True: body, then return None as the function would on
+        # falling off its end
+        body = self.statements(node.body)
+        if not body or not isinstance(body[-1], (py_ast.Continue, py_ast.Return)):
+            body.append(py_ast.Return(value=None))
+        return py_ast.While(test=py_ast.Constant(value=True), body=body, orelse=[])
+
+    def visit_TailCall(self, node: TailCall) -> py_ast.stmt:
+        # params = args, all evaluated before any is rebound
+        if not node.params:
+            return py_ast.Pass()
+        if len(node.params) == 1:
+            return py_ast.Assign(targets=[py_ast.Name(id=node.params[0], ctx=STORE)],
+                                 value=self.visit(node.args[0]))
+        return py_ast.Assign(
+            targets=[py_ast.Tuple(elts=[py_ast.Name(id=param, ctx=STORE) for param in node.params],
+                                  ctx=STORE)],
+            value=py_ast.Tuple(elts=[self.visit(arg) for arg in node.args], ctx=LOAD)
+        )
+
+    def visit_ParallelLoop(self, node: ParallelLoop) -> py_ast.stmt:
+        # The body becomes a function of the loop variable, compiled here
+        # and embedded as marshaled bytes so parallel.run() can ship it to
+        # worker processes. Roughly:
+        # target = __import__('parallel').run(b'...', start, end, globals(), locals())
+        iteration = py_ast.FunctionDef(
+            name=PARALLEL_ITERATION,
+            args=py_ast.arguments(posonlyargs=[], args=[py_ast.arg(arg=node.name)],
+                                  kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=self.block(node.body),
+            decorator_list=[],
+            lineno=(node.line or 1) + self.line_offset,
+            end_lineno=(node.line or 1) + self.line_offset,
+            col_offset=0,
+            end_col_offset=0
+        )
+        module = py_ast.Module(body=[iteration], type_ignores=[])
+        code = compile(py_ast.fix_missing_locations(module), '<kethaka>', 'exec')
+        iteration_code = next(const for const in code.co_consts
+                              if isinstance(const, types.CodeType))
+        call = py_ast.Call(
+            func=py_ast.Attribute(
+                value=py_ast.Call(func=py_ast.Name(id='__import__', ctx=LOAD),
+                                  args=[py_ast.Constant(value='parallel')], keywords=[]),
+                attr='run', ctx=LOAD),
+            args=[py_ast.Constant(value=marshal.dumps(iteration_code)),
+                  self.visit(node.start), self.visit(node.end),
+                  py_ast.Call(func=reserved_builtin('globals'), args=[], keywords=[]),
+                  py_ast.Call(func=reserved_builtin('locals'), args=[], keywords=[])],
+            keywords=[])
+        if node.target is not None:
+            return py_ast.Assign(targets=[py_ast.Name(id=node.target, ctx=STORE)], value=call)
+        return py_ast.Expr(value=call)
+
+    def visit_BinaryOperation(self, node: BinaryOperation) -> py_ast.expr:
+        if node.operator.is_comparison:
+            return py_ast.Compare(
+                left=self.visit(node.left),
+                ops=[PYTHON_OPERATORS[node.operator]],
+                comparators=[self.visit(node.right)]
+            )
+        return py_ast.BinOp(
+            left=self.visit(node.left),
+            op=PYTHON_OPERATORS[node.operator],
+            right=self.visit(node.right)
+        )
+
+    def visit_Number(self, node: Number) -> py_ast.Constant:
+        return py_ast.Constant(value=node.value)
+
+    def visit_StringLiteral(self, node: StringLiteral) -> py_ast.Constant:
+        return py_ast.Constant(value=node.value)
+
+    def visit_Variable(self, node: Variable) -> py_ast.expr:
+        return load_name(node.name)
 
-def compile_to_bytecode(source_file: str, output_file: str) -> None:
+    def visit_ArrayLiteral(self, node: ArrayLiteral) -> py_ast.Call:
+        # __import__('karray').KArray((elements...))
+        return py_ast.Call(
+            func=karray_attribute('KArray'),
+            args=[py_ast.Tuple(elts=[self.visit(element) for element in node.elements],
+                               ctx=LOAD)],
+            keywords=[]
+        )
+
+    def visit_ArrayRange(self, node: ArrayRange) -> py_ast.Call:
+        # __import__('karray').arange(start, end)
+        return py_ast.Call(
+            func=karray_attribute('arange'),
+            args=[self.visit(node.start), self.visit(node.end)],
+            keywords=[]
+        )
+
+    def visit_ArrayIndex(self, node: ArrayIndex) -> py_ast.Subscript:
+        return py_ast.Subscript(value=self.visit(node.array), slice=self.visit(node.index),
+                                ctx=LOAD)
+
+    def visit_ImportStatement(self, node: ImportStatement) -> py_ast.Import:
+        return py_ast.Import(names=[py_ast.alias(name=node.name)])
+
+    def visit_ReturnStatement(self, node: ReturnStatement) -> py_ast.Return:
+        return py_ast.Return(value=self.visit(node.value))
+
+def lowers_to_range(loop: ForLoop) -> bool:
+    """Whether a loop can run as `for name in range(start, end)`.
+
+    range() reads end once, so end must not make calls or read a name
+    the body binds, and it only counts in whole numbers, so neither bound
+    may divide or be a folded fraction. Other loops test name < end before
+    every iteration.
+    """
+    bound = set(binding_counts(loop.body))
+    for node in walk_expression([loop.start, loop.end]):
+        if isinstance(node, BinaryOperation) and node.operator is Operator.DIV:
+            return False
+        if isinstance(node, Number) and not isinstance(node.value, int):
+            return False
+    for node in walk_expression(loop.end):
+        if isinstance(node, FunctionCall):
+            return False
+        if isinstance(node, Variable) and node.name.split('.')[0] in bound:
+            return False
+    return True
+
+def ast_to_python_ast(node, buffered_output=False):
+    """Lower one top-level Kethaka statement to a Python statement.
+
+    A compile lowers every statement through one PythonLowering of its
+    own; a lowering keeps state while it works, so none is shared
+    between threads.
+    """
+    return PythonLowering(buffered_output).statement(node)
+
+def output_prologue() -> py_ast.stmt:
+    """The first statement of buffered-output code:
+    _kethaka_write = __import__('output').install().write
+    """
+    install = py_ast.Call(
+        func=py_ast.Attribute(
+            value=py_ast.Call(func=py_ast.Name(id='__import__', ctx=LOAD),
+                              args=[py_ast.Constant(value='output')], keywords=[]),
+            attr='install', ctx=LOAD),
+        args=[], keywords=[])
+    return py_ast.Assign(
+        targets=[py_ast.Name(id=OUTPUT_WRITE, ctx=STORE)],
+        value=py_ast.Attribute(value=install, attr='write', ctx=LOAD)
+    )
+
+def builtins_prologue() -> py_ast.stmt:
+    """The statement that binds RESERVED_BUILTINS in the module:
+    from builtins import print as _kethaka_print, ...
+
+    The import reads the builtins module, not the module's namespace, so
+    neither the program nor an earlier run in the same namespace can
+    have replaced them.
+    """
+    return py_ast.ImportFrom(module='builtins', level=0, names=[
+        py_ast.alias(name=name, asname=alias) for name, alias in RESERVED_BUILTINS.items()])
+
+def module_body(statements: list[py_ast.stmt], scope: ModuleScope,
+                buffered_output: bool = False) -> list[py_ast.stmt]:
+    """The module-level statements of a program, given its lowered main
+    program and its scope.module_scope(). Roughly:
+
+    from builtins import print as _kethaka_print, ...
+    def f(n): ...
+    def _kethaka_main(len=len, _kethaka_print=_kethaka_print, ...):
+        global x
+        try:
+            ...
+        finally:
+            del len
+            _kethaka_globals().update(_kethaka_locals())
+    _kethaka_main()
+
+    Names a function reads stay module globals; every other variable of
+    the main program becomes a fast local, and the builtins it reads, as
+    well as the RESERVED_BUILTINS the compiled code calls, are bound once
+    as parameter defaults. When it ends, its variables are
+    copied out to the module, where importing modules and embedding
+    programs look for them. All of the wrapper is on WRAPPER_LINE.
+    Top-level functions bound nowhere else are defined in the module
+    first: CPython takes time quadratic in their number to compile
+    functions nested in another.
+    """
+    if scope.returns_at is not None:
+        raise SyntaxError(f"ආපසු outside a ක්‍රියාව function at line {scope.returns_at}")
+    builtin_names = scope.builtin_names()
+    # The reserved names hold the values of the module globals they are
+    # exported over, so only the program's own builtins are deleted
+    bound = builtin_names + [alias for name, alias in RESERVED_BUILTINS.items()
+              if not (buffered_output and name == 'print')]
+    if buffered_output:
+        bound.append(OUTPUT_WRITE)
+    module_functions = set(scope.module_functions())
+    functions = [statement for statement in statements
+                 if isinstance(statement, py_ast.FunctionDef) and statement.name in module_functions]
+    statements = [statement for statement in statements
+                  if not (isinstance(statement, py_ast.FunctionDef)
+                          and statement.name in module_functions)]
+    main = []
+    if scope.global_names():
+        main.append(py_ast.Global(names=scope.global_names()))
+    export = py_ast.Expr(value=py_ast.Call(
+        func=py_ast.Attribute(
+            value=py_ast.Call(func=py_ast.Name(id=RESERVED_BUILTINS['globals'], ctx=LOAD),
+                              args=[], keywords=[]),
+            attr='update', ctx=LOAD),
+        args=[py_ast.Call(func=py_ast.Name(id=RESERVED_BUILTINS['locals'], ctx=LOAD),
+                          args=[], keywords=[])],
+        keywords=[]))
+    finally_body = [export]
+    if builtin_names:
+        finally_body.insert(0, py_ast.Delete(targets=[py_ast.Name(id=name, ctx=py_ast.Del())
+                                                      for name in builtin_names]))
+    main.append(py_ast.Try(body=statements or [py_ast.Pass()], handlers=[], orelse=[],
+                           finalbody=finally_body))
+    function = py_ast.FunctionDef(
+        name=MAIN_FUNCTION,
+        args=py_ast.arguments(posonlyargs=[], args=[py_ast.arg(arg=name) for name in bound],
+                              kwonlyargs=[], kw_defaults=[],
+                              defaults=[py_ast.Name(id=name, ctx=LOAD) for name in bound]),
+        body=main,
+        decorator_list=[]
+    )
+    call = py_ast.Expr(value=py_ast.Call(func=py_ast.Name(id=MAIN_FUNCTION, ctx=LOAD),
+                                         args=[], keywords=[]))
+    prologue = [builtins_prologue()]
+    if buffered_output:
+        prologue.insert(0, output_prologue())
+    for node in prologue + [function, call]:
+        # fix_missing_locations() gives the statements inside the same line
+        node.lineno = node.end_lineno = WRAPPER_LINE
+        node.col_offset = node.end_col_offset = 0
+    return prologue + functions + [function, call]
+
+def stream_to_python_ast(source_file, optimize: int = 0,
+                         buffered_output: bool = False) -> list[py_ast.stmt]:
+    """Lex, parse and lower a source file one top-level statement at a time.
+
+    source_file is a path, or a binary file positioned at the start of the
+    source, which is left open.
+
+    Tokens are read lazily in chunks and each Kethaka statement is dropped
+    as soon as it is lowered, so only the Python AST grows with the file.
+    Optimization passes see one statement at a time, so only the -O1
+    passes run: the -O2 ones need to see every binding in the program,
+    and compile_to_bytecode doesn't stream at -O2. Returns module_body()
+    of the program.
+    """
+    scope = ModuleScope()
+    lowering = PythonLowering(buffered_output)
+    if isinstance(source_file, (str, os.PathLike)):
+        with open(source_file, 'rb') as f:
+            return stream_to_python_ast(f, optimize, buffered_output)
+    main = []
+    text = io.TextIOWrapper(source_file, encoding='utf-8', newline='')
     try:
-        # Read source code
-        with open(source_file, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-            
-        # Generate tokens
-        tokens = lexer(source_code)
-        print(f"Tokens generated from {source_file}:", tokens)
-        
-        # Parse tokens into AST
-        kethaka_ast = parse(tokens, source_code)
-        print("AST:", kethaka_ast)
-        
-        # Convert Kethaka AST to Python AST
-        python_ast_nodes = [ast_to_python_ast(node) for node in kethaka_ast]
+        for statement in iter_parse(stream_lexer(text), None):
+            nodes = run_passes([statement], min(optimize, 1)) if optimize else [statement]
+            for node in nodes:
+                scope.add(node)
+                main.append(lowering.statement(node))
+    finally:
+        # Closing the wrapper would close source_file
+        text.detach()
+    return module_body(main, scope, buffered_output)
+
+def compile_source(source_code: str, filename: str = '<kethaka>', optimize: int = 0,
+                   buffered_output: bool = False) -> types.CodeType:
+    """Compile Kethaka source text to a code object without touching disk.
+
+    Raises SyntaxError for invalid source, like compile_to_bytecode.
+    """
+    kethaka_ast = parse(lexer(source_code), source_code)
+    if optimize:
+        kethaka_ast = run_passes(kethaka_ast, optimize)
+    lowering = PythonLowering(buffered_output)
+    main = [lowering.statement(node) for node in kethaka_ast]
+    body = module_body(main, module_scope(kethaka_ast), buffered_output)
+    module = py_ast.Module(body=body, type_ignores=[])
+    return compile(py_ast.fix_missing_locations(module), filename, 'exec')
+
+def compile_to_bytecode(source_file: str, output_file: str, force: bool = False,
+                        optimize: int = 0, dump_tokens: bool = False,
+                        dump_ast: bool = False, profile=None,
+                        incremental=None, buffered_output: bool = False,
+                        report_tail_calls: bool = False) -> bool:
+    """Compile source_file to output_file unless the .kbc is already fresh.
+
+    optimize is the -O level handed to optimizer.run_passes. buffered_output
+    makes මුද්‍රණය write through output.install()'s buffered stream; both
+    are recorded in the .kbc header flags. dump_tokens and dump_ast print
+    the token list and Kethaka AST. report_tail_calls prints the functions
+    whose self tail calls -O2 turned into loops. profile, an
+    instrument.CompileProfile, receives per-phase timings and counts.
+    incremental, an incremental.IncrementalCompiler, recompiles only the
+    top-level units that changed since it last compiled this file.
+    Returns True when the source was compiled and False when the existing
+    bytecode was up to date.
+    """
+    if profile is None:
+        profile = NullProfile()
+    flags = compile_flags(optimize, buffered_output)
+    if not force:
+        with profile.phase('cache_check'):
+            state = check_cache(source_file, output_file, flags=flags)
+            if state == 'same-hash':
+                touch_header(source_file, output_file)
+        if state != 'stale':
+            return False
+
+    code = None
+    # The header's mtime and size must describe the contents compiled,
+    # so both come from the one open file, not a separate stat
+    with open(source_file, 'rb') as source:
+        source_stat = os.fstat(source.fileno())
+        profile.count(bytes=source_stat.st_size)
+        streamed = source_stat.st_size >= STREAM_THRESHOLD and optimize <= 1
+        if streamed:
+            with profile.phase('stream'):
+                python_ast_nodes = stream_to_python_ast(source, optimize, buffered_output)
+            with profile.phase('hash'):
+                source.seek(0)
+                source_digest = stream_hash(source)
+        else:
+            # Read source code
+            with profile.phase('read'):
+                source_data = source.read()
+                source_code = source_data.decode('utf-8')
+                source_digest = source_hash(source_data)
+
+    if not streamed:
+        if incremental is not None and not (dump_tokens or dump_ast or report_tail_calls):
+            with profile.phase('incremental'):
+                code = incremental.compile(source_code, source_file, optimize,
+                                           buffered_output)
+            profile.count(units=incremental.last_stats['units'],
+                          reused_units=incremental.last_stats['reused_units'])
+        else:
+            # Generate tokens; large sources use the packed TokenBuffer
+            with profile.phase('lex'):
+                if len(source_data) >= COMPACT_TOKENS_THRESHOLD:
+                    tokens = compact_lexer(source_code)
+                else:
+                    tokens = lexer(source_code)
+            profile.count(tokens=len(tokens))
+            if dump_tokens:
+                print(f"Tokens generated from {source_file}:", tokens)
+
+            # Parse tokens into AST
+            with profile.phase('parse'):
+                kethaka_ast = parse(tokens, source_code)
+            del tokens
+            if not isinstance(profile, NullProfile):
+                profile.count(nodes=count_nodes(kethaka_ast))
+            if dump_ast:
+                print("AST:", kethaka_ast)
+
+            # Optimize the Kethaka AST
+            if optimize:
+                with profile.phase('optimize'):
+                    kethaka_ast = run_passes(kethaka_ast, optimize)
+            if report_tail_calls:
+                names = tail_call_functions(kethaka_ast)
+                print(f"Tail calls eliminated in {source_file}: {', '.join(names) or 'none'}")
+
+            # Convert Kethaka AST to Python AST
+            with profile.phase('lower'):
+                lowering = PythonLowering(buffered_output)
+                python_ast_nodes = module_body(
+                    [lowering.statement(node) for node in kethaka_ast],
+                    module_scope(kethaka_ast), buffered_output)
+    if code is None:
         module = py_ast.Module(body=python_ast_nodes, type_ignores=[])
-        
-        # Add line numbers and parent references
-        module = py_ast.fix_missing_locations(module)
-        
+
+        # Fill in locations for nodes without a Kethaka line of their own
+        with profile.phase('fix_locations'):
+            module = py_ast.fix_missing_locations(module)
+
         # Compile to bytecode
-        code = compile(module, source_file, 'exec')
-        
-        # Save bytecode
-        with open(output_file, 'wb') as f:
-            marshal.dump(code, f)
-            
-    except Exception as e:
-        print(f"Error compiling {source_file}: {str(e)}")
-        raise
+        with profile.phase('compile'):
+            code = compile(module, source_file, 'exec')
+
+    # Save bytecode
+    with profile.phase('marshal'):
+        write_bytecode(code, output_file, source_stat, source_digest, flags=flags)
+    return True
 
 if __name__ == "__main__":
     import sys
@@ -173,4 +668,8 @@ if __name__ == "__main__":
     
     source_file = sys.argv[1]
     output_file = source_file.replace('.snl', '.kbc')
-    compile_to_bytecode(source_file, output_file)
+    try:
+        compile_to_bytecode(source_file, output_file)
+    except Exception as e:
+        print(f"Error compiling {source_file}: {e}")
+        sys.exit(1)
@@ -0,0 +1,131 @@
+"""Import hooks that let Kethaka programs ආනයනය other Kethaka modules.
+
+BundleFinder serves modules from a .kba bundle; DirectoryFinder serves
+.kbc files, rebuilt from their .snl when stale, from a directory. Both
+load modules lazily: `ආනයනය m;` binds m at once, but m's code object is
+only read and run when the program first uses something in m.
+"""
+import importlib.util
+import os
+import sys
+
+from kbc import (check_cache, compile_flags, flag_options, load_bytecode, read_flags,
+                 source_hash, touch_header, write_bytecode)
+
+
+def load_program(bytecode_file):
+    """Load the code object of a .kbc file.
+
+    Bytecode that is stale or was built by another Python is rebuilt from
+    the .snl next to it, with the same compile options; without a source
+    it is rejected.
+    """
+    source_file = bytecode_file[:-len('.kbc')] + '.snl'
+    if os.path.exists(source_file) and check_cache(source_file, bytecode_file, flags=None) == 'stale':
+        from compiler import compile_to_bytecode
+        compile_to_bytecode(source_file, bytecode_file, force=True,
+                            **flag_options(read_flags(bytecode_file)))
+    header, code = load_bytecode(bytecode_file)
+    return code
+
+
+def load_source(source_file, optimize=0, buffered_output=False):
+    """Load the code object of a .snl file, for `kethaka run`.
+
+    A fresh .kbc next to the source, built with the same options, is
+    loaded as it is. Otherwise the source is compiled in memory, and the
+    .kbc is written for next time when the directory allows it.
+    """
+    bytecode_file = source_file[:-len('.snl')] + '.kbc'
+    flags = compile_flags(optimize, buffered_output)
+    state = check_cache(source_file, bytecode_file, flags=flags)
+    if state != 'stale':
+        if state == 'same-hash':
+            touch_header(source_file, bytecode_file)
+        header, code = load_bytecode(bytecode_file)
+        return code
+
+    from compiler import compile_source
+    with open(source_file, 'rb') as f:
+        source_data = f.read()
+        source_stat = os.fstat(f.fileno())
+    code = compile_source(source_data.decode('utf-8'), source_file, optimize, buffered_output)
+    try:
+        write_bytecode(code, bytecode_file, source_stat, source_hash(source_data), flags=flags)
+    except OSError:
+        # A read-only checkout still runs, it just compiles every time
+        pass
+    return code
+
+
+# The finder and loader protocols are implemented directly rather than
+# through importlib.abc, whose import costs more than the rest of kethaka's
+# start-up.
+
+class CodeLoader:
+    def __init__(self, get_code):
+        self.get_code = get_code
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        exec(self.get_code(module.__name__), module.__dict__)
+
+
+class KethakaFinder:
+    """A meta path finder for Kethaka modules.
+
+    Subclasses define origin(name), the path a module is served from or
+    None when they have no such module, and get_code(name), its code
+    object.
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        origin = self.origin(fullname)
+        if origin is None:
+            return None
+        loader = importlib.util.LazyLoader(CodeLoader(self.get_code))
+        return importlib.util.spec_from_loader(fullname, loader, origin=origin)
+
+    def install(self):
+        # After Python's own finders: the runtime and the standard library
+        # modules it imports as the program runs must not be shadowed by a
+        # Kethaka module of the same name
+        sys.meta_path.append(self)
+        return self
+
+
+class BundleFinder(KethakaFinder):
+    def __init__(self, bundle):
+        self.bundle = bundle
+
+    def origin(self, name):
+        return self.bundle.path if name in self.bundle else None
+
+    def get_code(self, name):
+        return self.bundle.code(name)
+
+
+class DirectoryFinder(KethakaFinder):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def origin(self, name):
+        base = os.path.join(self.directory, name)
+        for path in (base + '.kbc', base + '.snl'):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get_code(self, name):
+        bytecode_file = os.path.join(self.directory, name + '.kbc')
+        source_file = bytecode_file[:-len('.kbc')] + '.snl'
+        try:
+            if not os.path.exists(bytecode_file):
+                from compiler import compile_to_bytecode
+                compile_to_bytecode(source_file, bytecode_file)
+            return load_program(bytecode_file)
+        except SyntaxError as e:
+            # The error alone doesn't say which module failed to compile
+            raise ImportError(f"Error compiling {source_file}: {e}") from e
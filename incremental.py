@@ -0,0 +1,256 @@
+"""Function-granular incremental compilation.
+
+An IncrementalCompiler remembers, per source file, what it compiled last
+time. A source is split into top-level units: each ක්‍රියාව definition is
+a unit, and so is each run of other top-level statements between them.
+Units are fingerprinted by their text, and a unit whose fingerprint was
+seen in the previous compile is not lexed or parsed again; for a
+function unit, its code object is not recompiled either.
+
+The module code object is assembled from a skeleton: the statement runs
+plus a stub for every function, compiled together. The skeleton is only
+recompiled when a statement run changes or a unit moves to another line;
+the stubs' code objects are then swapped for the real ones in its
+co_consts, or in those of the main program's function. Units are
+compiled as if they started on line 1 and shifted to their real line
+afterwards, so adding a line near the top of a file doesn't invalidate
+the units below it.
+
+Only the max_files most recently compiled files are remembered, so a
+long-lived compiler, such as one in the compile server, doesn't grow
+with every file it has ever seen.
+
+-O2 propagates constants and inlines functions across units, so it always
+compiles the whole file, as does any source the splitter can't handle.
+"""
+import ast as py_ast
+import re
+import types
+from collections import OrderedDict
+
+from compiler import MAIN_FUNCTION, PythonLowering, ast_to_python_ast, compile_source, module_body
+from kbc import source_hash
+from lexer import MASTER_PATTERN, lexer
+from nodes import FunctionDefinition
+from optimizer import run_passes
+from parser import parse
+from scope import ModuleScope, function_scope
+
+# Highest -O level whose passes only look inside one top-level statement
+MAX_INCREMENTAL_LEVEL = 1
+
+# Strings and comments are matched whole so the braces and semicolons
+# inside them are skipped; none of these characters can appear inside
+# any other token.
+BOUNDARY_PATTERN = re.compile(r'''["'][^"']*["']|#[^\n]*|[{};]''')
+SPACE_PATTERN = re.compile(r'(?:[ \t\r\n]+|#[^\n]*)*')
+
+
+def split_units(source_code):
+    """Split source into [kind, first line, text] units.
+
+    kind is 'function' for a ක්‍රියාව definition and 'statements' for a run
+    of other top-level statements. Returns None when the braces don't
+    balance, leaving the error to the parser.
+    """
+    units = []
+    depth = 0
+    # Lines are counted lazily, up to the start of each statement
+    line = 1
+    counted = 0
+    start = None
+    end = 0
+    for match in BOUNDARY_PATTERN.finditer(source_code):
+        character = match.group()
+        if character[0] == '#':
+            continue
+        if start is None:
+            # The statement starts at its first token, at or before this match
+            start = SPACE_PATTERN.match(source_code, end).end()
+            line += source_code.count('\n', counted, start)
+            counted = start
+        if character == '{':
+            depth += 1
+        elif character == '}':
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0:
+                following = SPACE_PATTERN.match(source_code, match.end()).end()
+                token = MASTER_PATTERN.match(source_code, following)
+                if token is not None and token.lastgroup == 'ELSE':
+                    continue
+                end = match.end()
+                _add_statement(units, source_code, start, end, line)
+                start = None
+        elif character == ';' and depth == 0:
+            end = match.end()
+            _add_statement(units, source_code, start, end, line)
+            start = None
+    if depth != 0:
+        return None
+    start = SPACE_PATTERN.match(source_code, end).end()
+    if start < len(source_code):
+        # A final call statement without a semicolon
+        line += source_code.count('\n', counted, start)
+        _add_statement(units, source_code, start, len(source_code), line)
+    return [unit[:3] for unit in units]
+
+
+def _add_statement(units, source_code, start, end, start_line):
+    token = MASTER_PATTERN.match(source_code, start)
+    kind = 'function' if token is not None and token.lastgroup == 'FUNCTION' else 'statements'
+    if kind == 'statements' and units and units[-1][0] == 'statements':
+        units[-1][2] = source_code[units[-1][3]:end]
+        return
+    units.append([kind, start_line, source_code[start:end], start])
+
+
+def shift_lines(code, offset):
+    """Move a code object and the code objects nested in it down offset lines."""
+    if not offset:
+        return code
+    return code.replace(
+        co_firstlineno=code.co_firstlineno + offset,
+        co_consts=tuple(shift_lines(const, offset) if isinstance(const, types.CodeType)
+                        else const for const in code.co_consts))
+
+
+DEFAULT_MAX_FILES = 256
+
+
+class IncrementalCompiler:
+    def __init__(self, max_files=DEFAULT_MAX_FILES):
+        if max_files < 1:
+            raise ValueError("max_files must be at least 1")
+        self.max_files = max_files
+        # filename -> state of the last compile of that file, least
+        # recently compiled first
+        self.files = OrderedDict()
+        self.last_stats = {}
+
+    def compile(self, source_code, filename, optimize=0, buffered_output=False):
+        """Compile source_code like compiler.compile_source, reusing unchanged units."""
+        units = None
+        if optimize <= MAX_INCREMENTAL_LEVEL:
+            units = split_units(source_code)
+        options = (optimize, buffered_output)
+        if units is None:
+            self.files.pop(filename, None)
+            return self._compile_whole(source_code, filename, options)
+
+        previous = self.files.get(filename)
+        if previous is None or previous['options'] != options:
+            previous = {'units': {}, 'skeleton': None}
+        cache = {}
+        reused = 0
+        layout = []
+        for kind, start_line, text in units:
+            key = (kind, source_hash(text.encode('utf-8')))
+            entry = previous['units'].get(key) or cache.get(key)
+            if entry is not None:
+                reused += 1
+            else:
+                try:
+                    entry = self._compile_unit(kind, text, filename, options)
+                except SyntaxError:
+                    # Let the whole-file compile report the error with real line numbers
+                    self.files.pop(filename, None)
+                    return self._compile_whole(source_code, filename, options)
+            cache[key] = entry
+            layout.append((key, start_line, entry))
+
+        scope = ModuleScope()
+        for key, start_line, entry in layout:
+            if entry[0] == 'function':
+                scope.add_function(entry[1], entry[4], top_level=True)
+            else:
+                for node in entry[1]:
+                    scope.add(node)
+        # Function bodies are not part of the skeleton, only their signatures
+        # and which of the main program's names they make global
+        skeleton_key = tuple((key, start_line) if entry[0] == 'statements'
+                             else (entry[1], tuple(entry[2]), start_line)
+                             for key, start_line, entry in layout)
+        skeleton_key += (tuple(scope.global_names()),)
+        skeleton = previous['skeleton']
+        if skeleton is None or skeleton[0] != skeleton_key:
+            skeleton = (skeleton_key, self._compile_skeleton(layout, scope, filename,
+                                                             buffered_output))
+        code = self._attach_functions(skeleton[1], layout)
+        if code is None:
+            self.files.pop(filename, None)
+            return self._compile_whole(source_code, filename, options)
+
+        self.files[filename] = {'options': options, 'units': cache, 'skeleton': skeleton}
+        self.files.move_to_end(filename)
+        while len(self.files) > self.max_files:
+            self.files.popitem(last=False)
+        self.last_stats = {'units': len(units), 'reused_units': reused,
+                           'skeleton_reused': skeleton is previous['skeleton']}
+        return code
+
+    def _compile_whole(self, source_code, filename, options):
+        self.last_stats = {'units': 1, 'reused_units': 0, 'skeleton_reused': False}
+        return compile_source(source_code, filename, *options)
+
+    def _compile_unit(self, kind, text, filename, options):
+        optimize, buffered_output = options
+        nodes = parse(lexer(text), text)
+        if optimize:
+            nodes = run_passes(nodes, optimize)
+        if kind == 'function' and len(nodes) == 1 and isinstance(nodes[0], FunctionDefinition):
+            function = nodes[0]
+            module = py_ast.Module(body=[ast_to_python_ast(function, buffered_output)],
+                                   type_ignores=[])
+            code = compile(py_ast.fix_missing_locations(module), filename, 'exec')
+            function_code = next(const for const in code.co_consts
+                                 if isinstance(const, types.CodeType))
+            return ('function', function.name, function.params, function_code,
+                    function_scope(function).free())
+        return ('statements', nodes)
+
+    def _compile_skeleton(self, layout, scope, filename, buffered_output):
+        body = []
+        lowering = PythonLowering(buffered_output)
+        for key, start_line, entry in layout:
+            if entry[0] == 'function':
+                lowering.line_offset = 0
+                body.append(lowering.statement(
+                    FunctionDefinition(entry[1], entry[2], [], start_line)))
+            else:
+                lowering.line_offset = start_line - 1
+                body.extend(lowering.statement(node) for node in entry[1])
+        module = py_ast.Module(body=module_body(body, scope, buffered_output), type_ignores=[])
+        return compile(py_ast.fix_missing_locations(module), filename, 'exec')
+
+    def _attach_functions(self, skeleton, layout):
+        functions = {}
+        for key, start_line, entry in layout:
+            if entry[0] == 'function':
+                functions[entry[1], start_line] = shift_lines(entry[3], start_line - 1)
+        if len(functions) != sum(1 for *_, entry in layout if entry[0] == 'function'):
+            return None
+        attached = 0
+
+        def attach(code):
+            # Stubs are defined in the module, or in the main program's
+            # function when their name is bound more than once
+            nonlocal attached
+            consts = []
+            for const in code.co_consts:
+                if isinstance(const, types.CodeType):
+                    function = functions.get((const.co_name, const.co_firstlineno))
+                    if function is not None:
+                        const = function
+                        attached += 1
+                    elif const.co_name == MAIN_FUNCTION:
+                        const = attach(const)
+                consts.append(const)
+            return code.replace(co_consts=tuple(consts))
+
+        code = attach(skeleton)
+        if attached != len(functions):
+            # A function nested in a statement run shares a stub's name and line
+            return None
+        return code
@@ -0,0 +1,99 @@
+"""Per-phase timing and memory instrumentation for the compiler.
+
+compile_to_bytecode records each phase (reading, lexing, parsing, ...)
+in a CompileProfile. Wall and CPU time are always measured; peak memory
+is measured with tracemalloc when the profile is created with
+trace_memory=True, which slows compilation down noticeably.
+"""
+import time
+from contextlib import contextmanager
+
+from optimizer import walk, walk_expression
+
+
+def count_nodes(program):
+    count = 0
+    for statement in walk(program):
+        count += 1
+        for name in statement._expressions:
+            count += sum(1 for _ in walk_expression(getattr(statement, name)))
+    return count
+
+
+class CompileProfile:
+    def __init__(self, source_file, trace_memory=False):
+        self.source_file = source_file
+        self.trace_memory = trace_memory
+        self.phases = []
+        self.counts = {}
+
+    @contextmanager
+    def phase(self, name):
+        started_tracing = False
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                'name': name,
+                'wall': time.perf_counter() - wall,
+                'cpu': time.process_time() - cpu,
+            }
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['peak_memory'] = peak
+                record['memory_delta'] = current - memory_before
+                if started_tracing:
+                    tracemalloc.stop()
+            self.phases.append(record)
+
+    def count(self, **counts):
+        self.counts.update(counts)
+
+    def report(self):
+        return {
+            'source': self.source_file,
+            'counts': self.counts,
+            'phases': self.phases,
+            'total': {
+                'wall': sum(phase['wall'] for phase in self.phases),
+                'cpu': sum(phase['cpu'] for phase in self.phases),
+            },
+        }
+
+    def format(self):
+        counts = ', '.join(f"{value:,} {name}" for name, value in self.counts.items())
+        lines = [f"{self.source_file}: {counts}" if counts else self.source_file]
+        total = sum(phase['wall'] for phase in self.phases) or 1.0
+        for phase in self.phases:
+            line = (f"  {phase['name']:<14} {phase['wall'] * 1000:10.2f} ms wall "
+                    f"{phase['cpu'] * 1000:10.2f} ms cpu {phase['wall'] / total:6.1%}")
+            if 'peak_memory' in phase:
+                line += f" {phase['peak_memory'] / (1 << 20):9.2f} MB peak"
+            lines.append(line)
+        lines.append(f"  {'total':<14} {total * 1000:10.2f} ms wall")
+        return '\n'.join(lines)
+
+
+class NullProfile:
+    """Stands in for CompileProfile when nothing is being measured."""
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def count(self, **counts):
+        pass
+
+
+def write_report(reports, path):
+    import json
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,222 @@
+"""Numeric arrays for Kethaka programs.
+
+    සඳහන් a = [1, 2, 3];
+    සඳහන් b = අරාව(0, 1000000);
+    සඳහන් c = b * 2 + 1;
+    සඳහන් එකතුව = c.එකතුව();
+
+The compiler lowers `[...]` to KArray(...), `අරාව(START, END)` to
+arange() and `a[i]` to indexing. Arithmetic and comparisons need no
+lowering of their own: an operator with a KArray on either side runs
+over the whole array in one call, element by element, against another
+array of the same length or a number. Comparisons give arrays of 1s
+and 0s. The reductions are methods, under their Kethaka names:
+
+    එකතුව  sum      අවම  min      උපරිම  max      දිග  length
+
+Elements are 64-bit integers, or floats once any element is one or
+after a division. The buffer is a NumPy array when NumPy is installed
+and an array-module array otherwise. With NumPy, integer arithmetic
+wraps around on overflow instead of raising OverflowError.
+
+Arrays are immutable, so they hash by identity: memoized functions can
+take them as arguments even though == compares them element by element.
+"""
+import itertools
+import operator
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BACKEND = 'numpy' if numpy is not None else 'array'
+
+COMPARISONS = (operator.lt, operator.gt, operator.le, operator.ge, operator.eq, operator.ne)
+
+
+class KArray:
+    __slots__ = ('data',)
+
+    def __init__(self, values=()):
+        self.data = _numbers(values)
+
+    # Arrays are immutable, so a memo cache can key on the object itself
+    __hash__ = object.__hash__
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if numpy is not None:
+            return self.data[operator.index(index)].item()
+        return self.data[index]
+
+    def __iter__(self):
+        if numpy is not None:
+            return iter(self.data.tolist())
+        return iter(self.data)
+
+    def __bool__(self):
+        raise ValueError("An array is neither true nor false; "
+                         "compare its එකතුව(), අවම() or උපරිම() instead")
+
+    def __repr__(self):
+        return f"[{', '.join(map(repr, self))}]"
+
+    def __reduce__(self):
+        return KArray, (self.data,)
+
+    def _apply(self, other, function, reflected=False):
+        if isinstance(other, KArray):
+            if len(other.data) != len(self.data):
+                raise ValueError(f"Arrays of length {len(self.data)} and {len(other.data)} "
+                                 f"can't be combined")
+            other = other.data
+        elif not isinstance(other, (int, float)):
+            return NotImplemented
+        left, right = (other, self.data) if reflected else (self.data, other)
+        if numpy is not None:
+            return _wrap(_numpy_apply(left, right, function))
+        return _wrap(_array_apply(left, right, function))
+
+    def __add__(self, other):
+        return self._apply(other, operator.add)
+
+    def __radd__(self, other):
+        return self._apply(other, operator.add, reflected=True)
+
+    def __sub__(self, other):
+        return self._apply(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._apply(other, operator.sub, reflected=True)
+
+    def __mul__(self, other):
+        return self._apply(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._apply(other, operator.mul, reflected=True)
+
+    def __truediv__(self, other):
+        return self._apply(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self._apply(other, operator.truediv, reflected=True)
+
+    # Python tries the reflected comparison by itself, so 2 < a calls a > 2
+    def __lt__(self, other):
+        return self._apply(other, operator.lt)
+
+    def __gt__(self, other):
+        return self._apply(other, operator.gt)
+
+    def __le__(self, other):
+        return self._apply(other, operator.le)
+
+    def __ge__(self, other):
+        return self._apply(other, operator.ge)
+
+    def __eq__(self, other):
+        return self._apply(other, operator.eq)
+
+    def __ne__(self, other):
+        return self._apply(other, operator.ne)
+
+    # Reductions
+
+    def sum(self):
+        if numpy is not None:
+            return self.data.sum().item()
+        return sum(self.data)
+
+    def min(self):
+        if not len(self.data):
+            raise ValueError("අවම() of an empty array")
+        if numpy is not None:
+            return self.data.min().item()
+        return min(self.data)
+
+    def max(self):
+        if not len(self.data):
+            raise ValueError("උපරිම() of an empty array")
+        if numpy is not None:
+            return self.data.max().item()
+        return max(self.data)
+
+    def length(self):
+        return len(self.data)
+
+
+# The names Kethaka programs call the reductions by, as in a.එකතුව()
+REDUCTIONS = {'එකතුව': 'sum', 'අවම': 'min', 'උපරිම': 'max', 'දිග': 'length'}
+for _name, _method in REDUCTIONS.items():
+    setattr(KArray, _name, getattr(KArray, _method))
+
+
+def arange(start, end):
+    """The array of start, start + 1, ... up to but not including end,
+    the values a දක්වා loop would count through."""
+    for bound in (start, end):
+        if not isinstance(bound, (int, float)):
+            raise TypeError(f"අරාව() bounds must be numbers, not {type(bound).__name__}")
+    if isinstance(start, int) and isinstance(end, int):
+        if numpy is not None:
+            return _wrap(numpy.arange(start, end, dtype=numpy.int64))
+        return _wrap(array('q', range(start, end)))
+    return KArray(itertools.takewhile(lambda value: value < end, itertools.count(start)))
+
+
+def _wrap(data):
+    result = object.__new__(KArray)
+    result.data = data
+    return result
+
+
+def _numbers(values):
+    """A buffer holding values, which must all be numbers."""
+    if numpy is not None:
+        data = numpy.asarray(values)
+        if data.dtype.kind == 'b':
+            data = data.astype(numpy.int64)
+        if data.dtype.kind not in 'if' or data.ndim != 1:
+            raise TypeError("Array elements must be numbers")
+        return data
+    if isinstance(values, array):
+        return values
+    values = list(values)
+    typecode = 'q'
+    for value in values:
+        if isinstance(value, float):
+            typecode = 'd'
+        elif not isinstance(value, int):
+            raise TypeError(f"Array elements must be numbers, not {type(value).__name__}")
+    return array(typecode, values)
+
+
+def _array_apply(left, right, function):
+    # map() runs the loop in C; only the per-element operator call is left.
+    # array() fills itself from a list faster than from an iterator.
+    if isinstance(left, array) and isinstance(right, array):
+        values = map(function, left, right)
+        floats = 'd' in (left.typecode, right.typecode)
+    elif isinstance(left, array):
+        values = map(function, left, itertools.repeat(right, len(left)))
+        floats = left.typecode == 'd' or isinstance(right, float)
+    else:
+        values = map(function, itertools.repeat(left, len(right)), right)
+        floats = right.typecode == 'd' or isinstance(left, float)
+    if function in COMPARISONS:
+        return array('q', list(values))
+    return array('d' if floats or function is operator.truediv else 'q', list(values))
+
+
+def _numpy_apply(left, right, function):
+    if function is operator.truediv and not numpy.all(right):
+        # NumPy would give inf or nan with a warning
+        raise ZeroDivisionError("division by zero")
+    result = function(left, right)
+    if result.dtype.kind == 'b':
+        result = result.astype(numpy.int64)
+    return result
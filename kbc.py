@@ -0,0 +1,145 @@
+import importlib.util
+import marshal
+import os
+import struct
+
+# .kbc layout, modelled on CPython's .pyc files:
+#
+#   magic         4s  b'KBC\0' - marks a Kethaka bytecode file
+#   version       H   header format version
+#   flags         H   compile options the code object depends on: the -O
+#                     level in the low byte, BUFFERED_OUTPUT above it
+#   python magic  4s  importlib.util.MAGIC_NUMBER of the compiling Python
+#   source mtime  Q   st_mtime_ns of the .snl
+#   source size   Q   st_size of the .snl
+#   source hash   16s blake2b digest of the .snl bytes
+#
+# followed by the marshaled code object.
+MAGIC = b'KBC\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHH4sQQ16s')
+
+OPTIMIZE_MASK = 0x00ff
+# මුද්‍රණය writes through output.install()'s buffered stream
+BUFFERED_OUTPUT = 0x0100
+
+
+class BytecodeError(ValueError):
+    pass
+
+
+# hashlib is imported where it's used: a .kbc whose source mtime matches
+# is loaded without hashing anything, and hashlib loads OpenSSL.
+
+def source_hash(data):
+    import hashlib
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """source_hash of a file's contents, read in chunks."""
+    with open(path, 'rb') as f:
+        return stream_hash(f, chunk_size)
+
+
+def stream_hash(f, chunk_size=1 << 20):
+    """source_hash of the rest of a binary file, read in chunks."""
+    import hashlib
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.digest()
+
+
+def compile_flags(optimize=0, buffered_output=False):
+    """The header flags of code compiled with these options."""
+    return optimize | (BUFFERED_OUTPUT if buffered_output else 0)
+
+
+def flag_options(flags):
+    """The compile options a header's flags record, as keyword arguments."""
+    return {'optimize': flags & OPTIMIZE_MASK, 'buffered_output': bool(flags & BUFFERED_OUTPUT)}
+
+
+def pack_header(source_stat, source_digest, flags=0):
+    return HEADER.pack(MAGIC, FORMAT_VERSION, flags, importlib.util.MAGIC_NUMBER,
+                       source_stat.st_mtime_ns, source_stat.st_size, source_digest)
+
+
+def read_header(f):
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise BytecodeError("Not a Kethaka bytecode file (missing header)")
+    magic, version, flags, python_magic, mtime, size, digest = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise BytecodeError("Not a Kethaka bytecode file (missing header)")
+    if version != FORMAT_VERSION:
+        raise BytecodeError(f"Unsupported bytecode format version {version}")
+    if python_magic != importlib.util.MAGIC_NUMBER:
+        raise BytecodeError("Bytecode was compiled by a different Python version")
+    return {
+        'flags': flags,
+        'mtime': mtime,
+        'size': size,
+        'hash': digest,
+    }
+
+
+def write_bytecode(code, output_file, source_stat, source_digest, flags=0):
+    with open(output_file, 'wb') as f:
+        f.write(pack_header(source_stat, source_digest, flags))
+        marshal.dump(code, f)
+
+
+def load_bytecode(bytecode_file):
+    with open(bytecode_file, 'rb') as f:
+        header = read_header(f)
+        return header, marshal.load(f)
+
+
+def read_flags(bytecode_file):
+    try:
+        with open(bytecode_file, 'rb') as f:
+            return read_header(f)['flags']
+    except (OSError, BytecodeError):
+        return 0
+
+
+def check_cache(source_file, bytecode_file, flags=0):
+    """Compare a .kbc against its source.
+
+    Returns 'fresh' when the recorded mtime and size match, 'same-hash' when
+    they don't but the source contents are unchanged (a fresh checkout, for
+    instance) and 'stale' otherwise, including when the .kbc is missing,
+    unreadable or was built with other flags or another Python. A flags
+    value of None accepts bytecode built with any flags.
+    """
+    try:
+        with open(bytecode_file, 'rb') as f:
+            header = read_header(f)
+        source_stat = os.stat(source_file)
+    except (OSError, BytecodeError):
+        return 'stale'
+
+    if flags is not None and header['flags'] != flags:
+        return 'stale'
+    if header['size'] != source_stat.st_size:
+        return 'stale'
+    if header['mtime'] == source_stat.st_mtime_ns:
+        return 'fresh'
+    if file_hash(source_file) == header['hash']:
+        return 'same-hash'
+    return 'stale'
+
+
+def touch_header(source_file, bytecode_file):
+    """Record the current mtime of an unchanged source in its .kbc header."""
+    # The stat and the hash come from one open file, so they describe the
+    # same contents even if the source is replaced meanwhile
+    with open(source_file, 'rb') as f:
+        source_stat = os.fstat(f.fileno())
+        source_digest = stream_hash(f)
+    with open(bytecode_file, 'r+b') as f:
+        header = read_header(f)
+        f.seek(0)
+        f.write(pack_header(source_stat, source_digest, header['flags']))
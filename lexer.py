@@ -1,4 +1,5 @@
 import re
+from array import array
 
 TOKEN_SPEC = [
     ('NUMBER', r'\d+'),          # Numbers
@@ -8,8 +9,11 @@ TOKEN_SPEC = [
     ('IF', r'නම්'),             # If condition
     ('ELSE', r'නැතහොත්'),      # Else condition
     ('FOR', r'දක්වා'),          # For loop
+    ('PARALLEL', r'සමාන්තර'),    # Parallel loop
     ('FUNCTION', r'ක්‍රියාව'),    # Function declaration
     ('RETURN', r'ආපසු'),        # Return statement
+    ('IMPORT', r'ආනයනය'),       # Module import
+    ('ARRAY', r'අරාව'),          # Array of a range of numbers
     ('IDENTIFIER', r'[a-zA-Z0-9_\u0D80-\u0DFF\u200d]+'),  # Support Sinhala identifiers with ZWJ and underscores
     ('OP', r'[+\-*/]'),         # Arithmetic operators
     ('COMPARE', r'[<>]=?|==|!='),  # Comparison operators
@@ -18,32 +22,162 @@ TOKEN_SPEC = [
     ('RPAREN', r'\)'),          # Right parenthesis
     ('LBRACE', r'\{'),          # Left brace
     ('RBRACE', r'\}'),          # Right brace
+    ('LBRACKET', r'\['),        # Left bracket
+    ('RBRACKET', r'\]'),        # Right bracket
     ('COMMA', r','),            # Comma for function parameters
+    ('DOT', r'\.'),             # Names inside an imported module
     ('SEMI', r';'),             # Semicolon
     ('SKIP', r'[ \t\r]+|#[^\n]*'),  # Skip whitespace and comments
     ('NEWLINE', r'\n'),         # Newline
 ]
 
+# All of TOKEN_SPEC folded into one alternation, compiled once at import.
+# Alternatives are tried left to right, so the first pattern in TOKEN_SPEC
+# that matches still wins, exactly like trying the patterns one by one.
+# MISMATCH catches any other character so errors can be reported.
+MASTER_PATTERN = re.compile('|'.join(
+    f'(?P<{token_name}>{pattern})'
+    for token_name, pattern in TOKEN_SPEC + [('MISMATCH', r'.')]
+), re.DOTALL)
+
 def lexer(code):
     tokens = []
+    append = tokens.append
+    line_num = 1
+    line_start = 0  # Offset up to which newlines have been counted
+
+    for match in MASTER_PATTERN.finditer(code):
+        token_name = match.lastgroup
+        if token_name == 'SKIP' or token_name == 'NEWLINE':
+            continue
+        start = match.start()
+        line_num += code.count('\n', line_start, start)
+        line_start = start
+        if token_name == 'MISMATCH':
+            raise SyntaxError(f"Invalid character '{match.group()}' at line {line_num}")
+        append((token_name, match.group(), line_num))
+
+    return tokens
+
+
+TOKEN_NAMES = [token_name for token_name, _ in TOKEN_SPEC]
+TOKEN_KINDS = {token_name: kind for kind, token_name in enumerate(TOKEN_NAMES)}
+_SKIP_KINDS = (TOKEN_KINDS['SKIP'], TOKEN_KINDS['NEWLINE'])
+_MISMATCH_KIND = len(TOKEN_SPEC)
+
+class TokenBuffer:
+    """Tokens packed into parallel arrays that point into the source string.
+
+    Each token costs one byte of kind and three 4-byte integers (start and
+    end offsets and the line number) instead of a tuple and a copied
+    substring. Indexing returns the usual (token_name, value, line_num)
+    tuple, slicing the value out of the source on demand.
+    """
+    __slots__ = ('source', 'kinds', 'starts', 'ends', 'lines')
+
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        return (TOKEN_NAMES[self.kinds[index]],
+                self.source[self.starts[index]:self.ends[index]],
+                self.lines[index])
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def kind(self, index):
+        return TOKEN_NAMES[self.kinds[index]]
+
+    def value(self, index):
+        return self.source[self.starts[index]:self.ends[index]]
+
+def compact_lexer(code):
+    """Tokenize code into a TokenBuffer instead of a list of tuples."""
+    tokens = TokenBuffer(code)
+    kinds, starts, ends, lines = tokens.kinds, tokens.starts, tokens.ends, tokens.lines
+    skip, newline = _SKIP_KINDS
     line_num = 1
+    line_start = 0
+
+    for match in MASTER_PATTERN.finditer(code):
+        # Patterns have no groups of their own, so lastindex is the kind + 1
+        kind = match.lastindex - 1
+        if kind == skip or kind == newline:
+            continue
+        start, end = match.span()
+        line_num += code.count('\n', line_start, start)
+        line_start = start
+        if kind == _MISMATCH_KIND:
+            raise SyntaxError(f"Invalid character '{match.group()}' at line {line_num}")
+        kinds.append(kind)
+        starts.append(start)
+        ends.append(end)
+        lines.append(line_num)
+
+    return tokens
+
+
+# Chunk size, in characters, that stream_lexer reads at a time
+STREAM_CHUNK_SIZE = 1 << 16
+
+# A token is only accepted once this many characters follow it in the
+# buffer, so a keyword, operator or identifier cut by a chunk boundary is
+# never mistaken for a shorter token. Longer than any fixed token.
+_LOOKAHEAD = 64
+
+def stream_lexer(source, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield tokens from a text file object, reading it in chunks.
+
+    source must be opened in text mode, so the decoder never splits a
+    UTF-8 sequence; tokens that straddle chunks, including string literals
+    and keywords containing ZWJ, are completed from the next chunk. Only
+    the current chunk and the unfinished token are held in memory.
+    """
+    buffer = source.read(chunk_size)
+    eof = not buffer
     pos = 0
-    
-    while pos < len(code):
-        match = None
-        for token_name, pattern in TOKEN_SPEC:
-            regex = re.compile(pattern)
-            match = regex.match(code, pos)
-            if match:
-                value = match.group(0)
-                if token_name not in ['SKIP', 'NEWLINE']:
-                    tokens.append((token_name, value, line_num))
-                if token_name == 'NEWLINE':
-                    line_num += 1
-                pos = match.end()
-                break
-        
-        if not match:
-            raise SyntaxError(f"Invalid character '{code[pos]}' at line {line_num}")
-            
-    return tokens
\ No newline at end of file
+    line_num = 1
+    newline, string = TOKEN_KINDS['NEWLINE'], TOKEN_KINDS['STRING']
+    skip = TOKEN_KINDS['SKIP']
+
+    while True:
+        match = MASTER_PATTERN.match(buffer, pos)
+        if not eof and (match is None or match.lastindex - 1 == _MISMATCH_KIND
+                        or match.end() + _LOOKAHEAD > len(buffer)):
+            # The token may continue in the next chunk (an unterminated
+            # string shows up as a mismatch on its opening quote)
+            chunk = source.read(chunk_size)
+            if chunk:
+                buffer = buffer[pos:] + chunk
+                pos = 0
+            else:
+                eof = True
+            continue
+        if match is None:
+            return
+
+        kind = match.lastindex - 1
+        pos = match.end()
+        if kind == newline:
+            line_num += 1
+        elif kind == skip:
+            pass
+        elif kind == _MISMATCH_KIND:
+            raise SyntaxError(f"Invalid character '{match.group()}' at line {line_num}")
+        else:
+            value = match.group()
+            yield (TOKEN_NAMES[kind], value, line_num)
+            if kind == string:
+                line_num += value.count('\n')
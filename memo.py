@@ -0,0 +1,154 @@
+"""Bounded result caches for the functions -O2 found to be pure.
+
+optimizer.memoize_pure_functions marks pure recursive functions, and
+the compiler wraps each one in memoize() when it is defined. Cache size
+and eviction policy are read at that moment, from configure() or the
+KETHAKA_MEMO_SIZE and KETHAKA_MEMO_POLICY environment variables:
+
+    lru   drop the entry used least recently (functools.lru_cache)
+    fifo  drop the oldest entry, however often it is used
+
+Arguments of different types are cached apart, so f(2) and f(2.0) can't
+return each other's results. stats() reports hits, misses and evictions
+of every memoized function still alive.
+"""
+import functools
+import os
+import warnings
+import weakref
+
+POLICIES = ('lru', 'fifo')
+DEFAULT_SIZE = 4096
+
+_settings = {'size': DEFAULT_SIZE, 'policy': 'lru'}
+_functions = weakref.WeakSet()
+
+
+def configure(size=None, policy=None):
+    """Set the cache size and policy of functions memoized from now on."""
+    if size is not None:
+        if size < 1:
+            raise ValueError("memo cache size must be at least 1")
+        _settings['size'] = size
+    if policy is not None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown memo policy {policy!r}, "
+                             f"expected one of {', '.join(POLICIES)}")
+        _settings['policy'] = policy
+
+
+def _configure_from_environment():
+    # Every program with a memoized function imports this module, so a
+    # bad setting is warned about and ignored rather than raised
+    size = os.environ.get('KETHAKA_MEMO_SIZE')
+    if size is not None:
+        try:
+            configure(size=int(size))
+        except ValueError:
+            warnings.warn(f"Ignoring KETHAKA_MEMO_SIZE={size!r}: expected a whole number "
+                          f"of at least 1; using {DEFAULT_SIZE}", RuntimeWarning)
+    policy = os.environ.get('KETHAKA_MEMO_POLICY')
+    if policy is not None:
+        try:
+            configure(policy=policy)
+        except ValueError as e:
+            warnings.warn(f"Ignoring KETHAKA_MEMO_POLICY: {e}; using lru", RuntimeWarning)
+
+
+_configure_from_environment()
+
+
+class FifoCache:
+    """A memoized function that evicts its oldest entry first."""
+
+    def __init__(self, function, maxsize):
+        self.__wrapped__ = function
+        self.__name__ = function.__name__
+        self.__qualname__ = function.__qualname__
+        self.maxsize = maxsize
+        self.results = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def __call__(self, *args):
+        key = args + tuple(map(type, args))
+        try:
+            result = self.results[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = self.__wrapped__(*args)
+        results = self.results
+        if len(results) >= self.maxsize and key not in results:
+            # Dicts keep insertion order, so the first key is the oldest
+            del results[next(iter(results))]
+            self.evictions += 1
+        results[key] = result
+        return result
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.results), 'maxsize': self.maxsize}
+
+    def cache_clear(self):
+        self.results.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+class LruCache:
+    """A memoized function backed by functools.lru_cache, which is written in C."""
+
+    def __init__(self, function, maxsize):
+        self.call = functools.lru_cache(maxsize=maxsize, typed=True)(function)
+        # Calls go straight to the C wrapper; this object only keeps stats
+        self.call.memo = self
+
+    def cache_info(self):
+        info = self.call.cache_info()
+        # Entries only leave an lru_cache when they are evicted or cleared
+        return {'hits': info.hits, 'misses': info.misses,
+                'evictions': info.misses - info.currsize,
+                'size': info.currsize, 'maxsize': info.maxsize}
+
+    def cache_clear(self):
+        self.call.cache_clear()
+
+
+def memoize(function):
+    """Wrap a pure function in a cache sized and evicting as configured."""
+    if _settings['policy'] == 'fifo':
+        wrapper = memo = FifoCache(function, _settings['size'])
+    else:
+        memo = LruCache(function, _settings['size'])
+        wrapper = memo.call
+    memo.name = function.__name__
+    memo.policy = _settings['policy']
+    _functions.add(memo)
+    return wrapper
+
+
+def cache_info(function):
+    """Cache statistics of one function returned by memoize()."""
+    return getattr(function, 'memo', function).cache_info()
+
+
+def stats():
+    """Cache statistics of every memoized function, by function name."""
+    result = []
+    for memo in sorted(_functions, key=lambda memo: memo.name):
+        info = memo.cache_info()
+        info.update(function=memo.name, policy=memo.policy)
+        result.append(info)
+    return result
+
+
+def format_stats():
+    lines = [f"{'function':<20} {'policy':<6} {'hits':>10} {'misses':>10} "
+             f"{'evictions':>10} {'size':>8}"]
+    for info in stats():
+        lines.append(f"{info['function']:<20} {info['policy']:<6} {info['hits']:>10} "
+                     f"{info['misses']:>10} {info['evictions']:>10} "
+                     f"{info['size']:>5}/{info['maxsize']}")
+    return '\n'.join(lines)
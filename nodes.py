@@ -0,0 +1,337 @@
+"""Kethaka AST node classes.
+
+Every node class uses __slots__, so a node costs a fixed-size object
+rather than a dict. Operators are interned Operator instances. Each
+class's type attribute keeps the name used by the older dict AST, and
+every node records the .snl line it started on (None for nodes the
+optimizer synthesizes).
+"""
+class Operator:
+    """A binary operator.
+
+    There is exactly one instance per operator, so operators compare with
+    `is` and hash by identity; a plain Enum would hash through Python code.
+    """
+    __slots__ = ('name', 'symbol', 'is_comparison')
+
+    def __init__(self, name, symbol, is_comparison=False):
+        self.name = name
+        self.symbol = symbol
+        self.is_comparison = is_comparison
+
+    def __repr__(self):
+        return f"Operator.{self.name}"
+
+    def __reduce__(self):
+        # Unpickle to the interned instance
+        return getattr, (Operator, self.name)
+
+
+Operator.ADD = Operator('ADD', '+')
+Operator.SUB = Operator('SUB', '-')
+Operator.MUL = Operator('MUL', '*')
+Operator.DIV = Operator('DIV', '/')
+Operator.LT = Operator('LT', '<', is_comparison=True)
+Operator.GT = Operator('GT', '>', is_comparison=True)
+Operator.LE = Operator('LE', '<=', is_comparison=True)
+Operator.GE = Operator('GE', '>=', is_comparison=True)
+Operator.EQ = Operator('EQ', '==', is_comparison=True)
+Operator.NE = Operator('NE', '!=', is_comparison=True)
+Operator.ALL = (Operator.ADD, Operator.SUB, Operator.MUL, Operator.DIV, Operator.LT,
+                Operator.GT, Operator.LE, Operator.GE, Operator.EQ, Operator.NE)
+
+
+class Node:
+    __slots__ = ('line',)
+    _fields = ()
+    # Fields holding statement lists and fields holding child expressions
+    # (or lists of them), for passes that walk the tree without knowing
+    # every node class
+    _blocks = ()
+    _expressions = ()
+    type = None
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def replace(self, **changes):
+        """Return a copy of the node with some fields changed."""
+        values = {name: getattr(self, name) for name in self._fields}
+        values['line'] = self.line
+        values.update(changes)
+        return type(self)(**values)
+
+    def to_dict(self):
+        """Convert to the dict representation the parser used to build."""
+        result = {'type': self.type}
+        for name in self._fields:
+            result[name] = _to_dict(getattr(self, name))
+        if self.line is not None:
+            result['line'] = self.line
+        return result
+
+
+def _to_dict(value):
+    if isinstance(value, Node):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_dict(item) for item in value]
+    if isinstance(value, Operator):
+        return value.symbol
+    return value
+
+
+# Statements
+
+class VarDeclaration(Node):
+    __slots__ = _fields = ('name', 'value')
+    _expressions = ('value',)
+    type = 'var_declaration'
+
+    def __init__(self, name, value, line=None):
+        self.name = name
+        self.value = value
+        self.line = line
+
+
+class FunctionDefinition(Node):
+    __slots__ = _fields = ('name', 'params', 'body')
+    _blocks = ('body',)
+    type = 'function_definition'
+
+    def __init__(self, name, params, body, line=None):
+        self.name = name
+        self.params = params
+        self.body = body
+        self.line = line
+
+
+class MemoizedFunction(FunctionDefinition):
+    # A function the optimizer found to be pure; its results are cached
+    __slots__ = ()
+
+
+class IfStatement(Node):
+    __slots__ = _fields = ('condition', 'body', 'else_body')
+    _blocks = ('body', 'else_body')
+    _expressions = ('condition',)
+    type = 'if_statement'
+
+    def __init__(self, condition, body, else_body=None, line=None):
+        self.condition = condition
+        self.body = body
+        self.else_body = else_body
+        self.line = line
+
+
+class ForLoop(Node):
+    # දක්වා (name = start, end) { body }: name counts from start up to,
+    # but not including, end
+    __slots__ = _fields = ('name', 'start', 'end', 'body')
+    _blocks = ('body',)
+    _expressions = ('start', 'end')
+    type = 'for_loop'
+
+    def __init__(self, name, start, end, body, line=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.body = body
+        self.line = line
+
+
+class ParallelLoop(Node):
+    # සමාන්තර (name = start, end) { body }, run on worker processes. With
+    # a target (සඳහන් target = සමාන්තර ...), target receives the sum of
+    # the values the iterations ආපසු.
+    __slots__ = _fields = ('name', 'start', 'end', 'body', 'target')
+    _blocks = ('body',)
+    _expressions = ('start', 'end')
+    type = 'parallel_loop'
+
+    def __init__(self, name, start, end, body, target=None, line=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.body = body
+        self.target = target
+        self.line = line
+
+
+class TailLoop(Node):
+    # The body of a function whose self tail calls the optimizer turned
+    # into TailCalls. It runs until a ආපසු returns from the function.
+    __slots__ = _fields = ('body',)
+    _blocks = ('body',)
+    type = 'tail_loop'
+
+    def __init__(self, body, line=None):
+        self.body = body
+        self.line = line
+
+
+class TailCall(Node):
+    # ආපසු f(args) inside f's TailLoop: rebinds f's params to args and
+    # starts the loop over
+    __slots__ = _fields = ('params', 'args')
+    _expressions = ('args',)
+    type = 'tail_call'
+
+    def __init__(self, params, args, line=None):
+        self.params = params
+        self.args = args
+        self.line = line
+
+
+class ImportStatement(Node):
+    __slots__ = _fields = ('name',)
+    type = 'import_statement'
+
+    def __init__(self, name, line=None):
+        self.name = name
+        self.line = line
+
+
+class PrintStatement(Node):
+    __slots__ = _fields = ('value',)
+    type = 'print_statement'
+
+    def __init__(self, value, line=None):
+        self.value = value
+        self.line = line
+
+
+class ReturnStatement(Node):
+    __slots__ = _fields = ('value',)
+    _expressions = ('value',)
+    type = 'return_statement'
+
+    def __init__(self, value, line=None):
+        self.value = value
+        self.line = line
+
+
+# Expressions
+
+class FunctionCall(Node):
+    # Also used as a statement when the call's result is discarded. name,
+    # like Variable.name, may be dotted to reach into an imported module.
+    # args is a list of expressions.
+    __slots__ = _fields = ('name', 'args')
+    _expressions = ('args',)
+    type = 'function_call'
+
+    def __init__(self, name, args, line=None):
+        self.name = name
+        self.args = args
+        self.line = line
+
+
+class BinaryOperation(Node):
+    __slots__ = _fields = ('left', 'operator', 'right')
+    _expressions = ('left', 'right')
+    type = 'binary_operation'
+
+    def __init__(self, left, operator, right, line=None):
+        self.left = left
+        self.operator = operator
+        self.right = right
+        self.line = line
+
+
+class Number(Node):
+    __slots__ = _fields = ('value',)
+    type = 'number'
+
+    def __init__(self, value, line=None):
+        self.value = value
+        self.line = line
+
+
+class StringLiteral(Node):
+    __slots__ = _fields = ('value',)
+    type = 'string_literal'
+
+    def __init__(self, value, line=None):
+        self.value = value
+        self.line = line
+
+
+class Variable(Node):
+    __slots__ = _fields = ('name',)
+    type = 'variable'
+
+    def __init__(self, name, line=None):
+        self.name = name
+        self.line = line
+
+
+class ArrayLiteral(Node):
+    # [e1, e2, ...], a karray.KArray of the elements' values
+    __slots__ = _fields = ('elements',)
+    _expressions = ('elements',)
+    type = 'array_literal'
+
+    def __init__(self, elements, line=None):
+        self.elements = elements
+        self.line = line
+
+
+class ArrayRange(Node):
+    # අරාව(start, end): the array of the numbers a දක්වා loop from start
+    # to end counts through
+    __slots__ = _fields = ('start', 'end')
+    _expressions = ('start', 'end')
+    type = 'array_range'
+
+    def __init__(self, start, end, line=None):
+        self.start = start
+        self.end = end
+        self.line = line
+
+
+class ArrayIndex(Node):
+    # array[index]
+    __slots__ = _fields = ('array', 'index')
+    _expressions = ('array', 'index')
+    type = 'array_index'
+
+    def __init__(self, array, index, line=None):
+        self.array = array
+        self.index = index
+        self.line = line
+
+
+class _DispatchTable(dict):
+    # Filled lazily: the first node of each class looks up its visit method
+    def __init__(self, visitor_class):
+        super().__init__()
+        self.visitor_class = visitor_class
+
+    def __missing__(self, node_class):
+        method = getattr(self.visitor_class, 'visit_' + node_class.__name__,
+                         self.visitor_class.generic_visit)
+        self[node_class] = method
+        return method
+
+
+class NodeVisitor:
+    """Dispatch visit() to visit_<ClassName> through a per-class table.
+
+    The table maps node classes straight to functions, so dispatch is one
+    dict lookup instead of a getattr with a formatted name per node.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._table = _DispatchTable(cls)
+
+    def visit(self, node):
+        return self._table[node.__class__](self, node)
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unknown node type: {type(node).__name__}")
+
+
+NodeVisitor._table = _DispatchTable(NodeVisitor)
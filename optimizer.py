@@ -0,0 +1,590 @@
+"""Optimization passes over the Kethaka AST.
+
+The passes run between parse() and ast_to_python_ast(). Each one takes the
+list of top-level statements and returns a new list; input nodes are never
+modified in place. Passes are registered with a minimum -O level and run in
+registration order, so a pass sees the output of the ones before it.
+"""
+import itertools
+import operator
+
+from nodes import (BinaryOperation, ForLoop, FunctionCall, FunctionDefinition, IfStatement,
+                   ImportStatement, MemoizedFunction, Number, Operator, ParallelLoop,
+                   PrintStatement, ReturnStatement, StringLiteral, TailCall, TailLoop, Variable,
+                   VarDeclaration)
+
+PASSES = []
+
+# Folding stops at results larger than this, so that compile time and .kbc
+# size can't blow up on something like "x" * 100000000.
+MAX_FOLDED_SIZE = 4096
+
+# Functions whose return expression has at most this many nodes are inlined.
+INLINE_MAX_NODES = 16
+
+OPERATORS = {
+    Operator.ADD: operator.add,
+    Operator.SUB: operator.sub,
+    Operator.MUL: operator.mul,
+    Operator.DIV: operator.truediv,
+    Operator.LT: operator.lt,
+    Operator.GT: operator.gt,
+    Operator.LE: operator.le,
+    Operator.GE: operator.ge,
+    Operator.EQ: operator.eq,
+    Operator.NE: operator.ne,
+}
+
+
+def optimization_pass(level):
+    def register(function):
+        PASSES.append((level, function))
+        return function
+    return register
+
+
+def run_passes(program, level=1):
+    for pass_level, function in PASSES:
+        if pass_level <= level:
+            program = function(program)
+    return program
+
+
+# Generic traversal
+
+def is_literal(node):
+    return isinstance(node, (Number, StringLiteral))
+
+
+def literal(value, line=None):
+    if isinstance(value, str):
+        return StringLiteral(value, line)
+    return Number(value, line)
+
+
+def map_expression(node, function):
+    """Rebuild an expression bottom-up, passing every node through function.
+
+    node may also be a list of expressions, like FunctionCall.args.
+    """
+    if isinstance(node, list):
+        return [map_expression(item, function) for item in node]
+    if node._expressions:
+        node = node.replace(**{name: map_expression(getattr(node, name), function)
+                               for name in node._expressions})
+    return function(node)
+
+
+def map_statements(statements, expression_function=None, statement_function=None):
+    """Rebuild a statement list.
+
+    expression_function is applied through map_expression to every
+    expression. statement_function receives each rebuilt statement and
+    returns the list of statements that replace it.
+    """
+    result = []
+    for statement in statements:
+        changes = {}
+        for name in statement._blocks:
+            block = getattr(statement, name)
+            if block is not None:
+                changes[name] = map_statements(block, expression_function, statement_function)
+        if expression_function:
+            for name in statement._expressions:
+                changes[name] = map_expression(getattr(statement, name), expression_function)
+        if changes:
+            statement = statement.replace(**changes)
+
+        if statement_function:
+            result.extend(statement_function(statement))
+        else:
+            result.append(statement)
+    return result
+
+
+def walk(statements):
+    """Yield every statement, including those nested in functions and ifs."""
+    for statement in statements:
+        yield statement
+        for name in statement._blocks:
+            block = getattr(statement, name)
+            if block:
+                yield from walk(block)
+
+
+def walk_expression(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from walk_expression(item)
+        return
+    yield node
+    for name in node._expressions:
+        yield from walk_expression(getattr(node, name))
+
+
+def binding_counts(program):
+    """Count how often each name is bound anywhere in the program."""
+    counts = {}
+    for statement in walk(program):
+        if isinstance(statement, (VarDeclaration, FunctionDefinition, ImportStatement, ForLoop)):
+            counts[statement.name] = counts.get(statement.name, 0) + 1
+        if isinstance(statement, FunctionDefinition):
+            for param in statement.params:
+                counts[param] = counts.get(param, 0) + 1
+        if isinstance(statement, ParallelLoop):
+            for name in (statement.name, statement.target):
+                if name is not None:
+                    counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+# Passes
+
+@optimization_pass(2)
+def propagate_constants(program):
+    """Replace reads of constant top-level variables with their values.
+
+    A variable qualifies when its only binding in the whole program is one
+    top-level සඳහන් declaration whose value folds to a literal. Only statements after the declaration are
+    rewritten, since anything before it would not see the variable yet.
+    """
+    counts = binding_counts(program)
+    constants = {}
+    result = []
+
+    def substitute(node):
+        if isinstance(node, Variable) and node.name in constants:
+            return constants[node.name].replace(line=node.line)
+        return node
+
+    for statement in program:
+        if constants:
+            statement = map_statements([statement], substitute)[0]
+        if isinstance(statement, VarDeclaration) and counts[statement.name] == 1:
+            # A value computed from literals is as good as a literal
+            value = map_expression(statement.value, _fold)
+            if is_literal(value):
+                constants[statement.name] = value
+        result.append(statement)
+    return result
+
+
+@optimization_pass(2)
+def inline_functions(program):
+    """Inline calls to tiny functions whose body is a single ආපසු.
+
+    The callee must be a top-level function bound exactly once, must not
+    call itself, and its return expression must not mention a name that
+    the caller binds locally. Only code after the definition is rewritten.
+    """
+    counts = binding_counts(program)
+    result = []
+    inlinable = {}
+    for statement in program:
+        if inlinable:
+            statement = _inline_into(statement, inlinable)
+        if isinstance(statement, FunctionDefinition) and _is_inlinable(statement, counts):
+            inlinable[statement.name] = statement
+        result.append(statement)
+    return result
+
+
+def _is_inlinable(function, counts):
+    if counts[function.name] != 1 or len(function.body) != 1:
+        return False
+    statement = function.body[0]
+    if not isinstance(statement, ReturnStatement):
+        return False
+    nodes = list(walk_expression(statement.value))
+    if len(nodes) > INLINE_MAX_NODES:
+        return False
+    for node in nodes:
+        if isinstance(node, FunctionCall) and node.name == function.name:
+            return False
+        # Renaming parameters only handles plain names
+        if isinstance(node, (FunctionCall, Variable)) and '.' in node.name:
+            return False
+    return True
+
+
+def _free_names(function):
+    names = set()
+    for node in walk_expression(function.body[0].value):
+        if isinstance(node, Variable):
+            names.add(node.name)
+        elif isinstance(node, FunctionCall):
+            names.add(node.name)
+    return names - set(function.params)
+
+
+def _inline_into(statement, inlinable, local_names=frozenset()):
+    """Inline calls in statement, where local_names are the names that
+    don't mean the module globals of the same name."""
+    if isinstance(statement, FunctionDefinition):
+        # Everything bound inside the function, nested functions included
+        local_names = local_names | (set(binding_counts([statement])) - {statement.name})
+    if isinstance(statement, ParallelLoop):
+        # The body runs as a function of the loop variable, whose locals
+        # are the names it binds. The bounds are evaluated outside it.
+        body_names = local_names | {statement.name} | set(binding_counts(statement.body))
+        statement = _inline_expressions(statement, inlinable, local_names)
+        return statement.replace(body=[_inline_into(inner, inlinable, body_names)
+                                       for inner in statement.body])
+    statement = _inline_expressions(statement, inlinable, local_names)
+    changes = {}
+    for name in statement._blocks:
+        block = getattr(statement, name)
+        if block is not None:
+            changes[name] = [_inline_into(inner, inlinable, local_names) for inner in block]
+    return statement.replace(**changes) if changes else statement
+
+
+def _inline_expressions(statement, inlinable, local_names):
+    """statement with the calls in its own expressions inlined."""
+    if not statement._expressions:
+        return statement
+
+    def substitute(node):
+        if not isinstance(node, FunctionCall) or node.name not in inlinable:
+            return node
+        function = inlinable[node.name]
+        if len(node.args) != len(function.params) or _free_names(function) & local_names:
+            return node
+        # A parameter may be used any number of times, so only arguments
+        # that are safe to evaluate more than once are substituted
+        if not all(isinstance(arg, Variable) or is_literal(arg) for arg in node.args):
+            return node
+        arguments = dict(zip(function.params, node.args))
+
+        def rename(inner):
+            # Inlined code is attributed to the line of the call it replaces
+            if isinstance(inner, Variable) and inner.name in arguments:
+                return arguments[inner.name].replace(line=node.line)
+            return inner.replace(line=node.line)
+        return map_expression(function.body[0].value, rename)
+
+    return statement.replace(**{name: map_expression(getattr(statement, name), substitute)
+                                for name in statement._expressions})
+
+
+@optimization_pass(1)
+def fold_constants(program):
+    """Evaluate arithmetic and comparisons whose operands are literals.
+
+    Operations that would raise at run time, such as division by zero or
+    adding a string to a number, are left alone so the error still happens
+    when the program runs.
+    """
+    return map_statements(program, _fold)
+
+
+def _fold(node):
+    if not isinstance(node, BinaryOperation):
+        return node
+    if not (is_literal(node.left) and is_literal(node.right)):
+        return node
+    a, b = node.left.value, node.right.value
+    if node.operator is Operator.MUL and (isinstance(a, str) or isinstance(b, str)):
+        text, count = (a, b) if isinstance(a, str) else (b, a)
+        if isinstance(count, int) and len(text) * count > MAX_FOLDED_SIZE:
+            return node
+    try:
+        value = OPERATORS[node.operator](a, b)
+    except Exception:
+        return node
+    if isinstance(value, str) and len(value) > MAX_FOLDED_SIZE:
+        return node
+    if isinstance(value, int) and value.bit_length() > MAX_FOLDED_SIZE:
+        return node
+    return literal(value, node.line)
+
+
+@optimization_pass(1)
+def eliminate_dead_branches(program):
+    """Replace ifs with a literal condition by the branch that always runs."""
+    def prune(statement):
+        if isinstance(statement, IfStatement) and is_literal(statement.condition):
+            if statement.condition.value:
+                return statement.body
+            return statement.else_body or []
+        return [statement]
+    return map_statements(program, statement_function=prune)
+
+
+# Prefix of the variables hoist_loop_invariants introduces. Kethaka names
+# can use it too, but nothing else in a program is likely to.
+INVARIANT_PREFIX = '_kethaka_invariant'
+
+
+@optimization_pass(1)
+def hoist_loop_invariants(program):
+    """Compute expressions that can't change inside a දක්වා loop once, before it.
+
+    An expression is invariant when it makes no calls and reads at least
+    one variable, but neither the loop variable nor any name the loop body
+    binds. Only statements every iteration reaches are looked at: those up
+    to and including the first one that can ආපසු. A hoisted expression can
+    still raise, such as a division by zero, so what it is moved ahead of
+    must neither raise nor have an effect anyone could see: hoisting
+    stops at the first statement that prints, calls, imports or runs a
+    nested loop, and at the first operation, in the order the body
+    evaluates them, that could raise and is not hoisted itself. The
+    hoisted expressions are then guarded by the loop's own condition, so
+    they are evaluated only if the body would have been; that needs the
+    loop bounds to be free of calls, since they are evaluated twice.
+    """
+    names = itertools.count()
+
+    def hoist(statement):
+        if not isinstance(statement, ForLoop):
+            return [statement]
+        bounds = list(walk_expression([statement.start, statement.end]))
+        if any(isinstance(node, FunctionCall) for node in bounds):
+            return [statement]
+        varying = set(binding_counts(statement.body)) | {statement.name}
+        hoisted = {}
+        # Whether an operation that could raise comes before the node
+        blocked = False
+
+        def extract(node):
+            nonlocal blocked
+            if isinstance(node, list):
+                return [extract(item) for item in node]
+            if blocked:
+                return node
+            if isinstance(node, BinaryOperation) and _is_invariant(node, varying):
+                # repr leaves out lines, so equal expressions share a variable
+                key = repr(node)
+                if key not in hoisted:
+                    hoisted[key] = VarDeclaration(f'{INVARIANT_PREFIX}{next(names)}', node,
+                                                  node.line)
+                return Variable(hoisted[key].name, node.line)
+            if node._expressions:
+                # Operands in the order they are evaluated, then the node
+                node = node.replace(**{name: extract(getattr(node, name))
+                                       for name in node._expressions})
+            blocked = _can_raise(node)
+            return node
+
+        body = list(statement.body)
+        for index, inner in enumerate(body):
+            if _has_effect(inner):
+                break
+            if inner._expressions and not isinstance(inner, FunctionDefinition):
+                body[index] = inner.replace(**{name: extract(getattr(inner, name))
+                                               for name in inner._expressions})
+            if blocked or any(isinstance(node, ReturnStatement) for node in walk([inner])):
+                break
+            if any(_can_raise(node) for node in _expressions_in(body[index])):
+                # Such as a division in the body of a නම්
+                break
+        if not hoisted:
+            return [statement]
+
+        loop = statement.replace(body=body)
+        declarations = list(hoisted.values())
+        start, end = statement.start, statement.end
+        if isinstance(start, Number) and isinstance(end, Number):
+            # The loop runs at least once, or never
+            return declarations + [loop] if start.value < end.value else [statement]
+        condition = BinaryOperation(start, Operator.LT, end, statement.line)
+        return [IfStatement(condition, declarations + [loop], None, statement.line)]
+
+    return map_statements(program, statement_function=hoist)
+
+
+def _has_effect(statement):
+    """Whether running statement could print, call, import or loop."""
+    if isinstance(statement, FunctionDefinition):
+        # Only binds the function; its body runs when it is called
+        return False
+    for inner in walk([statement]):
+        if isinstance(inner, (PrintStatement, ImportStatement, FunctionCall, ForLoop,
+                              ParallelLoop)):
+            return True
+        if any(isinstance(node, FunctionCall)
+               for node in walk_expression([getattr(inner, name) for name in inner._expressions])):
+            return True
+    return False
+
+
+def _can_raise(node):
+    """Whether evaluating node itself, its operands aside, could raise.
+
+    Reading a variable is taken not to: Kethaka has no way to unbind one.
+    """
+    return not isinstance(node, (Variable, Number, StringLiteral))
+
+
+def _expressions_in(statement):
+    """Every expression node in statement and the statements nested in it."""
+    if isinstance(statement, FunctionDefinition):
+        # Its body runs when it is called
+        return
+    yield from walk_expression([getattr(statement, name) for name in statement._expressions])
+    for name in statement._blocks:
+        for inner in getattr(statement, name) or ():
+            yield from _expressions_in(inner)
+
+
+def _is_invariant(node, varying):
+    has_variable = False
+    for inner in walk_expression(node):
+        if isinstance(inner, Variable):
+            if inner.name.split('.')[0] in varying:
+                return False
+            has_variable = True
+        elif not isinstance(inner, (BinaryOperation, Number, StringLiteral)):
+            return False
+    return has_variable
+
+
+@optimization_pass(2)
+def eliminate_tail_calls(program):
+    """Turn calls a function makes to itself in ආපසු position into a loop.
+
+    A ආපසු f(...) is in tail position when it is directly in f's body or
+    in the branches of නම් statements there, not inside a loop. The
+    function must be bound exactly once, so the call can't reach anything
+    else, and must define no nested functions, which could see the
+    parameters change under them. Calls with the wrong number of arguments
+    are left to fail as they would. f's body becomes a TailLoop, and each
+    of those ආපසු statements a TailCall, so the recursion runs in one
+    frame instead of one per call.
+    """
+    counts = binding_counts(program)
+
+    def eliminate(statement):
+        if not isinstance(statement, FunctionDefinition) or counts[statement.name] != 1:
+            return [statement]
+        if any(isinstance(inner, FunctionDefinition) for inner in walk(statement.body)):
+            return [statement]
+        body, found = _replace_tail_calls(statement.body, statement)
+        if not found:
+            return [statement]
+        return [statement.replace(body=[TailLoop(body, statement.line)])]
+
+    return map_statements(program, statement_function=eliminate)
+
+
+def _replace_tail_calls(statements, function):
+    """statements with function's self tail calls made TailCalls, and
+    whether there were any."""
+    result = []
+    found = False
+    for statement in statements:
+        if isinstance(statement, ReturnStatement):
+            call = statement.value
+            if (isinstance(call, FunctionCall) and call.name == function.name
+                    and len(call.args) == len(function.params)):
+                statement = TailCall(function.params, call.args, statement.line)
+                found = True
+        elif isinstance(statement, IfStatement):
+            body, in_body = _replace_tail_calls(statement.body, function)
+            else_body, in_else = _replace_tail_calls(statement.else_body or [], function)
+            if in_body or in_else:
+                statement = statement.replace(
+                    body=body, else_body=else_body if statement.else_body is not None else None)
+                found = True
+        result.append(statement)
+    return result, found
+
+
+def tail_call_functions(program):
+    """Names of the functions eliminate_tail_calls turned into loops."""
+    return [statement.name for statement in walk(program)
+            if isinstance(statement, FunctionDefinition)
+            and any(isinstance(inner, TailLoop) for inner in statement.body)]
+
+
+# Purity analysis
+
+def pure_functions(program):
+    """Map each top-level function whose result depends only on its
+    arguments to the set of functions it calls.
+
+    A function is pure when it prints nothing, imports nothing, defines no
+    nested functions, starts no සමාන්තර loop, reads no name but its parameters, its own locals and
+    top-level variables bound exactly once, and only calls pure functions.
+    Functions that are bound more than once, or call through a module or a
+    parameter, are never pure. Mutually recursive functions are pure unless
+    something in the cycle isn't.
+    """
+    counts = binding_counts(program)
+    constants = {statement.name for statement in program
+                 if isinstance(statement, VarDeclaration) and counts[statement.name] == 1}
+    callees = {}
+    for statement in program:
+        if isinstance(statement, FunctionDefinition) and counts[statement.name] == 1:
+            called = _pure_callees(statement, constants)
+            if called is not None:
+                callees[statement.name] = called
+
+    # Start from every candidate and drop those calling a non-candidate
+    # until nothing changes
+    pure = set(callees)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not callees[name] <= pure:
+                pure.discard(name)
+                changed = True
+    return {name: callees[name] for name in pure}
+
+
+def _pure_callees(function, constants):
+    """The names function calls, or None if it has side effects of its own."""
+    local_names = set(function.params)
+    for statement in walk(function.body):
+        if isinstance(statement, (PrintStatement, ImportStatement, FunctionDefinition,
+                                  ParallelLoop)):
+            return None
+        if isinstance(statement, (VarDeclaration, ForLoop)):
+            local_names.add(statement.name)
+    called = set()
+    for statement in walk(function.body):
+        if isinstance(statement, FunctionCall):
+            nodes = walk_expression(statement)
+        else:
+            nodes = walk_expression([getattr(statement, name) for name in statement._expressions])
+        for node in nodes:
+            if isinstance(node, Variable):
+                if node.name not in local_names and node.name not in constants:
+                    return None
+            elif isinstance(node, FunctionCall):
+                if '.' in node.name or node.name in local_names:
+                    return None
+                called.add(node.name)
+    return called
+
+
+@optimization_pass(2)
+def memoize_pure_functions(program):
+    """Cache the results of pure recursive functions.
+
+    Only functions that can call themselves, directly or through other
+    pure functions, are turned into MemoizedFunction nodes: a recursion
+    like Fibonacci keeps reaching the same arguments, while a function
+    called once per distinct argument would only pay for cache misses.
+    """
+    pure = pure_functions(program)
+    recursive = {name for name in pure if name in _reachable(name, pure)}
+    if not recursive:
+        return program
+    return [MemoizedFunction(statement.name, statement.params, statement.body, statement.line)
+            if isinstance(statement, FunctionDefinition) and statement.name in recursive
+            else statement
+            for statement in program]
+
+
+def _reachable(name, callees):
+    """Every function reached by following calls out of name."""
+    seen = set()
+    pending = list(callees[name])
+    while pending:
+        callee = pending.pop()
+        if callee not in seen:
+            seen.add(callee)
+            pending.extend(callees[callee])
+    return seen
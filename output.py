@@ -0,0 +1,70 @@
+"""Buffered standard output for මුද්‍රණය-heavy programs.
+
+install() replaces sys.stdout with a text stream over a 1 MiB buffer on
+the same file descriptor. Text is collected and UTF-8 encoded in chunks
+of ENCODE_CHUNK characters, and nothing is written until the buffer
+fills, so millions of short lines cost a few hundred write() calls
+instead of a flush per line on a terminal.
+
+`kethaka --buffered-output` installs the stream before a program runs.
+Code compiled with `kethakac --buffered-output` installs it itself and
+writes each line straight to the stream's write method, skipping print().
+Either way the stream is flushed when the program ends, whether it
+finished or raised, and again at interpreter exit.
+"""
+import atexit
+import io
+import sys
+
+BUFFER_SIZE = 1 << 20
+ENCODE_CHUNK = 1 << 16
+
+_stream = None
+_replaced = None
+
+
+def install():
+    """Route sys.stdout through the buffered stream and return it.
+
+    Installing again returns the stream already installed. When stdout
+    isn't backed by a file descriptor, as under an embedding program that
+    captures it, sys.stdout is left alone and returned.
+    """
+    global _stream, _replaced
+    if _stream is not None and sys.stdout is _stream:
+        return _stream
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return sys.stdout
+    sys.stdout.flush()
+    raw = io.FileIO(fd, 'w', closefd=False)
+    stream = io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=BUFFER_SIZE),
+                              encoding='utf-8', errors='strict', write_through=False)
+    stream._CHUNK_SIZE = ENCODE_CHUNK
+    if _stream is None:
+        atexit.register(flush)
+    _replaced, _stream = sys.stdout, stream
+    sys.stdout = stream
+    return stream
+
+
+def flush():
+    """Write out whatever the buffered stream holds, if one is installed."""
+    if _stream is not None and not _stream.closed:
+        try:
+            _stream.flush()
+        except BrokenPipeError:
+            # The reader went away; there is nobody left to write to
+            pass
+
+
+def uninstall():
+    """Flush the buffered stream and restore the sys.stdout it replaced."""
+    global _stream, _replaced
+    if _stream is None:
+        return
+    flush()
+    if sys.stdout is _stream:
+        sys.stdout = _replaced
+    _stream = _replaced = None
@@ -0,0 +1,198 @@
+"""Run the iterations of a සමාන්තර loop on a pool of worker processes.
+
+The compiler turns the body of
+
+    සඳහන් එකතුව = සමාන්තර (i = 0, 1000) { ආපසු වැඩ(i); }
+
+into a function of i, compiled on its own and embedded in the program as
+marshaled bytes, and the loop into a call to run(). run() splits the
+iterations into chunks and hands them to a ProcessPoolExecutor that is
+started on first use and kept for the rest of the program.
+
+Each chunk is sent a snapshot of the program's variables. ක්‍රියාව
+functions go by value, as their marshaled code objects. Memoized
+functions get a fresh cache in each worker. Imported modules are
+imported again by name. Other values go through pickle, and values
+pickle can't handle are left out. Whatever an iteration prints is
+captured in the worker and written out by the parent in iteration order,
+as are the values the iterations ආපසු. Variables assigned in the body
+belong to their iteration and are gone when it ends.
+
+A worker count of 1, a loop of at most one iteration, and a සමාන්තර loop
+running inside a worker all run the iterations one after another in the
+calling process instead.
+"""
+import functools
+import io
+import marshal
+import operator
+import os
+import pickle
+import sys
+import types
+
+# Chunks per worker: enough to even out iterations of different cost
+# without paying for a round trip per iteration
+CHUNKS_PER_WORKER = 4
+
+# Name of the module global buffered-output code prints through
+# (compiler.OUTPUT_WRITE)
+OUTPUT_WRITE = '_kethaka_write'
+# The function the main program runs in (compiler.MAIN_FUNCTION), which
+# iterations never call
+MAIN_FUNCTION = '_kethaka_main'
+
+_settings = {'workers': None}
+_executor = None
+_in_worker = False
+# Worker side: the last namespace snapshot and what it was restored to
+_restored = (None, None)
+
+
+def configure(workers=None):
+    """Set the worker count of the pool, which must not have started yet."""
+    if workers is not None:
+        if workers < 1:
+            raise ValueError("worker count must be at least 1")
+        if _executor is not None:
+            raise ValueError("the worker pool has already started")
+        _settings['workers'] = workers
+
+
+def worker_count():
+    workers = _settings['workers']
+    if workers is None:
+        workers = int(os.environ.get('KETHAKA_WORKERS', 0)) or os.cpu_count() or 1
+    return workers
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _executor = ProcessPoolExecutor(max_workers=worker_count(),
+                                        initializer=_start_worker)
+    return _executor
+
+
+def _start_worker():
+    global _in_worker
+    _in_worker = True
+
+
+def combine(results):
+    """Add up the values the iterations returned, in iteration order.
+
+    Iterations that returned nothing are skipped; a loop none of whose
+    iterations returned anything is worth 0.
+    """
+    values = [value for value in results if value is not None]
+    if not values:
+        return 0
+    return functools.reduce(operator.add, values)
+
+
+def run(iteration, start, end, namespace, local_namespace=None):
+    """Run iteration(i) for every whole number i from start up to end.
+
+    iteration is a marshaled code object; namespace and local_namespace
+    are the globals() and locals() of the code running the loop. Returns
+    combine() of the iteration results.
+    """
+    code = _with_filename(marshal.loads(iteration), sys._getframe(1).f_code.co_filename)
+    if local_namespace is not None and local_namespace is not namespace:
+        namespace = {**namespace, **local_namespace}
+    iterations = range(start, end)
+    workers = worker_count()
+    if workers == 1 or _in_worker or len(iterations) <= 1:
+        function = types.FunctionType(code, namespace)
+        return combine([function(i) for i in iterations])
+
+    code_bytes = marshal.dumps(code)
+    snapshot = pickle.dumps(_snapshot(namespace))
+    chunk_size = -(-len(iterations) // (workers * CHUNKS_PER_WORKER))
+    executor = _pool()
+    futures = [executor.submit(_run_chunk, code_bytes, snapshot,
+                               first, min(first + chunk_size, iterations.stop))
+               for first in range(iterations.start, iterations.stop, chunk_size)]
+    results = []
+    try:
+        for future in futures:
+            output, chunk_results, error = future.result()
+            if output:
+                sys.stdout.write(output)
+            if error is not None:
+                raise error
+            results.extend(chunk_results)
+    finally:
+        for future in futures:
+            future.cancel()
+    return combine(results)
+
+
+def _with_filename(code, filename):
+    # The body was compiled before the program's file name was known
+    return code.replace(
+        co_filename=filename,
+        co_consts=tuple(_with_filename(const, filename) if isinstance(const, types.CodeType)
+                        else const for const in code.co_consts))
+
+
+def _snapshot(namespace):
+    entries = {}
+    for name, value in namespace.items():
+        if name.startswith('__') or name in (OUTPUT_WRITE, MAIN_FUNCTION):
+            continue
+        wrapped = getattr(value, '__wrapped__', None)
+        if isinstance(value, types.FunctionType) and value.__closure__ is None:
+            entries[name] = ('function', marshal.dumps(value.__code__))
+        elif isinstance(wrapped, types.FunctionType) and wrapped.__closure__ is None:
+            entries[name] = ('memoized', marshal.dumps(wrapped.__code__))
+        elif isinstance(value, types.ModuleType):
+            entries[name] = ('module', value.__name__)
+        else:
+            try:
+                entries[name] = ('value', pickle.dumps(value))
+            except Exception:
+                # Nothing the iterations can use
+                pass
+    return entries
+
+
+def _restore(snapshot):
+    global _restored
+    if _restored[0] == snapshot:
+        return _restored[1]
+    namespace = {'__name__': 'kethaka_program'}
+    for name, (kind, data) in pickle.loads(snapshot).items():
+        if kind == 'function':
+            namespace[name] = types.FunctionType(marshal.loads(data), namespace, name)
+        elif kind == 'memoized':
+            from memo import memoize
+            namespace[name] = memoize(types.FunctionType(marshal.loads(data), namespace, name))
+        elif kind == 'module':
+            import importlib
+            namespace[name] = importlib.import_module(data)
+        else:
+            namespace[name] = pickle.loads(data)
+    _restored = (snapshot, namespace)
+    return namespace
+
+
+def _run_chunk(code_bytes, snapshot, first, stop):
+    """Worker side: run iterations first..stop-1 and capture what they print."""
+    namespace = _restore(snapshot)
+    function = types.FunctionType(marshal.loads(code_bytes), namespace)
+    output = io.StringIO()
+    namespace[OUTPUT_WRITE] = output.write
+    results = []
+    error = None
+    stdout, sys.stdout = sys.stdout, output
+    try:
+        for i in range(first, stop):
+            results.append(function(i))
+    except Exception as e:
+        error = e
+    finally:
+        sys.stdout = stdout
+    return output.getvalue(), results, error
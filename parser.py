@@ -1,352 +1,540 @@
+from collections import deque
+
 import lexer
+from nodes import (ArrayIndex, ArrayLiteral, ArrayRange, BinaryOperation, ForLoop, FunctionCall,
+                   FunctionDefinition, IfStatement, ImportStatement, Number, Operator,
+                   ParallelLoop, PrintStatement, ReturnStatement, StringLiteral, Variable,
+                   VarDeclaration)
+
+# Operator token text to the interned Operator member
+OPERATORS = {operator.symbol: operator for operator in Operator.ALL}
+
+
+class TokenStream:
+    """Cursor over a token list.
+
+    Tokens are consumed by moving an index forward instead of popping the
+    head of the list, so every operation is O(1).
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.end = len(tokens)
+
+    def __bool__(self):
+        return self.pos < self.end
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        if index < self.end:
+            return self.tokens[index]
+        return None
+
+    def peek_type(self, offset=0):
+        index = self.pos + offset
+        if index < self.end:
+            return self.tokens[index][0]
+        return None
+
+    def peek_value(self, offset=0):
+        index = self.pos + offset
+        if index < self.end:
+            return self.tokens[index][1]
+        return None
+
+    def advance(self):
+        if self.pos >= self.end:
+            raise SyntaxError("Unexpected end of input")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def match(self, token_type):
+        if self.peek_type() == token_type:
+            return self.advance()
+        return None
+
+    def expect(self, token_type, message=None):
+        token = self.peek()
+        if token is None or token[0] != token_type:
+            if message is None:
+                if token is None:
+                    message = f"Expected {token_type}, got end of input"
+                else:
+                    message = f"Expected {token_type}, got {token[0]} at line {token[2]}"
+            raise SyntaxError(message)
+        self.pos += 1
+        return token
+
+
+class CompactTokenStream(TokenStream):
+    """TokenStream over a lexer.TokenBuffer.
+
+    Token types are read straight from the buffer's kind array, so looking
+    ahead never slices a value out of the source; tuples are only built for
+    tokens the parser actually consumes.
+    """
+
+    def __init__(self, tokens):
+        super().__init__(tokens)
+        self.source = tokens.source
+        self.kinds = tokens.kinds
+        self.starts = tokens.starts
+        self.ends = tokens.ends
+        self.lines = tokens.lines
+        self.names = lexer.TOKEN_NAMES
+
+    def _token(self, index):
+        return (self.names[self.kinds[index]],
+                self.source[self.starts[index]:self.ends[index]],
+                self.lines[index])
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        if index < self.end:
+            return self._token(index)
+        return None
+
+    def peek_type(self, offset=0):
+        index = self.pos + offset
+        if index < self.end:
+            return self.names[self.kinds[index]]
+        return None
+
+    def peek_value(self, offset=0):
+        index = self.pos + offset
+        if index < self.end:
+            return self.source[self.starts[index]:self.ends[index]]
+        return None
+
+    def advance(self):
+        index = self.pos
+        if index >= self.end:
+            raise SyntaxError("Unexpected end of input")
+        self.pos = index + 1
+        return (self.names[self.kinds[index]],
+                self.source[self.starts[index]:self.ends[index]],
+                self.lines[index])
+
+    def expect(self, token_type, message=None):
+        if self.peek_type() != token_type:
+            return super().expect(token_type, message)
+        return self.advance()
+
+
+class LazyTokenStream(TokenStream):
+    """TokenStream that pulls tokens from an iterator as the parser needs them.
+
+    Only the few tokens of lookahead the parser asks for are buffered, so
+    it can consume lexer.stream_lexer without materialising a token list.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+        self.pos = 0
+
+    def _fill(self, count):
+        while len(self.lookahead) < count:
+            token = next(self.tokens, None)
+            if token is None:
+                return False
+            self.lookahead.append(token)
+        return True
+
+    def __bool__(self):
+        return self._fill(1)
+
+    def peek(self, offset=0):
+        if self._fill(offset + 1):
+            return self.lookahead[offset]
+        return None
+
+    def peek_type(self, offset=0):
+        if self._fill(offset + 1):
+            return self.lookahead[offset][0]
+        return None
+
+    def peek_value(self, offset=0):
+        if self._fill(offset + 1):
+            return self.lookahead[offset][1]
+        return None
+
+    def advance(self):
+        if not self._fill(1):
+            raise SyntaxError("Unexpected end of input")
+        self.pos += 1
+        return self.lookahead.popleft()
+
+    def expect(self, token_type, message=None):
+        if self.peek_type() != token_type:
+            return super().expect(token_type, message)
+        return self.advance()
+
+
+def token_stream(tokens):
+    """Wrap a token list, TokenBuffer or token iterator in a stream class."""
+    if isinstance(tokens, TokenStream):
+        return tokens
+    if isinstance(tokens, lexer.TokenBuffer):
+        return CompactTokenStream(tokens)
+    if not hasattr(tokens, '__len__'):
+        return LazyTokenStream(tokens)
+    return TokenStream(tokens)
 
 
 def parse(tokens, source_code):
-    ast = []
-    
+    return list(iter_parse(tokens, source_code))
+
+def iter_parse(tokens, source_code):
+    """Yield top-level statements one at a time as they are parsed."""
+    tokens = token_stream(tokens)
+
     while tokens:
         # Skip newlines
-        while tokens and tokens[0][0] == 'NEWLINE':
-            tokens.pop(0)
-            
+        while tokens.match('NEWLINE'):
+            pass
+
         if not tokens:
             break
-            
+
         # Parse statement
-        if tokens[0][0] in ['VAR', 'FUNCTION', 'IF', 'PRINT', 'RETURN', 'IDENTIFIER']:
-            statement = parse_statement(tokens, source_code)
-            ast.append(statement)
+        if tokens.peek_type() in ['VAR', 'FUNCTION', 'IF', 'FOR', 'PARALLEL', 'PRINT', 'RETURN',
+                                  'IMPORT', 'IDENTIFIER']:
+            yield parse_statement(tokens, source_code)
         else:
-            token = tokens[0]
+            token = tokens.peek()
             raise SyntaxError(f"Unexpected token {token[0]} at line {token[2]}")
-            
-    return ast
 
 def parse_statement(tokens, source_code):
-    token = tokens[0]
-    
-    if token[0] == 'VAR':
+    token_type = tokens.peek_type()
+
+    if token_type == 'VAR':
         return parse_var_declaration(tokens, source_code)
-    elif token[0] == 'FUNCTION':
+    elif token_type == 'FUNCTION':
         return parse_function_definition(tokens, source_code)
-    elif token[0] == 'IF':
+    elif token_type == 'IF':
         return parse_if_statement(tokens, source_code)
-    elif token[0] == 'PRINT':
+    elif token_type == 'FOR':
+        return parse_for_loop(tokens, source_code)
+    elif token_type == 'PARALLEL':
+        return parse_parallel_loop(tokens, source_code)
+    elif token_type == 'PRINT':
         return parse_print_statement(tokens, source_code)
-    elif token[0] == 'RETURN':
+    elif token_type == 'RETURN':
         return parse_return_statement(tokens, source_code)
-    elif token[0] == 'IDENTIFIER':
+    elif token_type == 'IMPORT':
+        return parse_import_statement(tokens, source_code)
+    elif token_type == 'IDENTIFIER':
         # Check if it's a function call
-        if len(tokens) > 1 and tokens[1][0] == 'LPAREN':
-            return parse_function_call(tokens, source_code)
+        if is_call_ahead(tokens):
+            call = parse_function_call(tokens, source_code)
+            # Remove semicolon if present
+            tokens.match('SEMI')
+            return call
         else:
-            raise SyntaxError(f"Unexpected identifier at line {token[2]}")
+            raise SyntaxError(f"Unexpected identifier at line {tokens.peek()[2]}")
     else:
+        token = tokens.peek()
         raise SyntaxError(f"Unexpected token {token[0]} at line {token[2]}")
 
+def is_call_ahead(tokens):
+    """Whether the tokens ahead are a name, possibly dotted, then '('."""
+    offset = 1
+    while tokens.peek_type(offset) == 'DOT' and tokens.peek_type(offset + 1) == 'IDENTIFIER':
+        offset += 2
+    return tokens.peek_type(offset) == 'LPAREN'
+
+def parse_dotted_name(tokens):
+    _, name, line = tokens.advance()
+    while tokens.match('DOT'):
+        name += '.' + tokens.expect('IDENTIFIER', "Expected name after '.'")[1]
+    return name, line
+
 def parse_function_call(tokens, source_code):
-    function_name = tokens.pop(0)[1]  # Get function name
-    tokens.pop(0)  # Remove LPAREN
-    
+    function_name, line = parse_dotted_name(tokens)  # Get function name
+    tokens.advance()  # Remove LPAREN
+
     args = []
-    while tokens and tokens[0][0] != 'RPAREN':
-        if tokens[0][0] == 'IDENTIFIER':
-            args.append(tokens.pop(0)[1])
-        elif tokens[0][0] == 'COMMA':
-            tokens.pop(0)
-        else:
-            break
-            
-    if not tokens or tokens[0][0] != 'RPAREN':
-        raise SyntaxError("Expected closing parenthesis")
-        
-    tokens.pop(0)  # Remove RPAREN
-    
-    # Remove semicolon if present
-    if tokens and tokens[0][0] == 'SEMI':
-        tokens.pop(0)
-        
-    return {
-        'type': 'function_call',
-        'name': function_name,
-        'args': args
-    }
+    if tokens.peek_type() != 'RPAREN':
+        args.append(parse_expression(tokens, source_code))
+        while tokens.match('COMMA'):
+            args.append(parse_expression(tokens, source_code))
+
+    tokens.expect('RPAREN', "Expected closing parenthesis")
+
+    return FunctionCall(function_name, args, line)
 
 def parse_var_declaration(tokens, source_code):
-    tokens.pop(0)  # Remove VAR
-    
+    line = tokens.advance()[2]  # Remove VAR
+
     # Get variable name
-    if not tokens or tokens[0][0] != 'IDENTIFIER':
-        raise SyntaxError("Expected variable name")
-    var_name = tokens.pop(0)[1]
-    
+    var_name = tokens.expect('IDENTIFIER', "Expected variable name")[1]
+
     # Parse assignment
-    if not tokens or tokens[0][0] != 'ASSIGN':
-        raise SyntaxError("Expected assignment operator")
-    tokens.pop(0)  # Remove ASSIGN
-    
+    tokens.expect('ASSIGN', "Expected assignment operator")
+
     # Parse value
     if not tokens:
         raise SyntaxError("Expected value")
-    
-    if tokens[0][0] == 'STRING':
-        value = tokens.pop(0)[1].strip('"\'')  # Remove quotes
-    elif tokens[0][0] == 'NUMBER':
-        value = int(tokens.pop(0)[1])
-    else:
-        raise SyntaxError(f"Expected string or number, got {tokens[0][0]}")
-    
+    if tokens.peek_type() == 'PARALLEL':
+        # සඳහන් x = සමාන්තර (...) { ... } binds the loop's combined result
+        loop = parse_parallel_loop(tokens, source_code, target=var_name)
+        tokens.match('SEMI')
+        return loop
+    value = parse_expression(tokens, source_code)
+
     # Parse semicolon
-    if not tokens or tokens[0][0] != 'SEMI':
-        raise SyntaxError("Expected semicolon")
-    tokens.pop(0)  # Remove SEMI
-    
-    return {
-        'type': 'var_declaration',
-        'name': var_name,
-        'value': value
-    }
+    tokens.expect('SEMI', "Expected semicolon")
+
+    return VarDeclaration(var_name, value, line)
 
 def parse_function_definition(tokens, source_code):
-    tokens.pop(0)  # Remove FUNCTION
-    
+    line = tokens.advance()[2]  # Remove FUNCTION
+
     # Get function name
-    if not tokens or tokens[0][0] != 'IDENTIFIER':
-        raise SyntaxError("Expected function name")
-    function_name = tokens.pop(0)[1]
-    
+    function_name = tokens.expect('IDENTIFIER', "Expected function name")[1]
+
     # Parse parameters
-    if not tokens or tokens[0][0] != 'LPAREN':
-        raise SyntaxError("Expected opening parenthesis")
-    tokens.pop(0)  # Remove LPAREN
-    
+    tokens.expect('LPAREN', "Expected opening parenthesis")
+
     parameters = []
-    while tokens and tokens[0][0] != 'RPAREN':
-        if tokens[0][0] == 'IDENTIFIER':
-            parameters.append(tokens.pop(0)[1])
-        elif tokens[0][0] == 'COMMA':
-            tokens.pop(0)
-        else:
+    while tokens and tokens.peek_type() != 'RPAREN':
+        if tokens.peek_type() == 'IDENTIFIER':
+            parameters.append(tokens.advance()[1])
+        elif not tokens.match('COMMA'):
             break
-            
-    if not tokens or tokens[0][0] != 'RPAREN':
-        raise SyntaxError("Expected closing parenthesis")
-    tokens.pop(0)  # Remove RPAREN
-    
+
+    tokens.expect('RPAREN', "Expected closing parenthesis")
+
     # Parse function body
-    if not tokens or tokens[0][0] != 'LBRACE':
-        raise SyntaxError("Expected opening brace")
-    tokens.pop(0)  # Remove LBRACE
-    
-    body = []
-    while tokens and tokens[0][0] != 'RBRACE':
-        statement = parse_statement(tokens, source_code)
-        body.append(statement)
-        
-    if not tokens or tokens[0][0] != 'RBRACE':
-        raise SyntaxError("Expected closing brace")
-    tokens.pop(0)  # Remove RBRACE
-    
-    return {
-        'type': 'function_definition',
-        'name': function_name,
-        'params': parameters,
-        'body': body
-    }
+    tokens.expect('LBRACE', "Expected opening brace")
+    body = parse_statements(tokens, source_code)
+    tokens.expect('RBRACE', "Expected closing brace")
+
+    return FunctionDefinition(function_name, parameters, body, line)
 
 def parse_if_statement(tokens, source_code):
-    tokens.pop(0)  # Remove IF
-    
+    line = tokens.advance()[2]  # Remove IF
+
     # Parse condition
-    if not tokens or tokens[0][0] != 'LPAREN':
-        raise SyntaxError("Expected opening parenthesis")
-    tokens.pop(0)  # Remove LPAREN
-    
+    tokens.expect('LPAREN', "Expected opening parenthesis")
     condition = parse_expression(tokens, source_code)
-    
-    if not tokens or tokens[0][0] != 'RPAREN':
-        raise SyntaxError("Expected closing parenthesis")
-    tokens.pop(0)  # Remove RPAREN
-    
+    tokens.expect('RPAREN', "Expected closing parenthesis")
+
     # Parse if body
-    if not tokens or tokens[0][0] != 'LBRACE':
-        raise SyntaxError("Expected opening brace")
-    tokens.pop(0)  # Remove LBRACE
-    
-    body = []
-    while tokens and tokens[0][0] != 'RBRACE':
-        statement = parse_statement(tokens, source_code)
-        body.append(statement)
-        
-    if not tokens or tokens[0][0] != 'RBRACE':
-        raise SyntaxError("Expected closing brace")
-    tokens.pop(0)  # Remove RBRACE
-    
+    tokens.expect('LBRACE', "Expected opening brace")
+    body = parse_statements(tokens, source_code)
+    tokens.expect('RBRACE', "Expected closing brace")
+
     # Parse else block if present
     else_body = None
-    if tokens and tokens[0][0] == 'ELSE':
-        tokens.pop(0)  # Remove ELSE
-        
-        if not tokens or tokens[0][0] != 'LBRACE':
-            raise SyntaxError("Expected opening brace")
-        tokens.pop(0)  # Remove LBRACE
-        
-        else_body = []
-        while tokens and tokens[0][0] != 'RBRACE':
-            statement = parse_statement(tokens, source_code)
-            else_body.append(statement)
-            
-        if not tokens or tokens[0][0] != 'RBRACE':
-            raise SyntaxError("Expected closing brace")
-        tokens.pop(0)  # Remove RBRACE
-    
-    return {
-        'type': 'if_statement',
-        'condition': condition,
-        'body': body,
-        'else_body': else_body
-    }
+    if tokens.match('ELSE'):
+        tokens.expect('LBRACE', "Expected opening brace")
+        else_body = parse_statements(tokens, source_code)
+        tokens.expect('RBRACE', "Expected closing brace")
+
+    return IfStatement(condition, body, else_body, line)
+
+def parse_for_loop(tokens, source_code):
+    line, name, start, end, body = parse_loop(tokens, source_code)
+
+    # The count is fixed when the loop starts, so the body may not change it
+    if rebinds(body, name):
+        raise SyntaxError(f"Loop variable {name} is changed inside its loop at line {line}")
+
+    return ForLoop(name, start, end, body, line)
+
+def parse_parallel_loop(tokens, source_code, target=None):
+    # The body runs as a function of the loop variable, so it may rebind it
+    line, name, start, end, body = parse_loop(tokens, source_code)
+    return ParallelLoop(name, start, end, body, target, line)
+
+def parse_loop(tokens, source_code):
+    """Parse `KEYWORD (name = start, end) { body }` for දක්වා and සමාන්තර."""
+    line = tokens.advance()[2]  # Remove FOR or PARALLEL
+
+    # Parse (name = start, end)
+    tokens.expect('LPAREN', "Expected opening parenthesis")
+    name = tokens.expect('IDENTIFIER', "Expected loop variable name")[1]
+    tokens.expect('ASSIGN', "Expected assignment operator")
+    start = parse_expression(tokens, source_code)
+    tokens.expect('COMMA', "Expected comma between the start and end of the loop")
+    end = parse_expression(tokens, source_code)
+    tokens.expect('RPAREN', "Expected closing parenthesis")
+
+    # Parse loop body
+    tokens.expect('LBRACE', "Expected opening brace")
+    body = parse_statements(tokens, source_code)
+    tokens.expect('RBRACE', "Expected closing brace")
+
+    return line, name, start, end, body
+
+def rebinds(statements, name):
+    """Whether statements bind name, not counting the own scopes of nested
+    functions and සමාන්තර bodies."""
+    for statement in statements:
+        if (isinstance(statement, (VarDeclaration, ForLoop, FunctionDefinition, ImportStatement))
+                and statement.name == name):
+            return True
+        if isinstance(statement, ParallelLoop):
+            if statement.target == name:
+                return True
+            continue
+        if isinstance(statement, FunctionDefinition):
+            continue
+        for block in statement._blocks:
+            if rebinds(getattr(statement, block) or [], name):
+                return True
+    return False
 
 def parse_print_statement(tokens, source_code):
-    tokens.pop(0)  # Remove PRINT
-    
+    line = tokens.advance()[2]  # Remove PRINT
+
     # Parse opening parenthesis
-    if not tokens or tokens[0][0] != 'LPAREN':
-        raise SyntaxError("Expected opening parenthesis")
-    tokens.pop(0)  # Remove LPAREN
-    
+    tokens.expect('LPAREN', "Expected opening parenthesis")
+
     # Parse value to print
     if not tokens:
         raise SyntaxError("Expected value to print")
-        
-    if tokens[0][0] == 'IDENTIFIER':
-        value = tokens.pop(0)[1]
-    elif tokens[0][0] == 'STRING':
-        value = tokens.pop(0)[1].strip('"\'')  # Remove quotes
-    elif tokens[0][0] == 'NUMBER':
-        value = int(tokens.pop(0)[1])
+
+    if tokens.peek_type() == 'IDENTIFIER':
+        value = tokens.advance()[1]
+    elif tokens.peek_type() == 'STRING':
+        value = tokens.advance()[1].strip('"\'')  # Remove quotes
+    elif tokens.peek_type() == 'NUMBER':
+        value = int(tokens.advance()[1])
     else:
-        raise SyntaxError(f"Expected identifier, string or number, got {tokens[0][0]}")
-    
+        raise SyntaxError(f"Expected identifier, string or number, got {tokens.peek_type()}")
+
     # Parse closing parenthesis
-    if not tokens or tokens[0][0] != 'RPAREN':
-        raise SyntaxError("Expected closing parenthesis")
-    tokens.pop(0)  # Remove RPAREN
-    
+    tokens.expect('RPAREN', "Expected closing parenthesis")
+
     # Parse semicolon
-    if not tokens or tokens[0][0] != 'SEMI':
-        raise SyntaxError("Expected semicolon")
-    tokens.pop(0)  # Remove SEMI
-    
-    return {
-        'type': 'print_statement',
-        'value': value
-    }
+    tokens.expect('SEMI', "Expected semicolon")
+
+    return PrintStatement(value, line)
+
+def parse_import_statement(tokens, source_code):
+    line = tokens.advance()[2]  # Remove IMPORT
+
+    module_name = tokens.expect('IDENTIFIER', "Expected module name")[1]
+
+    # Parse semicolon
+    tokens.expect('SEMI', "Expected semicolon")
+
+    return ImportStatement(module_name, line)
 
 def parse_return_statement(tokens, source_code):
-    tokens.pop(0)  # Remove RETURN
-    
+    line = tokens.advance()[2]  # Remove RETURN
+
     expression = parse_expression(tokens, source_code)
-    
+
     # Parse semicolon
-    if not tokens or tokens[0][0] != 'SEMI':
-        raise SyntaxError("Expected semicolon")
-    tokens.pop(0)  # Remove SEMI
-    
-    return {
-        'type': 'return_statement',
-        'value': expression
-    }
+    tokens.expect('SEMI', "Expected semicolon")
+
+    return ReturnStatement(expression, line)
 
 def parse_expression(tokens, source_code):
     return parse_comparison(tokens, source_code)
 
 def parse_comparison(tokens, source_code):
     expr = parse_term(tokens, source_code)
-    
-    while tokens and tokens[0][0] == 'COMPARE':
-        op = tokens.pop(0)[1]
+
+    while tokens.peek_type() == 'COMPARE':
+        op = OPERATORS[tokens.advance()[1]]
         right = parse_term(tokens, source_code)
-        expr = {
-            'type': 'binary_operation',
-            'left': expr,
-            'operator': op,
-            'right': right
-        }
-            
+        expr = BinaryOperation(expr, op, right, expr.line)
+
     return expr
 
 def parse_term(tokens, source_code):
     expr = parse_factor(tokens, source_code)
-    
-    while tokens and tokens[0][0] == 'OP' and tokens[0][1] in ['+', '-']:
-        op = tokens.pop(0)[1]
+
+    while tokens.peek_type() == 'OP' and tokens.peek_value() in ['+', '-']:
+        op = OPERATORS[tokens.advance()[1]]
         right = parse_factor(tokens, source_code)
-        expr = {
-            'type': 'binary_operation',
-            'left': expr,
-            'operator': op,
-            'right': right
-        }
-            
+        expr = BinaryOperation(expr, op, right, expr.line)
+
     return expr
 
 def parse_factor(tokens, source_code):
     expr = parse_primary(tokens, source_code)
-    
-    while tokens and tokens[0][0] == 'OP' and tokens[0][1] in ['*', '/']:
-        op = tokens.pop(0)[1]
+
+    while tokens.peek_type() == 'OP' and tokens.peek_value() in ['*', '/']:
+        op = OPERATORS[tokens.advance()[1]]
         right = parse_primary(tokens, source_code)
-        expr = {
-            'type': 'binary_operation',
-            'left': expr,
-            'operator': op,
-            'right': right
-        }
-            
+        expr = BinaryOperation(expr, op, right, expr.line)
+
     return expr
 
 def parse_primary(tokens, source_code):
-    token_type, value, line = tokens[0]
-        
+    expr = parse_atom(tokens, source_code)
+
+    # Indexing: a[i], a[i][j]
+    while tokens.match('LBRACKET'):
+        index = parse_expression(tokens, source_code)
+        tokens.expect('RBRACKET', "Expected closing bracket")
+        expr = ArrayIndex(expr, index, expr.line)
+
+    return expr
+
+def parse_atom(tokens, source_code):
+    if not tokens:
+        raise SyntaxError("Unexpected end of input")
+    if tokens.peek_type() == 'IDENTIFIER':
+        if is_call_ahead(tokens):  # Function call
+            return parse_function_call(tokens, source_code)
+        if tokens.peek_type(1) == 'DOT':  # Variable in a module
+            name, line = parse_dotted_name(tokens)
+            return Variable(name, line)
+    token_type, value, line = tokens.advance()
+
     if token_type == 'NUMBER':
-        tokens.pop(0)
-        return {
-            'type': 'number',
-            'value': int(value)
-        }
+        return Number(int(value), line)
     elif token_type == 'STRING':
-        tokens.pop(0)
-        return {
-            'type': 'string_literal',
-            'value': value.strip('"')  # Remove quotes
-        }
+        return StringLiteral(value.strip('"\''), line)  # Remove quotes
     elif token_type == 'IDENTIFIER':
-        tokens.pop(0)
-        if tokens and tokens[0][0] == 'LPAREN':  # Function call
-            return parse_function_call(tokens, source_code)
-        return {
-            'type': 'variable',
-            'name': value
-        }
+        return Variable(value, line)
     elif token_type == 'LPAREN':
-        tokens.pop(0)
         expr = parse_expression(tokens, source_code)
         expect(tokens, 'RPAREN')
         return expr
+    elif token_type == 'LBRACKET':
+        return parse_array_literal(tokens, source_code, line)
+    elif token_type == 'ARRAY':
+        return parse_array_range(tokens, source_code, line)
     else:
         raise SyntaxError(f"Unexpected token {token_type} at line {line}")
 
+def parse_array_literal(tokens, source_code, line):
+    # The LBRACKET is already consumed
+    elements = []
+    if tokens.peek_type() != 'RBRACKET':
+        elements.append(parse_expression(tokens, source_code))
+        while tokens.match('COMMA'):
+            elements.append(parse_expression(tokens, source_code))
+    tokens.expect('RBRACKET', "Expected closing bracket")
+    return ArrayLiteral(elements, line)
+
+def parse_array_range(tokens, source_code, line):
+    # අරාව(end) or අරාව(start, end); the ARRAY is already consumed
+    tokens.expect('LPAREN', "Expected opening parenthesis")
+    start = parse_expression(tokens, source_code)
+    end = None
+    if tokens.match('COMMA'):
+        end = parse_expression(tokens, source_code)
+    tokens.expect('RPAREN', "Expected closing parenthesis")
+    if end is None:
+        start, end = Number(0, line), start
+    return ArrayRange(start, end, line)
+
 def parse_statements(tokens, source_code):
     statements = []
-    while tokens and tokens[0][0] not in ['RBRACE', None]:
+    while tokens.peek_type() not in ['RBRACE', None]:
         statements.append(parse_statement(tokens, source_code))
     return statements
 
 def expect(tokens, token_type):
-    token = tokens.pop(0)
-    if token[0] != token_type:
-        raise SyntaxError(f"Expected {token_type}, got {token[0]} at line {token[2]}")
-    return token
-
-
+    return tokens.expect(token_type)
@@ -0,0 +1,147 @@
+"""Source-level profiler for Kethaka programs.
+
+kethaka --profile runs a program under sys.settrace and charges the time
+between trace events to the ක්‍රියාව function and .snl line that was
+executing, using the line numbers the compiler records in the code
+objects. Only frames compiled from the program's .snl are traced; time
+spent in Python built-ins such as print is charged to the line that
+called them. Tracing makes the program several times slower, but the
+time spent in the tracer itself is left out of every figure.
+"""
+import sys
+import time
+
+MAIN = '<main>'
+# The function the compiler runs the main program in (compiler.MAIN_FUNCTION)
+MAIN_FUNCTION = '_kethaka_main'
+# The line of the code around the main program (compiler.WRAPPER_LINE)
+WRAPPER_LINE = 0
+
+
+class SourceProfiler:
+    def __init__(self, code, timer=time.perf_counter):
+        self.filename = code.co_filename
+        self.timer = timer
+        # (name, first line) -> [calls, cumulative, self]
+        self.functions = {}
+        # line -> [hits, self]
+        self.lines = {}
+        # '<main>;outer;inner' -> self, for flamegraph.pl
+        self.stacks = {}
+        # One [key, line, self, children, stack] per active Kethaka frame
+        self.frames = []
+        self.active = {}
+        self.last = 0.0
+
+    def run(self, code, namespace):
+        self.last = self.timer()
+        sys.settrace(self._trace_call)
+        try:
+            exec(code, namespace)
+        finally:
+            sys.settrace(None)
+            self._charge(self.timer())
+            # Frames left by an exception propagating out of the program
+            while self.frames:
+                self._pop()
+
+    def _charge(self, now):
+        elapsed = now - self.last
+        if self.frames:
+            frame = self.frames[-1]
+            frame[2] += elapsed
+            line = self.lines.get(frame[1])
+            if line is not None:
+                line[1] += elapsed
+            self.stacks[frame[4]] = self.stacks.get(frame[4], 0.0) + elapsed
+
+    def _trace_call(self, frame, event, arg):
+        code = frame.f_code
+        if code.co_filename != self.filename:
+            return None
+        self._charge(self.timer())
+        if code.co_name == MAIN_FUNCTION and self.frames:
+            # Its lines and time belong to the <main> frame that called it
+            self.last = self.timer()
+            return self._trace_main
+        name = MAIN if code.co_name == '<module>' else code.co_name
+        key = (name, code.co_firstlineno)
+        function = self.functions.get(key)
+        if function is None:
+            function = self.functions[key] = [0, 0.0, 0.0]
+        function[0] += 1
+        self.active[key] = self.active.get(key, 0) + 1
+        stack = f"{self.frames[-1][4]};{name}" if self.frames else name
+        self.frames.append([key, None, 0.0, 0.0, stack])
+        self.last = self.timer()
+        return self._trace_local
+
+    def _trace_local(self, frame, event, arg):
+        self._charge(self.timer())
+        if event == 'line' and frame.f_lineno == WRAPPER_LINE:
+            # Charged to the function alone, as no source line runs it
+            self.frames[-1][1] = None
+        elif event == 'line':
+            line = self.lines.get(frame.f_lineno)
+            if line is None:
+                line = self.lines[frame.f_lineno] = [0, 0.0]
+            line[0] += 1
+            self.frames[-1][1] = frame.f_lineno
+        elif event == 'return':
+            self._pop()
+        self.last = self.timer()
+        return self._trace_local
+
+    def _trace_main(self, frame, event, arg):
+        if event == 'return':
+            self._charge(self.timer())
+            self.last = self.timer()
+            return self._trace_main
+        self._trace_local(frame, event, arg)
+        return self._trace_main
+
+    def _pop(self):
+        key, line, own, children, stack = self.frames.pop()
+        total = own + children
+        function = self.functions[key]
+        function[2] += own
+        self.active[key] -= 1
+        # Recursive calls are already inside the outermost call's total
+        if not self.active[key]:
+            function[1] += total
+        if self.frames:
+            self.frames[-1][3] += total
+
+    def format(self, source_lines=(), limit=20):
+        lines = [f"Profile of {self.filename}", "",
+                 f"{'calls':>10} {'cumulative':>12} {'self':>12}  function"]
+        for (name, first_line), (calls, cumulative, own) in sorted(
+                self.functions.items(), key=lambda item: -item[1][1]):
+            where = f" (line {first_line})" if name != MAIN else ""
+            lines.append(f"{calls:>10,} {cumulative * 1000:>9.2f} ms {own * 1000:>9.2f} ms  "
+                         f"{name}{where}")
+
+        lines += ["", f"{'hits':>10} {'self':>12} {'line':>6}  source"]
+        for line, (hits, own) in sorted(self.lines.items(), key=lambda item: -item[1][1])[:limit]:
+            text = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ''
+            lines.append(f"{hits:>10,} {own * 1000:>9.2f} ms {line:>6}  {text}")
+        return '\n'.join(lines)
+
+    def write_collapsed(self, path):
+        """Write stacks in the folded format read by flamegraph.pl and speedscope."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, own in sorted(self.stacks.items()):
+                microseconds = round(own * 1e6)
+                if microseconds:
+                    f.write(f"{stack} {microseconds}\n")
+
+
+def read_source_lines(*candidates):
+    """Lines of the first candidate path that can be read, for the report."""
+    for path in candidates:
+        try:
+            with open(path, encoding='utf-8') as f:
+                return f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            continue
+    return []
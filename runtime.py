@@ -0,0 +1,108 @@
+"""Compile and run Kethaka source inside the current process.
+
+For programs that embed Kethaka: no .kbc files and no interpreter start-up
+per run. Compiled code objects are kept in a bounded LRU CodeCache keyed
+by the source hash and -O level, so running the same snippet again only
+costs the exec.
+
+    import runtime
+    namespace = runtime.run_source('සඳහන් x = 10;\\nමුද්‍රණය(x);')
+    runtime.cache_stats()
+"""
+import threading
+from collections import OrderedDict
+
+from compiler import compile_source
+from kbc import source_hash
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class CodeCache:
+    """A thread-safe LRU cache of compiled code objects.
+
+    Compilation happens outside the lock, so threads compiling different
+    sources don't wait for each other; two threads that miss on the same
+    source at once both compile it and the later result is kept.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._codes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source_code, optimize=0):
+        key = (source_hash(source_code.encode('utf-8')), optimize)
+        with self._lock:
+            code = self._codes.get(key)
+            if code is not None:
+                self._codes.move_to_end(key)
+                self.hits += 1
+                return code
+            self.misses += 1
+
+        code = compile_source(source_code, optimize=optimize)
+
+        with self._lock:
+            self._codes[key] = code
+            self._codes.move_to_end(key)
+            while len(self._codes) > self.maxsize:
+                self._codes.popitem(last=False)
+                self.evictions += 1
+        return code
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._codes),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._codes.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._codes)
+
+
+_cache = CodeCache()
+
+
+def compile_cached(source_code, optimize=0, cache=None):
+    """compile_source through a CodeCache, the shared one by default."""
+    if cache is None:
+        cache = _cache
+    return cache.get(source_code, optimize)
+
+
+def run_source(source_code, globals=None, optimize=0, cache=None):
+    """Run Kethaka source and return the namespace it ran in.
+
+    globals is used as the program's namespace when given, so callers can
+    pre-bind names or read results back; otherwise a fresh dict is made.
+    SyntaxError is raised for invalid source, and errors raised by the
+    program propagate unchanged.
+    """
+    code = compile_cached(source_code, optimize, cache)
+    if globals is None:
+        globals = {'__name__': 'kethaka_program'}
+    exec(code, globals)
+    return globals
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,168 @@
+"""Name resolution for Kethaka programs.
+
+Every name a scope uses is one of
+
+    parameter  a ක්‍රියාව function's parameter
+    local      bound in this scope and only used by it
+    global     a module global: bound in the main program and read by a
+               function, or never bound in the program at all
+    builtin    never bound in the program and found in Python's builtins
+
+The main program is a scope of its own. The compiler runs it as a
+function, so its local names are fast locals, and a name of the main
+program that a function reads is declared global there. The body of a
+සමාන්තර loop runs as a function of its own and gets the main program's
+names from parallel.run, so it doesn't make them global.
+"""
+import builtins
+
+from nodes import (ForLoop, FunctionCall, FunctionDefinition, ImportStatement, ParallelLoop,
+                   PrintStatement, ReturnStatement, Variable, VarDeclaration)
+from optimizer import walk_expression
+
+PARAMETER = 'parameter'
+LOCAL = 'local'
+GLOBAL = 'global'
+BUILTIN = 'builtin'
+
+
+def _root(name):
+    # `ගණිතය.වර්ගය` reads the module name ගණිතය
+    return name.split('.')[0]
+
+
+class Scope:
+    """The names one ක්‍රියාව function, or the main program, binds and reads.
+
+    Statements are added one at a time, so a program can be analysed
+    while it is still being parsed.
+    """
+
+    def __init__(self, params=()):
+        self.params = list(params)
+        self.bound = set(self.params)
+        # How many statements bind each name
+        self.bindings = dict.fromkeys(self.params, 1)
+        self.read = set()
+        # Names nested functions read that none of them bind
+        self.free_in_functions = set()
+        # Line of the first ආපසු directly in this scope, if any
+        self.returns_at = None
+
+    def add(self, statement):
+        if isinstance(statement, FunctionDefinition):
+            self.add_function(statement.name, function_scope(statement).free())
+            return
+        if isinstance(statement, ParallelLoop):
+            # The body runs apart, on the names run() passes it
+            if statement.target is not None:
+                self._bind(statement.target)
+            self._read(statement.start)
+            self._read(statement.end)
+            return
+        if isinstance(statement, (VarDeclaration, ForLoop)):
+            self._bind(statement.name)
+        elif isinstance(statement, ImportStatement):
+            self._bind(_root(statement.name))
+        elif isinstance(statement, PrintStatement):
+            # මුද්‍රණය(x) keeps the bare name, not a Variable
+            if isinstance(statement.value, str):
+                self.read.add(statement.value)
+        elif isinstance(statement, ReturnStatement) and self.returns_at is None:
+            self.returns_at = statement.line
+        for name in statement._expressions:
+            self._read(getattr(statement, name))
+        for name in statement._blocks:
+            for nested in getattr(statement, name) or ():
+                Scope.add(self, nested)
+
+    def add_function(self, name, free):
+        """Add a ක්‍රියාව definition known only by its name and free names."""
+        self._bind(name)
+        self.free_in_functions |= free
+
+    def _bind(self, name):
+        self.bound.add(name)
+        self.bindings[name] = self.bindings.get(name, 0) + 1
+
+    def _read(self, expression):
+        for node in walk_expression(expression):
+            if isinstance(node, (Variable, FunctionCall)):
+                self.read.add(_root(node.name))
+
+    def free(self):
+        """Names this scope and the functions nested in it read but don't bind."""
+        return (self.read | self.free_in_functions) - self.bound
+
+    def kind(self, name):
+        if name in self.params:
+            return PARAMETER
+        if name in self.bound:
+            return LOCAL
+        if hasattr(builtins, name):
+            return BUILTIN
+        return GLOBAL
+
+    def symbols(self):
+        """{name: kind} for every name this scope binds or reads."""
+        return {name: self.kind(name) for name in sorted(self.bound | self.read)}
+
+
+class ModuleScope(Scope):
+    """The main program: top-level statements and everything nested in them."""
+
+    def __init__(self):
+        super().__init__()
+        # Functions defined by top-level statements, not inside a නම් or loop
+        self.top_level_functions = []
+
+    def add(self, statement):
+        if isinstance(statement, FunctionDefinition):
+            self.top_level_functions.append(statement.name)
+        super().add(statement)
+
+    def add_function(self, name, free, top_level=False):
+        if top_level:
+            self.top_level_functions.append(name)
+        super().add_function(name, free)
+
+    def module_functions(self):
+        """Top-level functions whose definition is their name's only binding.
+
+        These can be defined in the module before the main program starts:
+        nothing else could have been bound to the name first.
+        """
+        return sorted(name for name in set(self.top_level_functions)
+                      if self.bindings[name] == 1)
+
+    def kind(self, name):
+        if name in self.bound and name in self.free_in_functions:
+            return GLOBAL
+        return super().kind(name)
+
+    def global_names(self):
+        """Names the main program binds that have to stay module globals."""
+        return sorted(self.bound & self.free_in_functions - set(self.module_functions()))
+
+    def builtin_names(self):
+        """Builtins only the main program reads.
+
+        A builtin a function also reads is left alone: bound as a local of
+        the main program, it would turn into a closure cell of the function.
+        """
+        return sorted(name for name in self.read - self.bound - self.free_in_functions
+                      if hasattr(builtins, name))
+
+
+def function_scope(function):
+    scope = Scope(function.params)
+    for statement in function.body:
+        scope.add(statement)
+    return scope
+
+
+def module_scope(program):
+    scope = ModuleScope()
+    for statement in program:
+        scope.add(statement)
+    return scope
@@ -0,0 +1,155 @@
+"""A long-lived compile server for kethakac.
+
+`kethakac --daemon` listens on a Unix domain socket and compiles files in
+a pool of worker processes that were forked with lexer, parser and
+compiler already imported, so a request only pays for the compile itself.
+Single-file `kethakac` runs send their file to the server when one is
+listening and compile in-process otherwise.
+
+The protocol is one JSON object per line in each direction:
+
+    {"command": "compile", "source": "/abs/a.snl", "output": "/abs/a.kbc",
+     "force": false, "optimize": 0, "buffered_output": false}
+    -> {"status": "compiled" | "up-to-date" | "failed", "error": null}
+    {"command": "ping"}      -> {"status": "ok", "pid": 1234, "jobs": 8}
+    {"command": "shutdown"}  -> {"status": "ok"}
+
+Clients use client.py, which this module re-exports, so that they
+don't load socketserver or the compiler just to talk to the server.
+"""
+import json
+import os
+import socketserver
+import threading
+
+from client import compile_remote, default_socket_path, send_request  # noqa: F401
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # A client may send several requests over one connection
+        for line in self.rfile:
+            try:
+                reply = self.server.dispatch(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {'status': 'failed', 'error': f"Bad request: {e}"}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if self.server.stopping:
+                # After the reply is sent; shutdown() waits for
+                # serve_forever(), so it can't run on this thread either
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class CompileServer(socketserver.ThreadingUnixStreamServer):
+    """Accepts connections on threads and compiles on a process pool."""
+    daemon_threads = True
+
+    def __init__(self, socket_path, executor, jobs):
+        self.executor = executor
+        self.jobs = jobs
+        self.stopping = False
+        super().__init__(socket_path, CompileHandler)
+
+    def dispatch(self, request):
+        command = request['command']
+        if command == 'compile':
+            future = self.executor.submit(_compile, request['source'], request['output'],
+                                          force=bool(request.get('force')),
+                                          optimize=int(request.get('optimize', 0)),
+                                          buffered_output=bool(request.get('buffered_output')))
+            status, error = future.result()
+            return {'status': status, 'error': error}
+        if command == 'ping':
+            return {'status': 'ok', 'pid': os.getpid(), 'jobs': self.jobs}
+        if command == 'shutdown':
+            self.stopping = True
+            return {'status': 'ok'}
+        raise ValueError(f"unknown command {command!r}")
+
+
+_incremental = None
+
+# Compiled by every worker as it starts, to get the first-use costs of the
+# lexer, parser, optimizer and Python's compiler out of the way
+WARM_SOURCE = """ක්‍රියාව f(n) {
+    නම් (n < 2) {
+        ආපසු n;
+    }
+    ආපසු f(n - 1) + n * 2;
+}
+සඳහන් a = [1, 2, 3];
+දක්වා (i = 0, 3) {
+    සඳහන් x = f(i) + a[i];
+    මුද්‍රණය(x);
+}
+"""
+
+
+def _compile(source_file, output_file, **options):
+    from compiler import compile_to_bytecode
+    try:
+        compiled = compile_to_bytecode(source_file, output_file,
+                                       incremental=_incremental, **options)
+        return 'compiled' if compiled else 'up-to-date', None
+    except Exception as e:
+        return 'failed', f"{type(e).__name__}: {e}"
+
+
+def _warm():
+    """Prepare a worker process before it takes any request.
+
+    Each worker keeps one IncrementalCompiler between requests.
+    """
+    global _incremental
+    from compiler import compile_source
+    from incremental import IncrementalCompiler
+    from kbc import source_hash
+    _incremental = IncrementalCompiler()
+    for optimize in (0, 2):
+        compile_source(WARM_SOURCE, optimize=optimize)
+    # hashlib is imported on first use
+    source_hash(WARM_SOURCE.encode('utf-8'))
+
+
+def serve(socket_path=None, jobs=None):
+    """Run the compile server until a shutdown request; returns an exit code."""
+    # Imported before the pool forks, so every worker starts warm
+    import compiler  # noqa: F401
+    from concurrent.futures import ProcessPoolExecutor
+
+    socket_path = socket_path or default_socket_path()
+    if send_request({'command': 'ping'}, socket_path) is not None:
+        print(f"A compile server is already listening on {socket_path}")
+        return 1
+    if os.path.exists(socket_path):
+        # Left behind by a server that didn't shut down cleanly
+        os.unlink(socket_path)
+
+    jobs = jobs or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_warm)
+    # Only the owner may connect to the socket
+    old_umask = os.umask(0o177)
+    try:
+        server = CompileServer(socket_path, executor, jobs)
+    finally:
+        os.umask(old_umask)
+    # The pool starts a worker per task it can't hand to an idle one, so
+    # this starts, and warms, all of them before the first request
+    for _ in range(jobs):
+        executor.submit(os.getpid)
+    print(f"Compile server listening on {socket_path} with {jobs} workers")
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(cancel_futures=True)
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+    print("Compile server stopped")
+    return 0
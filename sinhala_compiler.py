@@ -1,37 +1,26 @@
+import os
 import sys
-from lexer import lexer
-from parser import parse
-from compiler import compile_to_python
+import types
+
+from importer import DirectoryFinder, load_source
 
 def main():
     if len(sys.argv) != 2:
         print("භාවිතය: python sinhala_compiler.py <file.snl>")
         return
-    
-    # Check if Python is available
+
+    # Same as `kethaka run <file.snl>`: compiled in memory, or loaded from
+    # a fresh .kbc next to the source, and run in this process
+    source_file = sys.argv[1]
+    DirectoryFinder(os.path.dirname(os.path.abspath(source_file))).install()
     try:
-        import subprocess
-        subprocess.run(["python", "--version"], check=True)
-    except FileNotFoundError:
-        try:
-            subprocess.run(["python3", "--version"], check=True)
-        except FileNotFoundError:
-            print("Error: Neither 'python' nor 'python3' command found.")
-            print("Please ensure Python is installed and available in your PATH.")
-            return
-    
-    with open(sys.argv[1], "r", encoding="utf-8") as f:
-        code = f.read()
-    
-    tokens = lexer(code)
-    ast = parse(tokens, code)
-    compiled_code = compile_to_python(ast)
+        code = load_source(source_file)
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"Error: {source_file}: {e}")
+        sys.exit(1)
 
-    with open("output.py", "w", encoding="utf-8") as f:
-        f.write(compiled_code)
-    
-    print("Compiled Successfully! Running output...")
-    exec(compiled_code)  # Execute compiled Python code
+    module = types.ModuleType('kethaka_program')
+    exec(code, module.__dict__)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,201 @@
+"""kethakac --watch: recompile .snl files as they are saved.
+
+Changes are picked up with inotify on Linux and by polling elsewhere.
+Saves that arrive in a burst (an editor writing several files, or
+writing one file in steps) are collected until DEBOUNCE seconds pass
+without another change, then each changed file goes through
+compile_to_bytecode in this process. The lexer, parser and compiler stay
+loaded between rebuilds, and an IncrementalCompiler recompiles only the
+functions and statement runs that changed.
+"""
+import ctypes
+import os
+import select
+import struct
+import sys
+import time
+
+from batch import collect_sources, output_path
+from compiler import compile_to_bytecode
+from incremental import IncrementalCompiler
+
+DEBOUNCE = 0.02
+POLL_INTERVAL = 0.25
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Finds changed sources by comparing mtime and size between scans."""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for source_file in collect_sources(self.paths):
+            try:
+                stat = os.stat(source_file)
+            except OSError:
+                continue
+            snapshot[source_file] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Return the sources changed since the last call, waiting at most timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {path for path, state in snapshot.items()
+                       if self.snapshot.get(path) != state}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Finds changed sources from inotify events on every watched directory."""
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, paths):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        # Named files are watched through their directory
+        self.files = set()
+        self.trees = []
+        for path in paths:
+            if os.path.isdir(path):
+                self.trees.append(os.path.normpath(path))
+                for root, dirs, files in os.walk(path):
+                    self.add_directory(root)
+            else:
+                self.files.add(os.path.normpath(path))
+                self.add_directory(os.path.dirname(path) or '.')
+
+    def add_directory(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Can't watch {directory}")
+        self.directories[wd] = directory
+
+    def in_tree(self, path):
+        return any(tree == '.' or path.startswith(tree + os.sep) for tree in self.trees)
+
+    def wanted(self, path):
+        return path in self.files or (path.endswith('.snl') and self.in_tree(path))
+
+    def wait(self, timeout=None):
+        changed = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; rebuild whatever is out of date
+                return set(collect_sources(list(self.files) + self.trees))
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.normpath(os.path.join(directory, name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and self.in_tree(path):
+                    for root, dirs, files in os.walk(path):
+                        self.add_directory(root)
+                        changed.update(os.path.join(root, name) for name in files
+                                       if name.endswith('.snl'))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self.wanted(path):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(paths):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+def rebuild(source_file, options, detected=None):
+    start = time.perf_counter()
+    output_file = output_path(source_file)
+    try:
+        compiled = compile_to_bytecode(source_file, output_file, **options)
+    except Exception as e:
+        # Report the error and keep watching
+        print(f"Error compiling {source_file}: {e}", flush=True)
+        return
+    finished = time.perf_counter()
+    if not compiled:
+        return
+    message = f"Rebuilt {output_file} in {(finished - start) * 1000:.1f} ms"
+    if detected is not None:
+        message += f" ({(finished - detected) * 1000:.1f} ms after the save was seen)"
+    print(message, flush=True)
+
+
+def watch(paths, debounce=DEBOUNCE, **options):
+    """Build everything under paths, then rebuild sources as they change.
+
+    options go to compile_to_bytecode; force only applies to the first
+    build. Runs until interrupted.
+    """
+    # A file's first rebuild compiles it whole; later ones reuse its units
+    options['incremental'] = IncrementalCompiler()
+    for source_file in collect_sources(paths):
+        rebuild(source_file, options)
+    options['force'] = False
+
+    watcher = make_watcher(paths)
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"Watching {', '.join(paths)} ({kind}); press Ctrl-C to stop", flush=True)
+    try:
+        while True:
+            changed = watcher.wait()
+            if not changed:
+                continue
+            detected = time.perf_counter()
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+                detected = time.perf_counter()
+            for source_file in sorted(changed):
+                # Unchanged contents are skipped by compile_to_bytecode's cache check
+                rebuild(source_file, options, detected)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()